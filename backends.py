@@ -0,0 +1,55 @@
+import importlib
+import threading
+
+from tracing import logger, span
+
+# Heavy third-party libraries (OCR, PDF, NLP) are imported the first time a
+# conversion needs them, not when parsed/ocr/convert are imported, so a DOCX
+# conversion or a CLI that only prints --help never pays for spaCy or pytesseract.
+# Each backend is loaded once per process; get_backend() returns the cached object.
+
+_loaders = {}
+_loaded = {}
+_lock = threading.RLock()
+
+
+def register_backend(name, loader):
+    # loader() -> the module or object callers use; replaces any earlier registration.
+    with _lock:
+        _loaders[name] = loader
+        _loaded.pop(name, None)
+
+
+def get_backend(name):
+    backend = _loaded.get(name)
+    if backend is not None:
+        return backend
+    with _lock:
+        if name not in _loaded:
+            if name not in _loaders:
+                raise KeyError(f"Unknown backend {name!r}; known: {', '.join(sorted(_loaders))}")
+            with span("backend.load", backend=name):
+                _loaded[name] = _loaders[name]()
+            logger.debug("Loaded backend %s", name)
+        return _loaded[name]
+
+
+def loaded_backends():
+    return sorted(_loaded)
+
+
+def preload_backends(names):
+    # Load backends up front (e.g. in a worker initializer); failures are logged, not raised.
+    for name in names:
+        try:
+            get_backend(name)
+        except Exception as e:
+            logger.warning("Could not preload backend %s: %s", name, e)
+
+
+def _module(name):
+    return lambda: importlib.import_module(name)
+
+
+for _name in ("PyPDF2", "docx", "fpdf", "numpy", "PIL.Image", "PIL.ImageFilter", "pyresparser", "tesserocr"):
+    register_backend(_name, _module(_name))
@@ -0,0 +1,297 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import nlp_model
+import ocr
+import tracing
+from parsed import parse_resume
+from tracing import logger
+from layout import generate_docx, render_docx
+from pdf_layout import generate_pdf
+from cache import get_or_convert
+from dedup import convert_with_index
+from limits import Deadline
+from store import INGEST_BATCH, ResumeStore
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+def _is_supported(path):
+    return os.path.splitext(path)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+def collect_inputs(sources):
+    # Each source may be a directory (walked recursively), a glob pattern,
+    # a manifest file (@list.txt, one path per line) or a plain file path.
+    seen = set()
+    inputs = []
+
+    def add(path):
+        path = os.path.abspath(path)
+        if path not in seen and os.path.isfile(path) and _is_supported(path):
+            seen.add(path)
+            inputs.append(path)
+
+    for source in sources:
+        if source.startswith("@"):
+            manifest = source[1:]
+            base = os.path.dirname(os.path.abspath(manifest))
+            with open(manifest, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        add(line if os.path.isabs(line) else os.path.join(base, line))
+        elif os.path.isdir(source):
+            for root, _, files in os.walk(source):
+                for name in sorted(files):
+                    add(os.path.join(root, name))
+        elif any(ch in source for ch in "*?["):
+            for path in sorted(glob.glob(source, recursive=True)):
+                add(path)
+        else:
+            add(source)
+    return inputs
+
+
+def plan_outputs(inputs, output_dir):
+    # Map each input to a unique DOCX path; files sharing a stem get a numeric suffix.
+    used = {}
+    plan = []
+    for path in inputs:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        count = used.get(stem.lower(), 0)
+        used[stem.lower()] = count + 1
+        name = f"{stem}.docx" if count == 0 else f"{stem}_{count}.docx"
+        plan.append((path, os.path.join(output_dir, name)))
+    return plan
+
+
+def parse_path(input_path, page_texts=None, deadline=None):
+    return parse_resume(input_path, deadline=deadline, page_texts=page_texts)
+
+
+def convert_one(input_path, output_path, include_data=False, use_cache=False, pdf=False, dedup=False):
+    start = time.perf_counter()
+    record = {"input": input_path, "output": None, "status": "ok"}
+    try:
+        if use_cache or dedup:
+            with open(input_path, "rb") as f:
+                data = f.read()
+            if dedup:
+                deadline = Deadline()
+                parsed, docx_bytes, hit, match = convert_with_index(
+                    data, input_path, lambda _data, page_texts: parse_path(input_path, page_texts, deadline),
+                    render_docx, deadline=deadline)
+                if match:
+                    record["near_duplicate"] = match
+            else:
+                parsed, docx_bytes, hit = get_or_convert(data, lambda _data: parse_path(input_path), render_docx,
+                                                         filename=input_path)
+            record["cached"] = hit
+            if docx_bytes is not None:
+                with open(output_path, "wb") as f:
+                    f.write(docx_bytes)
+        else:
+            parsed = parse_path(input_path)
+        if not parsed or "error" in parsed:
+            record["status"] = "error"
+            record["error"] = (parsed or {}).get("error", "Parser returned no data.")
+            if (parsed or {}).get("stage"):
+                # Stopped by a limit (limits.py): the stage it was in.
+                record["stage"] = parsed["stage"]
+        else:
+            if not (use_cache or dedup):
+                generate_docx(parsed, output_path)
+            record["output"] = output_path
+            if pdf:
+                record["pdf_output"] = generate_pdf(parsed, os.path.splitext(output_path)[0] + ".pdf")
+            record["name"] = parsed.get("name", "")
+            record["email"] = parsed.get("email", "")
+            record["skills"] = len(parsed.get("skills", []))
+            record["experience"] = len(parsed.get("experience", []))
+            if include_data:
+                record["data"] = parsed
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def init_worker(trace_dir=None):
+    if trace_dir:
+        tracing.add_sink(tracing.JsonLinesSink(os.path.join(trace_dir, f"trace-{os.getpid()}.jsonl")))
+    if nlp_model.PRELOAD_NLP:
+        nlp_model.preload_nlp_model()
+
+
+def run_batch(plan, log_path, workers=None, include_data=False, use_cache=False, progress_every=25,
+              trace_dir=None, pdf=False, dedup=False, store=None, out=sys.stderr):
+    # store: a ResumeStore that successful results are bulk-ingested into, INGEST_BATCH at a time.
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    total = len(plan)
+    done = failed = 0
+    start = time.perf_counter()
+    to_store = []
+
+    def report(final=False):
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        prefix = "Done" if final else "Progress"
+        print(f"{prefix}: {done}/{total} files, {failed} failed, {elapsed:.1f}s, {rate:.2f} files/sec", file=out)
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(trace_dir,))
+
+    # A worker that crashes or is OOM-killed breaks the whole pool: every file in
+    # flight fails with BrokenProcessPool, whichever one caused it. The pool is
+    # then rebuilt and those files are retried one at a time, so only a file that
+    # kills its worker again on its own gets an error record.
+    suspects = deque()
+    pending = {}
+    pool = new_pool()
+    try:
+        with open(log_path, "a", encoding="utf-8") as log:
+
+            def record_result(record):
+                nonlocal done, failed, to_store
+                done += 1
+                if record["status"] != "ok":
+                    failed += 1
+                if store is not None and record.get("data"):
+                    to_store.append((record["data"] if include_data else record.pop("data"), None, record["input"]))
+                    if len(to_store) >= INGEST_BATCH:
+                        store.ingest(to_store)
+                        to_store = []
+                log.write(json.dumps(record) + "\n")
+                log.flush()
+                if progress_every and done % progress_every == 0:
+                    report()
+
+            queue = iter(plan)
+            exhausted = False
+            while pending or suspects or not exhausted:
+                # pending maps each future to (item, alone): alone when it was a suspect retried by itself.
+                isolated = bool(suspects) or any(alone for _, alone in pending.values())
+                broken = False
+                while len(pending) < (1 if isolated else max_in_flight):
+                    item = suspects.popleft() if isolated else next(queue, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    try:
+                        future = pool.submit(convert_one, item[0], item[1], include_data or store is not None,
+                                             use_cache, pdf, dedup)
+                    except BrokenProcessPool:
+                        suspects.appendleft(item)
+                        broken = True
+                        break
+                    pending[future] = (item, isolated)
+                if pending and not broken:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        item, alone = pending.pop(future)
+                        try:
+                            record = future.result()
+                        except BrokenProcessPool as e:
+                            broken = True
+                            if not alone:
+                                suspects.append(item)
+                                continue
+                            logger.warning("Worker died converting %s; rebuilding the pool.", item[0])
+                            record = {"input": item[0], "output": None, "status": "error",
+                                      "error": f"{type(e).__name__}: the worker process died converting this file."}
+                        except Exception as e:
+                            record = {"input": item[0], "output": None, "status": "error",
+                                      "error": f"{type(e).__name__}: {e}"}
+                        record_result(record)
+                if broken:
+                    # Whatever else was in flight went down with the pool, unless it had already finished.
+                    for future, (item, _) in pending.items():
+                        if future.done() and future.exception() is None:
+                            record_result(future.result())
+                        else:
+                            suspects.append(item)
+                    pending.clear()
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    pool = new_pool()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    if to_store:
+        store.ingest(to_store)
+    report(final=True)
+    elapsed = time.perf_counter() - start
+    return {"total": total, "failed": failed, "seconds": elapsed,
+            "files_per_sec": total / elapsed if elapsed > 0 else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a batch of resumes to the Nehish DOCX format.")
+    parser.add_argument("sources", nargs="+",
+                        help="Directories, glob patterns, files, or @manifest files (one path per line).")
+    parser.add_argument("-o", "--output-dir", default="converted_resumes", help="Directory for generated DOCX files.")
+    parser.add_argument("-l", "--log", default=None, help="JSONL results/errors log (default: <output-dir>/results.jsonl).")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--ocr-workers", type=int, default=1,
+                        help="OCR threads per worker process (default: 1, the process pool already uses every core).")
+    parser.add_argument("--ocr-backend", choices=["auto"] + sorted(ocr.OCR_BACKENDS), default=None,
+                        help="OCR engine (default: RESUME_OCR_BACKEND or auto, tesserocr when installed).")
+    parser.add_argument("--ocr-adaptive", action="store_true",
+                        help="OCR at low DPI first and re-render only low-confidence pages (RESUME_OCR_DPI_MODE=adaptive).")
+    parser.add_argument("--preload-nlp", action="store_true",
+                        help="Load the PyResParser fallback model when each worker starts (RESUME_PRELOAD_NLP=1).")
+    parser.add_argument("--pdf", action="store_true",
+                        help="Also write a Nehish-formatted PDF next to each DOCX, rendered from the parsed data.")
+    parser.add_argument("--include-data", action="store_true", help="Embed the parsed resume dict in each log record.")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse parsed data and DOCX for inputs already converted (see cache.py).")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Look each input up in the near-duplicate index and reuse what it can (see dedup.py).")
+    parser.add_argument("--store", action="store_true",
+                        help="Save parsed results to the searchable resume store (see store.py, RESUME_STORE_DB).")
+    parser.add_argument("--trace-dir", help="Write per-stage timing spans as JSON lines, one file per worker.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log extraction decisions per file.")
+    parser.add_argument("--progress-every", type=int, default=25, help="Print throughput every N files (0 disables).")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    # Read by ocr.py at import time, so spawned workers pick it up as well.
+    os.environ["RESUME_OCR_WORKERS"] = str(args.ocr_workers)
+    ocr.OCR_WORKERS = args.ocr_workers
+    if args.ocr_backend:
+        os.environ["RESUME_OCR_BACKEND"] = args.ocr_backend
+        ocr.OCR_BACKEND = args.ocr_backend
+    if args.preload_nlp:
+        os.environ["RESUME_PRELOAD_NLP"] = "1"
+        nlp_model.PRELOAD_NLP = True
+    if args.ocr_adaptive:
+        os.environ["RESUME_OCR_DPI_MODE"] = "adaptive"
+        ocr.OCR_DPI_MODE = "adaptive"
+
+    inputs = collect_inputs(args.sources)
+    if not inputs:
+        print("No supported resumes found.", file=sys.stderr)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
+    log_path = args.log or os.path.join(args.output_dir, "results.jsonl")
+    summary = run_batch(plan_outputs(inputs, args.output_dir), log_path, workers=args.workers,
+                        include_data=args.include_data, use_cache=args.cache,
+                        progress_every=args.progress_every, trace_dir=args.trace_dir, pdf=args.pdf,
+                        dedup=args.dedup, store=ResumeStore() if args.store else None)
+    return 0 if summary["failed"] < summary["total"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+import argparse
+import os
+import random
+import re
+import tempfile
+
+import numpy as np
+
+from benchmarks.corpus import synthetic_resume
+from benchmarks.harness import measure, write_results
+from dedup import DedupIndex, signature, similarity
+from parsed import PARSER_VERSION
+
+
+def variants(text, seed=0):
+    # The trivial edits a resume comes back with.
+    rng = random.Random(seed)
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        head, sep, items = line.partition(" | ")
+        if sep and "," in items:
+            items = items.split(", ")
+            rng.shuffle(items)
+            lines[i] = head + sep + ", ".join(items)
+    return {"phone": re.sub(r"\+91[-\s]?\d{10}", "+91 9000000001", text),
+            "skills_order": "\n".join(lines),
+            "reflow": " ".join(text.split())}
+
+
+def linear_find(index, sig):
+    # The index without LSH: compare against every stored signature.
+    with index._connect() as db:
+        rows = db.execute("SELECT digest, signature FROM documents WHERE parser_version = ?",
+                          (PARSER_VERSION,)).fetchall()
+    best = max(rows, key=lambda row: similarity(sig, np.frombuffer(row["signature"], dtype=np.uint32)), default=None)
+    return best["digest"] if best else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the near-duplicate index.")
+    parser.add_argument("--counts", default="100,1000", help="Resumes in the index.")
+    parser.add_argument("--size", default="medium")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in map(int, args.counts.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = DedupIndex(os.path.join(tmp, "index.db"))
+            texts = [synthetic_resume(args.size, seed) for seed in range(count)]
+            signatures = [signature(text) for text in texts]
+            common = {"benchmark": "dedup", "indexed": count, "size": args.size}
+
+            def add_all():
+                for seed, sig in enumerate(signatures):
+                    index.add(f"doc{seed}", sig, {}, f"resume_{seed}.txt")
+
+            record = dict(common, stage="add", **measure(add_all, warmup=0, repeat=1))
+            record["per_document"] = record["median"] / count
+            results.append(record)
+
+            seeds = range(0, count, max(1, count // args.queries))
+            queries = {}
+            for seed in seeds:
+                for kind, text in variants(texts[seed], seed).items():
+                    queries.setdefault(kind, []).append((seed, signature(text)))
+            # Distinct resumes never indexed: any match is a false positive.
+            fresh = [signature(synthetic_resume(args.size, count + seed)) for seed in range(len(seeds))]
+            for kind, pairs in queries.items():
+                found = [index.find(sig) for _, sig in pairs]
+                results.append(dict(common, stage=f"recall_{kind}", queries=len(pairs),
+                                    recall=sum(match is not None and match["digest"] == f"doc{seed}"
+                                               for (seed, _), match in zip(pairs, found)) / len(pairs)))
+            results.append(dict(common, stage="false_positives", queries=len(fresh),
+                                rate=sum(index.find(sig) is not None for sig in fresh) / len(fresh)))
+            lookups = [sig for _, sig in queries["phone"]] + fresh
+            for stage, find in (("lookup_lsh", index.find), ("lookup_linear", lambda sig: linear_find(index, sig))):
+                record = dict(common, stage=stage, queries=len(lookups),
+                              **measure(lambda: [find(sig) for sig in lookups], repeat=args.repeat))
+                record["per_query"] = record["median"] / len(lookups)
+                results.append(record)
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import tempfile
+
+from benchmarks.corpus import synthetic_resume
+from benchmarks.harness import measure, measure_memory, write_results
+from docx_text import read_docx
+
+
+def write_large_docx(path, copies, seed=0):
+    # A header with the name, then copies of the resume body, each followed by a skills table.
+    from docx import Document
+    doc = Document()
+    lines = synthetic_resume("large", seed).splitlines()
+    doc.sections[0].header.paragraphs[0].text = lines[0]
+    for _ in range(copies):
+        for line in lines[1:]:
+            doc.add_paragraph(line)
+        table = doc.add_table(rows=4, cols=2)
+        for i, cell in enumerate(table._cells):
+            cell.text = f"Skill {i}"
+    doc.save(path)
+
+
+def python_docx_text(path):
+    # The pre-streaming extraction: full object model, body paragraphs only, plus the
+    # second open extract_name did for headers.
+    from docx import Document
+    text = "\n".join(para.text for para in Document(path).paragraphs)
+    headers = [para.text for section in Document(path).sections for para in section.header.paragraphs]
+    return text, headers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark streaming DOCX text extraction against python-docx.")
+    parser.add_argument("--copies", default="1,10,50", help="Resume bodies per generated DOCX.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-memory", action="store_true")
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for copies in map(int, args.copies.split(",")):
+            path = os.path.join(tmp, f"resume_{copies}.docx")
+            write_large_docx(path, copies)
+            doc = read_docx(path)
+            legacy_text, _ = python_docx_text(path)
+            common = {"benchmark": "docx", "copies": copies, "file_bytes": os.path.getsize(path),
+                      "paragraphs": len(doc["paragraphs"]), "python_docx_paragraphs": len(legacy_text.splitlines())}
+            for stage, fn in (("streaming", lambda: read_docx(path)), ("python_docx", lambda: python_docx_text(path))):
+                record = dict(common, stage=stage, **measure(fn, repeat=args.repeat))
+                if not args.skip_memory:
+                    record.update(measure_memory(fn))
+                results.append(record)
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
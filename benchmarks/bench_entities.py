@@ -0,0 +1,56 @@
+import argparse
+import re
+
+from benchmarks.corpus import synthetic_resume
+from benchmarks.harness import measure, write_results
+from entities import extract_entities
+
+
+def legacy_extract_entities(text):
+    # The pre-lexer extraction: one uncompiled re.search over the whole text per field.
+    email = re.search(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.\w+", text)
+    address = re.search(r"Address: (.+)", text)
+    name = re.search(r'(?i)name[:\s-]+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)+)', text)
+    if not name:
+        for line in text.splitlines():
+            if line.strip():
+                break
+    contact = [re.search(r"(\+91[-\s]?\d{10}|\b\d{10}\b)", text), re.search(r"Address: (.+)", text),
+               re.search(r"(https?://(www\.)?linkedin\.com/[^\s]+)", text)]
+    return email, address, name, contact
+
+
+def legacy_extract_all_entities(text):
+    # The same per-field regexes, run with finditer to collect every phone, email and link.
+    return ([m.group(0) for m in re.finditer(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.\w+", text)],
+            [m.group(0) for m in re.finditer(r"(\+\d{1,3}[-\s]?\d{10}|\b\d{10}\b)", text)],
+            [m.group(0) for m in re.finditer(r"https?://[^\s]+", text)],
+            re.search(r"Address: (.+)", text),
+            re.search(r'(?i)name[:\s-]+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)+)', text))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark single-pass contact entity extraction.")
+    parser.add_argument("--copies", default="1,10,100",
+                        help="Sizes to test, as copies of a large synthetic resume concatenated.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    base = synthetic_resume("large")
+    results = []
+    for copies in map(int, args.copies.split(",")):
+        # Entities sit in the header only; a long body is what the scans pay for.
+        text = base + synthetic_resume("large", 1).split("Summary", 1)[1] * (copies - 1)
+        common = {"benchmark": "entities", "copies": copies, "text_chars": len(text)}
+        for stage, fn in (("lexer", extract_entities), ("legacy_first", legacy_extract_entities),
+                          ("legacy_all", legacy_extract_all_entities)):
+            record = dict(common, stage=stage, **measure(lambda: fn(text), repeat=args.repeat))
+            record["chars_per_sec"] = len(text) / record["median"]
+            results.append(record)
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import write_results
+
+MODULES = ("parsed", "ocr", "streaming", "layout", "pdf_layout", "limits", "cache", "dedup", "store", "convert", "jobs", "batch")
+# Must not be imported just by importing the modules above; they load through backends.get_backend().
+HEAVY = ("pytesseract", "PIL", "numpy", "pdf2image", "PyPDF2", "fpdf", "pyresparser", "spacy", "nltk", "tesserocr")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+import backends
+print(json.dumps({{"seconds": seconds, "modules": sorted(sys.modules), "backends": backends.loaded_backends()}}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_once(module):
+    # Fresh interpreter per sample, so nothing is already cached in sys.modules.
+    out = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], cwd=ROOT, capture_output=True,
+                         text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure_import(module, repeat=5):
+    samples = [import_once(module) for _ in range(repeat)]
+    seconds = sorted(sample["seconds"] for sample in samples)
+    loaded = set(samples[-1]["modules"])
+    return {
+        "benchmark": "import",
+        "stage": module,
+        "min": seconds[0],
+        "median": seconds[len(seconds) // 2],
+        "repeat": repeat,
+        "heavy_imports": [name for name in HEAVY if name in loaded],
+        # Backends get_backend() already loaded during the import, heavy or not.
+        "loaded_backends": samples[-1]["backends"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time cold imports of the pipeline modules.")
+    parser.add_argument("--modules", default=",".join(MODULES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Exit non-zero if any module's median import time exceeds this.")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit non-zero if importing a module pulls in or loads an OCR/PDF/NLP backend.")
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    results = [measure_import(module, args.repeat) for module in args.modules.split(",")]
+    write_results(results, args.output)
+    failures = []
+    for record in results:
+        print(f"{record['stage']:<10} {record['median'] * 1000:8.1f} ms  "
+              f"{' '.join(record['heavy_imports'] + record['loaded_backends'])}", file=sys.stderr)
+        if args.max_ms is not None and record["median"] * 1000 > args.max_ms:
+            failures.append(f"{record['stage']} took {record['median'] * 1000:.1f} ms")
+        if args.check and record["heavy_imports"]:
+            failures.append(f"{record['stage']} imports {', '.join(record['heavy_imports'])}")
+        if args.check and record["loaded_backends"]:
+            failures.append(f"{record['stage']} loads backends {', '.join(record['loaded_backends'])} on import")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
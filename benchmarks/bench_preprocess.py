@@ -0,0 +1,80 @@
+import argparse
+
+import numpy as np
+
+from benchmarks.corpus import _load_font, synthetic_resume
+from benchmarks.harness import measure, write_results
+from ocr import OCR_BACKENDS, get_ocr_backend, set_ocr_backend
+from preprocess import OCR_PREPROCESS, estimate_skew, preprocess_page
+
+
+def scanned_page(dpi, skew, seed=0):
+    # An A4 page as a phone camera or a crooked scanner delivers it: the text block
+    # rotated by skew degrees, shading across the page and grain noise.
+    from PIL import Image, ImageDraw
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    font = _load_font(int(dpi / 7))
+    y = int(height * 0.12)
+    for line in synthetic_resume("medium", seed).splitlines()[:45]:
+        draw.text((int(width * 0.12), y), line, fill=0, font=font)
+        y += int(dpi / 5)
+    page = page.rotate(skew, resample=Image.BILINEAR, fillcolor=255)
+    shading = np.linspace(0, 90, width, dtype=np.int16)[None, :]
+    grain = np.random.default_rng(seed).integers(0, 30, (height, width), dtype=np.int16)
+    noisy = np.asarray(page).astype(np.int16) - shading - grain
+    return Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8), mode="L")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark page preprocessing before OCR.")
+    parser.add_argument("--dpis", default="150,300")
+    parser.add_argument("--skews", default="0,2.5,-4")
+    parser.add_argument("--steps", default=",".join(OCR_PREPROCESS),
+                        help="Preprocessing steps to time (see RESUME_OCR_PREPROCESS).")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ocr-repeat", type=int, default=1)
+    parser.add_argument("--ocr-backend", choices=["auto"] + sorted(OCR_BACKENDS))
+    parser.add_argument("--skip-ocr", action="store_true", help="Time preprocessing only.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+    if args.ocr_backend:
+        set_ocr_backend(args.ocr_backend)
+    steps = tuple(step for step in args.steps.split(",") if step)
+
+    results = []
+    for dpi in map(int, args.dpis.split(",")):
+        for skew in map(float, args.skews.split(",")):
+            page = scanned_page(dpi, skew, args.seed)
+            cleaned = preprocess_page(page.copy(), dpi, steps=steps)
+            common = {"benchmark": "preprocess", "dpi": dpi, "skew": skew, "steps": ",".join(steps),
+                      "detected_skew": estimate_skew(np.asarray(page), dpi),
+                      "input_pixels": page.width * page.height, "output_pixels": cleaned.width * cleaned.height,
+                      "residual_skew": estimate_skew(np.asarray(cleaned), dpi)}
+            record = dict(common, stage="preprocess", **measure(lambda: preprocess_page(page.copy(), dpi, steps=steps),
+                                                                 repeat=args.repeat))
+            record["pixels_per_sec"] = page.width * page.height / record["median"]
+            results.append(record)
+            if args.skip_ocr:
+                continue
+            for stage, img in (("ocr_raw", page), ("ocr_preprocessed", cleaned)):
+                record = dict(common, stage=stage)
+                try:
+                    backend = get_ocr_backend()
+                    record["ocr_backend"] = backend.name
+                    record.update(measure(lambda: backend.recognize(img), warmup=0, repeat=args.ocr_repeat))
+                    _, confidences = backend.recognize(img)
+                    record["words"] = len(confidences)
+                    record["mean_confidence"] = sum(confidences) / len(confidences) if confidences else 0.0
+                except Exception as e:
+                    # No tesseract here: keep the preprocessing numbers.
+                    record["skipped"] = f"{type(e).__name__}: {e}"
+                results.append(record)
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import itertools
+import os
+import tempfile
+import time
+import zipfile
+
+from benchmarks.corpus import SIZES, synthetic_resume
+from benchmarks.harness import measure, write_results
+from layout import NehishRenderer, generate_docx, generate_docx_reference, render_docx
+from parsed import parse_structured_resume
+from pdf_layout import render_pdf
+
+
+def document_xml(path):
+    with zipfile.ZipFile(path) as z:
+        return z.read("word/document.xml")
+
+
+def save(data, path):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def edited(resume, counter):
+    # The resume with one skill corrected, different on every call so the section is rendered again.
+    return dict(resume, skills=resume["skills"][:-1] + [f"Skill {next(counter)}"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fragment DOCX renderer against plain python-docx.")
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    # Without its section cache every render writes every section, as for a new resume.
+    cold = NehishRenderer(section_cache_items=0)
+    results = [{"benchmark": "render", "stage": "template_load", "median": time.perf_counter() - start}]
+    with tempfile.TemporaryDirectory() as tmp:
+        reference_path = os.path.join(tmp, "reference.docx")
+        fast_path = os.path.join(tmp, "fast.docx")
+        for size in args.sizes.split(","):
+            resume = parse_structured_resume(synthetic_resume(size, args.seed))
+            generate_docx_reference(resume, reference_path)
+            generate_docx(resume, fast_path)
+            common = {"benchmark": "render", "size": size,
+                      "identical": document_xml(reference_path) == document_xml(fast_path)}
+            results.append(dict(common, stage="reference",
+                                **measure(lambda: generate_docx_reference(resume, reference_path), repeat=args.repeat)))
+            results.append(dict(common, stage="fragments",
+                                **measure(lambda: save(cold.render(resume), fast_path), repeat=args.repeat)))
+            results.append(dict(common, stage="fragments_bytes",
+                                **measure(lambda: cold.render(resume), repeat=args.repeat)))
+            # The app's correction loop: the other sections come from the renderer's section cache.
+            results.append(dict(common, stage="rerender_unchanged",
+                                **measure(lambda: render_docx(resume), repeat=args.repeat)))
+            counter = itertools.count()
+            results.append(dict(common, stage="rerender_one_section",
+                                **measure(lambda: render_docx(edited(resume, counter)), repeat=args.repeat)))
+            results.append(dict(common, stage="pdf",
+                                **measure(lambda: render_pdf(resume), repeat=args.repeat)))
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
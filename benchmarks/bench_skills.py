@@ -0,0 +1,79 @@
+import argparse
+import random
+import re
+import string
+import time
+
+from benchmarks.harness import measure, write_results
+from skills import DEFAULT_SKILLS, SkillMatcher, load_taxonomy
+
+
+def synthetic_taxonomy(size, seed=0):
+    rng = random.Random(seed)
+
+    def word():
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+
+    taxonomy = {skill: [] for skill in DEFAULT_SKILLS}
+    while len(taxonomy) < size:
+        name = " ".join(word() for _ in range(rng.choice((1, 1, 1, 2, 3)))).title()
+        taxonomy[name] = [word() for _ in range(rng.choice((0, 0, 1, 2, 3)))]
+    return taxonomy
+
+
+def synthetic_resume(taxonomy, words=1500, hit_rate=0.02, seed=0):
+    rng = random.Random(seed)
+    names = list(taxonomy)
+    filler = ["built", "led", "team", "delivered", "platform", "using", "and", "with", "for", "the", "systems"]
+    out = []
+    for i in range(words):
+        out.append(rng.choice(names) if rng.random() < hit_rate else rng.choice(filler))
+        if i % 12 == 11:
+            out.append("\n")
+    return " ".join(out)
+
+
+def legacy_extract_skills(keywords, text):
+    # The pre-matcher implementation: one freshly built regex per keyword.
+    skills = set()
+    for kw in keywords:
+        if re.search(r'\b' + re.escape(kw) + r'\b', text, re.I):
+            skills.add(kw)
+    return sorted(skills)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark skill taxonomy loading and matching.")
+    parser.add_argument("--taxonomy", help="Taxonomy file (JSON/CSV); default is a synthetic one.")
+    parser.add_argument("--size", type=int, default=20000, help="Synthetic taxonomy size.")
+    parser.add_argument("--words", type=int, default=1500, help="Words per synthetic resume.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--legacy-repeat", type=int, default=1,
+                        help="Runs of the old per-keyword regex loop over the full taxonomy (slow).")
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    taxonomy = load_taxonomy(args.taxonomy) if args.taxonomy else synthetic_taxonomy(args.size)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    matcher = SkillMatcher(taxonomy)
+    build_seconds = time.perf_counter() - start
+
+    text = synthetic_resume(taxonomy, words=args.words)
+    keywords = list(taxonomy)
+    common = {"benchmark": "skills", "size": matcher.size, "text_chars": len(text)}
+    results = [
+        dict(common, stage="load", median=load_seconds),
+        dict(common, stage="build", median=build_seconds),
+        dict(common, stage="match", skills_found=len(matcher.match(text)),
+             **measure(lambda: matcher.match(text), warmup=1, repeat=args.repeat)),
+        dict(common, stage="legacy_match",
+             **measure(lambda: legacy_extract_skills(keywords, text), warmup=0, repeat=args.legacy_repeat)),
+    ]
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.corpus import CITIES, COMPANIES, FIRST_NAMES, LAST_NAMES, SKILLS, TITLES, synthetic_resume
+from benchmarks.harness import measure, write_results
+from parsed import parse_structured_resume
+from store import INGEST_BATCH, ResumeStore
+
+SENIORITY = ["", "Senior ", "Lead ", "Junior ", "Principal "]
+# Real stores have a long tail of skills and employers next to the common ones.
+TAIL_SKILLS = [f"Skill {i}" for i in range(2000)]
+TAIL_COMPANIES = [f"Company {i}" for i in range(5000)]
+
+QUERIES = {
+    "common_skill": {"skills": ["Python"]},
+    "skill_and_title": {"skills": ["Python"], "titles": ["Software Engineer"]},
+    "skills_title_company": {"skills": ["Python", "SQL"], "titles": ["Senior ML Engineer"], "companies": ["Globex"]},
+    "rare_skill": {"skills": ["Skill 1500"]},
+    "rare_skill_and_title": {"skills": ["Skill 1500"], "titles": ["Data Analyst"]},
+    "text": {"text": "payments API"},
+}
+
+
+def synthetic_records(count, seed=0, templates=20):
+    # Parsed resumes built from a few parsed synthetic resumes, with names, skills,
+    # titles and companies drawn again for each so the indexes see realistic spread.
+    rng = random.Random(seed)
+    bases = [parse_structured_resume(synthetic_resume("medium", i)) for i in range(templates)]
+    tail_weights = [1 / (rank + 1) for rank in range(len(TAIL_SKILLS))]
+    for i in range(count):
+        parsed = dict(bases[i % templates])
+        parsed["name"] = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        parsed["email"] = f"candidate{i}@example.com"
+        parsed["skills"] = rng.sample(SKILLS, 12) + rng.choices(TAIL_SKILLS, tail_weights, k=4)
+        parsed["experience"] = [dict(exp, title=rng.choice(SENIORITY) + rng.choice(TITLES),
+                                     company=rng.choice(COMPANIES) if rng.random() < 0.3 else rng.choice(TAIL_COMPANIES),
+                                     location=rng.choice(CITIES))
+                                for exp in parsed["experience"]]
+        yield parsed, f"doc{i}", f"resume_{i}.pdf"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark bulk ingest and search of the resume store.")
+    parser.add_argument("--counts", default="10000,100000", help="Resumes in the store.")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args(argv)
+
+    results = []
+    for count in map(int, args.counts.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "resumes.db")
+            store = ResumeStore(path)
+            records = list(synthetic_records(count))
+            common = {"benchmark": "store", "resumes": count}
+            start = time.perf_counter()
+            store.ingest(records, args.batch_size)
+            seconds = time.perf_counter() - start
+            results.append(dict(common, stage="ingest", seconds=seconds, batch_size=args.batch_size,
+                                resumes_per_sec=count / seconds, db_bytes=os.path.getsize(path)))
+            for name, filters in QUERIES.items():
+                record = dict(common, stage=f"search_{name}", matches=store.count(**filters),
+                              **measure(lambda: store.search(**filters), repeat=args.repeat))
+                results.append(record)
+                results.append(dict(common, stage=f"count_{name}",
+                                    **measure(lambda: store.count(**filters), repeat=args.repeat)))
+    write_results(results, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
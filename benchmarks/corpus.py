@@ -0,0 +1,160 @@
+import argparse
+import os
+import random
+
+# Shape of each synthetic resume size: experience entries, detail bullets per
+# entry, projects, skills mentioned, education entries and filler summary sentences.
+SIZES = {
+    "small": {"jobs": 2, "details": 3, "projects": 2, "skills": 8, "education": 1, "summary": 2},
+    "medium": {"jobs": 6, "details": 5, "projects": 5, "skills": 20, "education": 2, "summary": 4},
+    "large": {"jobs": 30, "details": 8, "projects": 20, "skills": 40, "education": 3, "summary": 10},
+}
+FORMATS = ("txt", "docx", "pdf", "scanned_pdf")
+
+FIRST_NAMES = ["Aarav", "Maya", "Liam", "Priya", "Noah", "Sara", "Ethan", "Ananya", "Lucas", "Zoe"]
+LAST_NAMES = ["Sharma", "Smith", "Patel", "Garcia", "Chen", "Kumar", "Brown", "Iyer", "Lopez", "Khan"]
+TITLES = ["Software Engineer", "Data Analyst", "Backend Developer", "ML Engineer", "Product Manager", "QA Lead"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Tech"]
+CITIES = ["Bengaluru", "Pune", "London", "Remote", "Austin", "Hyderabad"]
+SKILLS = ["Python", "JavaScript", "React", "Node", "SQL", "MongoDB", "AWS", "Django", "Flask", "Tableau",
+          "TypeScript", "Machine learning", "Data analysis", "Agile", "Scrum", "HTML", "CSS", "MySQL",
+          "Tensorflow", "Opencv", "Github", "PHP", "Bootstrap", "Redux", "Express", "Sqlalchemy"]
+VERBS = ["Built", "Led", "Designed", "Optimized", "Delivered", "Developed", "Reduced", "Improved"]
+OBJECTS = ["a payments API", "the data pipeline", "an internal dashboard", "CI workflows", "a search service",
+           "the onboarding flow", "a recommendation model", "reporting jobs"]
+CODENAMES = ["Atlas", "Beacon", "Orbit", "Pulse", "Quill", "Nimbus"]
+OUTCOMES = ["cutting latency by 40%", "serving 2M users", "saving 10 hours a week", "with 99.9% uptime",
+            "across three teams", "ahead of schedule"]
+
+
+def synthetic_resume(size="medium", seed=0):
+    shape = SIZES[size]
+    rng = random.Random(f"{size}-{seed}")
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    handle = name.lower().replace(" ", ".")
+    lines = [
+        name,
+        f"Address: {rng.randint(1, 99)} Park Street, {rng.choice(CITIES)}",
+        f"Email: {handle}@example.com | +91 {rng.randint(6000000000, 9999999999)}",
+        f"https://www.linkedin.com/in/{handle.replace('.', '')}",
+        "Summary",
+    ]
+    for _ in range(shape["summary"]):
+        lines.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(OUTCOMES)} using "
+                     f"{rng.choice(SKILLS)} and {rng.choice(SKILLS)}.")
+    skills = rng.sample(SKILLS, min(shape["skills"], len(SKILLS)))
+    lines.append("Skills | " + ", ".join(skills))
+    lines.append("Work Experience")
+    year = 2024
+    for _ in range(shape["jobs"]):
+        start = year - rng.randint(1, 3)
+        end = "Current" if year == 2024 else f"{rng.randint(1, 12):02d}/{year}"
+        lines.append(f"{rng.choice(TITLES)}, {rng.randint(1, 12):02d}/{start} - {end}")
+        lines.append(f"{rng.choice(COMPANIES)} - {rng.choice(CITIES)}")
+        for _ in range(shape["details"]):
+            lines.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(OUTCOMES)}")
+        year = start
+    lines.append("Education")
+    for _ in range(shape["education"]):
+        lines.append(rng.choice(["B.Tech in Computer Science", "Master of Science in Data Science",
+                                 "Bachelor of Engineering"]))
+        lines.append(rng.choice(["Indian Institute of Technology", "State University", "Institute of Engineering"]))
+        lines.append(f"CGPA {rng.randint(70, 99) / 10}")
+    lines.append("Certifications")
+    lines.append("AWS Certified Solutions Architect")
+    lines.append("Projects")
+    for i in range(shape["projects"]):
+        lines.append(f"{rng.choice(CODENAMES)}{i}: {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_txt(text, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def write_docx(text, path):
+    from docx import Document
+    doc = Document()
+    for line in text.splitlines():
+        doc.add_paragraph(line)
+    doc.save(path)
+
+
+def write_text_pdf(text, path):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", size=11)
+    for line in text.splitlines():
+        pdf.multi_cell(0, 6, line.encode("latin-1", errors="ignore").decode("latin-1"))
+    pdf.output(path)
+
+
+def _load_font(size):
+    from PIL import ImageFont
+    for name in ("DejaVuSans.ttf", "arial.ttf", "Arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            pass
+    return ImageFont.load_default()
+
+
+def write_scanned_pdf(text, path, dpi=150, lines_per_page=45):
+    # Rasterize the text onto A4 grayscale pages so the PDF has no text layer.
+    from PIL import Image, ImageDraw
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    font = _load_font(int(dpi / 7))
+    line_height = int(height * 0.85 / lines_per_page)
+    lines = text.splitlines()
+    pages = []
+    for start in range(0, len(lines), lines_per_page):
+        page = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(page)
+        y = int(height * 0.07)
+        for line in lines[start:start + lines_per_page]:
+            draw.text((int(width * 0.08), y), line, fill=0, font=font)
+            y += line_height
+        pages.append(page)
+    pages[0].save(path, "PDF", resolution=dpi, save_all=True, append_images=pages[1:])
+
+
+WRITERS = {
+    "txt": (".txt", write_txt),
+    "docx": (".docx", write_docx),
+    "pdf": (".pdf", write_text_pdf),
+    "scanned_pdf": ("_scanned.pdf", write_scanned_pdf),
+}
+
+
+def generate_corpus(out_dir, sizes=tuple(SIZES), formats=FORMATS, count=1, seed=0):
+    # Write count resumes per size and format; returns [{"size", "format", "path", "text"}].
+    os.makedirs(out_dir, exist_ok=True)
+    corpus = []
+    for size in sizes:
+        for i in range(count):
+            text = synthetic_resume(size, seed + i)
+            for fmt in formats:
+                suffix, writer = WRITERS[fmt]
+                path = os.path.join(out_dir, f"{size}_{i}{suffix}")
+                writer(text, path)
+                corpus.append({"size": size, "format": fmt, "path": path, "text": text})
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume corpus.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--count", type=int, default=1, help="Resumes per size.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    corpus = generate_corpus(args.out_dir, args.sizes.split(","), args.formats.split(","), args.count, args.seed)
+    print(f"Wrote {len(corpus)} files to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+
+def measure(fn, warmup=1, repeat=5):
+    # Call fn warmup times untimed, then repeat times; returns timing stats in seconds.
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "warmup": warmup,
+    }
+
+
+def current_rss():
+    # Resident set size of this process in bytes, or None where it can't be read.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def measure_memory(fn, interval=0.005):
+    # One extra call of fn: peak RSS growth (sampled, so it includes PIL rasters and
+    # other native buffers) and the tracemalloc peak of Python allocations.
+    baseline = current_rss()
+    peak = [baseline or 0]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(interval):
+            rss = current_rss()
+            if rss and rss > peak[0]:
+                peak[0] = rss
+
+    sampler = threading.Thread(target=sample, daemon=True) if baseline is not None else None
+    if sampler:
+        sampler.start()
+    tracemalloc.start()
+    try:
+        fn()
+    finally:
+        python_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        stop.set()
+        if sampler:
+            sampler.join()
+    result = {"python_peak_bytes": python_peak}
+    if baseline is not None:
+        result["peak_rss_delta_bytes"] = max(0, max(peak[0], current_rss() or 0) - baseline)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(results, path=None):
+    # Results are a flat list of records keyed by (benchmark, stage, size, format).
+    payload = {"environment": environment(), "results": results}
+    text = json.dumps(payload, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return payload
+
+
+def _key(record):
+    return (record.get("benchmark"), record.get("stage"), record.get("size"), record.get("format"))
+
+
+def compare(base_path, new_path, out=sys.stdout):
+    # Print median time per record for two result files and the new/base ratio.
+    with open(base_path, encoding="utf-8") as f:
+        base = {_key(r): r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    print(f"{'benchmark/stage/size/format':<52} {'base ms':>10} {'new ms':>10} {'ratio':>7}", file=out)
+    for record in new:
+        old = base.get(_key(record))
+        if not old or "median" not in record or "median" not in old:
+            continue
+        label = "/".join(str(part) for part in _key(record) if part)
+        ratio = record["median"] / old["median"] if old["median"] else float("inf")
+        print(f"{label:<52} {old['median'] * 1000:>10.3f} {record['median'] * 1000:>10.3f} {ratio:>7.2f}", file=out)
@@ -0,0 +1,135 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import ocr
+from benchmarks.corpus import FORMATS, SIZES, generate_corpus
+from benchmarks.harness import compare, measure, measure_memory, write_results
+from layout import generate_docx
+from ocr import OCR_BACKENDS, get_ocr_backend, ocr_pdf_pages, set_ocr_backend
+from parsed import (build_resume, clean_lines, extract_address, extract_contact, extract_email,
+                    extract_name, extract_pdf_page_texts, extract_skills, extract_text_from_docx,
+                    parse_certifications, parse_education, parse_experience, parse_projects, parse_summary)
+from sections import get_heading_matcher, segment_sections
+from tracing import metrics
+
+STAGES = ("extraction", "ocr", "ocr_adaptive", "segmentation", "sections", "entities", "rendering")
+
+
+def extract_entities(text):
+    return (extract_email(text), extract_address(text), extract_skills(text),
+            extract_name(text), extract_contact(text))
+
+
+def parse_sections(section_map):
+    educations, project_content, _ = parse_education(section_map.get("education", []))
+    return (parse_experience(section_map.get("experience", [])), parse_summary(section_map.get("summary", [])),
+            educations, parse_certifications(section_map.get("certifications", [])),
+            parse_projects(section_map.get("projects", []) + project_content))
+
+
+def ocr_with_mode(path, mode):
+    previous = ocr.OCR_DPI_MODE
+    ocr.OCR_DPI_MODE = mode
+    try:
+        return ocr_pdf_pages(path)
+    finally:
+        ocr.OCR_DPI_MODE = previous
+
+
+def counter_total(name):
+    return sum(c["value"] for c in metrics.snapshot()["counters"] if c["name"] == name)
+
+
+def stage_benchmarks(item, stages, out_dir):
+    # Yield (stage, fn) pairs that apply to one corpus file.
+    fmt, path, text = item["format"], item["path"], item["text"]
+    if "extraction" in stages and fmt == "docx":
+        yield "extraction", lambda: extract_text_from_docx(path)
+    if "extraction" in stages and fmt == "pdf":
+        yield "extraction", lambda: extract_pdf_page_texts(path)
+    if "ocr" in stages and fmt == "scanned_pdf":
+        yield "ocr", lambda: ocr_with_mode(path, "fixed")
+    if "ocr_adaptive" in stages and fmt == "scanned_pdf":
+        yield "ocr_adaptive", lambda: ocr_with_mode(path, "adaptive")
+    if fmt != "txt":
+        return
+    # Text stages run once per size, on the plain-text rendition.
+    matcher = get_heading_matcher()
+    lines = clean_lines(text)
+    section_map = segment_sections(lines, matcher)
+    if "segmentation" in stages:
+        yield "segmentation", lambda: segment_sections(clean_lines(text), matcher)
+    if "sections" in stages:
+        yield "sections", lambda: parse_sections(section_map)
+    if "entities" in stages:
+        yield "entities", lambda: extract_entities(text)
+    if "rendering" in stages:
+        resume = build_resume(section_map, text)
+        output = os.path.join(out_dir, f"{item['size']}_rendered.docx")
+        yield "rendering", lambda: generate_docx(resume, output)
+
+
+def run(corpus, stages, warmup, repeat, ocr_repeat, out_dir, memory=True, log=sys.stderr):
+    results = []
+    for item in corpus:
+        for stage, fn in stage_benchmarks(item, stages, out_dir):
+            record = {"benchmark": "pipeline", "stage": stage, "size": item["size"], "format": item["format"],
+                      "input_bytes": os.path.getsize(item["path"]), "lines": item["text"].count("\n")}
+            try:
+                if stage.startswith("ocr"):
+                    record["ocr_backend"] = get_ocr_backend().name
+                    raster_bytes, escalations = counter_total("ocr_raster_bytes"), counter_total("ocr_escalations")
+                    record.update(measure(fn, warmup=0, repeat=ocr_repeat))
+                    # Rasterized page bytes per run: what the renders held in memory before OCR.
+                    record["raster_bytes"] = (counter_total("ocr_raster_bytes") - raster_bytes) // ocr_repeat
+                    record["escalations"] = (counter_total("ocr_escalations") - escalations) / ocr_repeat
+                else:
+                    record.update(measure(fn, warmup=warmup, repeat=repeat))
+                if memory:
+                    record.update(measure_memory(fn))
+            except Exception as e:
+                # Missing tesseract/poppler shouldn't sink the rest of the suite.
+                record["skipped"] = f"{type(e).__name__}: {e}"
+            results.append(record)
+            timing = f"{record['median'] * 1000:.3f} ms" if "median" in record else "skipped"
+            if "peak_rss_delta_bytes" in record:
+                timing += f", peak +{record['peak_rss_delta_bytes'] / 2 ** 20:.1f} MB"
+            print(f"{stage:<13} {item['size']:<7} {item['format']:<12} {timing}", file=log)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each resume pipeline stage on a synthetic corpus.")
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ocr-repeat", type=int, default=1, help="OCR is slow; it runs without warmup.")
+    parser.add_argument("--ocr-backend", choices=["auto"] + sorted(OCR_BACKENDS),
+                        help="OCR engine to time (default: RESUME_OCR_BACKEND or auto).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-memory", action="store_true",
+                        help="Don't make the extra per-stage call that records peak memory.")
+    parser.add_argument("--corpus-dir", help="Keep the generated corpus here (default: a temp dir).")
+    parser.add_argument("-o", "--output", help="Write JSON results here instead of stdout.")
+    parser.add_argument("--baseline", help="Results file from an earlier commit to compare against.")
+    args = parser.parse_args(argv)
+    if args.ocr_backend:
+        set_ocr_backend(args.ocr_backend)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus_dir or tmp
+        corpus = generate_corpus(corpus_dir, args.sizes.split(","), args.formats.split(","), seed=args.seed)
+        results = run(corpus, set(args.stages.split(",")), args.warmup, args.repeat, args.ocr_repeat, corpus_dir,
+                      memory=not args.skip_memory)
+    write_results(results, args.output)
+    if args.baseline and args.output:
+        compare(args.baseline, args.output)
+    return results
+
+
+if __name__ == "__main__":
+    main()
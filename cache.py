@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from parsed import PARSER_VERSION, source_ext
+from layout import LAYOUT_VERSION
+from ocr import ocr_settings
+from skills import taxonomy_fingerprint
+
+DEFAULT_CACHE_DIR = os.environ.get("RESUME_CACHE_DIR", ".resume_cache")
+DEFAULT_MEMORY_ITEMS = 128
+DEFAULT_DISK_BYTES = int(os.environ.get("RESUME_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def config_fingerprint(ext=None):
+    # What changes the output besides the bytes and the version constants: how the
+    # bytes are read (the same file parses differently as .txt and .pdf), the skill
+    # taxonomy and the OCR settings. Changing any of them misses the cache instead
+    # of serving results made with the old ones.
+    config = {"ext": (ext or "").lower(), "skills": taxonomy_fingerprint(), "ocr": ocr_settings()}
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def parsed_key(digest, ext=None):
+    return f"{digest}-p{PARSER_VERSION}-c{config_fingerprint(ext)}.json"
+
+
+def docx_key(digest, ext=None):
+    return f"{digest}-p{PARSER_VERSION}-l{LAYOUT_VERSION}-c{config_fingerprint(ext)}.docx"
+
+
+class ResumeCache:
+    # Two tiers of bytes keyed by content hash + parser/layout version:
+    # an in-process LRU in front of a size-bounded directory shared by processes.
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_memory_items=DEFAULT_MEMORY_ITEMS,
+                 max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        data = self._disk_get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._memory_put(key, data)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._memory_put(key, data)
+        self._disk_put(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = 0
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _memory_put(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key):
+        path = os.path.join(self.cache_dir, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # mtime doubles as the LRU clock for eviction
+        except OSError:
+            pass
+        return data
+
+    def _disk_put(self, key, data):
+        if self.max_disk_bytes <= 0 or len(data) > self.max_disk_bytes:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(self.cache_dir, key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan()[1]
+            else:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._evict()
+
+    def _scan(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        return entries, total
+
+    def _evict(self):
+        # Drop least recently used files until the directory is back under 90% of the budget.
+        entries, total = self._scan()
+        target = int(self.max_disk_bytes * 0.9)
+        for _, size, name in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+
+_default_cache = None
+
+
+def get_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResumeCache()
+    return _default_cache
+
+
+def get_or_convert(data, parse, render, cache=None, filename=None):
+    # parse(data) -> resume dict and render(resume dict) -> DOCX bytes only run on a miss.
+    # filename's extension, which decides how data is read, is part of the key.
+    # Returns (parsed, docx_bytes, hit) where hit is True when nothing was recomputed.
+    cache = cache or get_cache()
+    digest = content_hash(data)
+    ext = source_ext(filename) if filename else ""
+    parsed_bytes = cache.get(parsed_key(digest, ext))
+    docx_bytes = cache.get(docx_key(digest, ext))
+    if parsed_bytes is not None and docx_bytes is not None:
+        return json.loads(parsed_bytes), docx_bytes, True
+    if parsed_bytes is not None:
+        parsed = json.loads(parsed_bytes)
+    else:
+        parsed = parse(data)
+        # Failed extractions are not cached so a later fix (or a retry) gets a fresh attempt.
+        if not parsed or "error" in parsed:
+            return parsed, None, False
+        cache.put(parsed_key(digest, ext), json.dumps(parsed).encode("utf-8"))
+    docx_bytes = render(parsed)
+    cache.put(docx_key(digest, ext), docx_bytes)
+    return parsed, docx_bytes, False
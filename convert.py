@@ -0,0 +1,43 @@
+import os
+
+from cache import get_or_convert
+from layout import render_docx
+from parsed import load_source, parse_resume
+from streaming import iter_parse_resume
+
+# Bytes in, bytes out: nothing here writes the upload or the generated DOCX to
+# disk, so concurrent sessions never share a path. Only OCR of a PDF held in
+# memory spills it to a uniquely named temp file (see ocr.local_pdf_path).
+
+
+def upload_ext(filename):
+    return os.path.splitext(filename or "")[1].lower()
+
+
+def parse_bytes(data, filename, deadline=None, page_texts=None):
+    # data is the document's bytes or a binary file object; filename only supplies the type.
+    return parse_resume(load_source(data), upload_ext(filename), deadline, page_texts)
+
+
+def iter_parse_bytes(data, filename, heading_matcher=None, deadline=None, page_texts=None):
+    return iter_parse_resume(load_source(data), heading_matcher, upload_ext(filename), deadline, page_texts)
+
+
+def iter_parse_upload(data, filename, heading_matcher=None, deadline=None, page_texts=None):
+    # Streaming parse of an upload as the Streamlit app does it; .txt text is
+    # parsed as is, not laid out as a PDF and read back. deadline is a limits.Deadline
+    # the caller can cancel(); page_texts a PDF's text layer already extracted.
+    return iter_parse_bytes(data, filename, heading_matcher, deadline, page_texts)
+
+
+def convert_bytes(data, filename, use_cache=True):
+    # Returns (parsed, docx_bytes); docx_bytes is None when parsing failed.
+    data = load_source(data)
+    if use_cache:
+        parsed, docx_bytes, _ = get_or_convert(data, lambda _data: parse_bytes(_data, filename), render_docx,
+                                               filename=filename)
+        return parsed, docx_bytes
+    parsed = parse_bytes(data, filename)
+    if not parsed or "error" in parsed:
+        return parsed, None
+    return parsed, render_docx(parsed)
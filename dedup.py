@@ -0,0 +1,343 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from backends import get_backend
+from cache import content_hash, docx_key, get_cache, get_or_convert
+from limits import Deadline, LimitExceeded, check_input_size, limit_result
+from parsed import (PARSER_VERSION, extract_entity_fields, extract_pdf_page_texts, extract_text_from_docx,
+                    load_source, page_has_text_layer, read_text_file, source_ext)
+from tracing import incr, logger, span
+
+# Near-duplicate index over extracted text. The same candidate's resume keeps
+# coming back with trivial edits (a new phone number, reordered skills, a
+# re-exported PDF); its content hash changes, so the cache misses, but its text
+# barely does. Each converted resume is fingerprinted by a MinHash signature of
+# its word shingles; the signature is cut into LSH bands and each band is a
+# bucket key in SQLite, so a lookup only compares the resumes sharing a bucket
+# instead of scanning the index.
+#
+# Only text that needs no OCR is fingerprinted: .txt, .docx and a PDF's
+# text-layer pages. When that is the whole document it is parsed again anyway
+# (cheap), and the match gives the fields that changed and, if none did, the
+# prior DOCX. When some pages would need OCR but the text layer still covers most
+# of the document (the match's page count, DEDUP_MIN_COVERAGE of its pages and of
+# the match's words), OCR is skipped: the prior parsed sections are reused and
+# only the contact fields and skills, where the usual trivial edits are, are read
+# again from the text layer. With less text than that, a similar page or two (a
+# shared cover letter) says nothing about the rest, so the document is OCR'd.
+
+DEFAULT_DEDUP_DB = os.environ.get("RESUME_DEDUP_DB", os.path.join(".resume_dedup", "index.db"))
+DEDUP = os.environ.get("RESUME_DEDUP", "0") == "1"
+# Estimated Jaccard similarity of the shingle sets above which a resume counts as a near-duplicate.
+DEDUP_THRESHOLD = float(os.environ.get("RESUME_DEDUP_THRESHOLD", 0.9))
+SHINGLE_WORDS = 3
+MINHASH_PERMUTATIONS = 128
+# 16 bands of 8 rows: resumes ~0.7 similar share a bucket half the time, 0.9 similar almost always.
+LSH_BANDS = 16
+MINHASH_SEED = 20240601
+MIN_TEXT_WORDS = 50  # less text than this (e.g. a scanned PDF) is not fingerprinted
+DEDUP_MIN_COVERAGE = float(os.environ.get("RESUME_DEDUP_MIN_COVERAGE", 0.75))
+WORD_RE = re.compile(r"\w+")
+SEPARATOR_RE = re.compile(r"[,;|\u2022\u00b7]")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    digest TEXT PRIMARY KEY,
+    parser_version TEXT NOT NULL,
+    filename TEXT,
+    created REAL NOT NULL,
+    signature BLOB NOT NULL,
+    parsed TEXT NOT NULL,
+    pages INTEGER,
+    words INTEGER
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (bucket, digest)
+) WITHOUT ROWID;
+"""
+
+_permutations = None
+
+
+def minhash_permutations():
+    # (multipliers, offsets) of the multiply-shift hash family, fixed by MINHASH_SEED
+    # so signatures stay comparable across processes and restarts.
+    global _permutations
+    if _permutations is None:
+        np = get_backend("numpy")
+        rng = np.random.default_rng(MINHASH_SEED)
+        multipliers = rng.integers(1, 2 ** 63, MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+        offsets = rng.integers(0, 2 ** 63, MINHASH_PERMUTATIONS, dtype=np.uint64)
+        _permutations = (multipliers[:, None], offsets[:, None])
+    return _permutations
+
+
+def shingles(text):
+    # Hashes of the SHINGLE_WORDS-word windows inside each list item or clause, so
+    # reordering a comma- or pipe-separated list (skills) leaves the set unchanged.
+    hashes = set()
+    words = 0
+    for segment in SEPARATOR_RE.split(text.lower()):
+        segment_words = WORD_RE.findall(segment)
+        if not segment_words:
+            continue
+        words += len(segment_words)
+        for start in range(max(1, len(segment_words) - SHINGLE_WORDS + 1)):
+            hashes.add(zlib.crc32(" ".join(segment_words[start:start + SHINGLE_WORDS]).encode("utf-8")))
+    return hashes, words
+
+
+def signature(text):
+    # MinHash signature (uint32 array) of the text's shingles, or None when the text
+    # is too short to fingerprint.
+    hashes, words = shingles(text)
+    if words < MIN_TEXT_WORDS:
+        return None
+    np = get_backend("numpy")
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    multipliers, offsets = minhash_permutations()
+    return ((multipliers * values + offsets) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+
+def similarity(a, b):
+    # Fraction of agreeing signature rows: an estimate of the shingle sets' Jaccard similarity.
+    return float((a == b).mean())
+
+
+def lsh_buckets(sig):
+    rows = len(sig) // LSH_BANDS
+    return [int.from_bytes(hashlib.blake2b(bytes([band]) + sig[band * rows:(band + 1) * rows].tobytes(),
+                                           digest_size=8).digest(), "little", signed=True)
+            for band in range(LSH_BANDS)]
+
+
+def quick_text(source, ext=None, deadline=None):
+    # (text, pages, text_pages, page_texts): the text available without OCR (all of
+    # a .txt or .docx, a PDF's text-layer pages), the document's page count, how many
+    # of its pages that text came from, and a PDF's page texts for the parse to reuse
+    # (None otherwise); pages is None when the PDF could not be read. Extraction runs
+    # within deadline and raises LimitExceeded as the parse would.
+    source = load_source(source)
+    ext = source_ext(source, ext)
+    deadline = deadline or Deadline()
+    check_input_size(source)
+    if ext == ".txt":
+        return read_text_file(source), 1, 1, None
+    try:
+        if ext == ".docx":
+            with deadline.stage("docx"):
+                return extract_text_from_docx(source), 1, 1, None
+        with deadline.stage("pdf_text"):
+            page_texts = extract_pdf_page_texts(source, deadline)
+    except LimitExceeded:
+        raise
+    except Exception as e:
+        logger.debug("No text to fingerprint without OCR: %s", e)
+        return "", None, 0, None
+    text_pages = [page for page in page_texts if page_has_text_layer(page)]
+    return "\n".join(text_pages), len(page_texts), len(text_pages), page_texts
+
+
+def covers(match, pages, text_pages, words):
+    # Whether a document's text layer (text_pages of its pages, words) is enough
+    # of it to stand for the whole next to match, its indexed near-duplicate.
+    return (bool(pages) and match["pages"] == pages and text_pages >= DEDUP_MIN_COVERAGE * pages
+            and bool(match["words"]) and words >= DEDUP_MIN_COVERAGE * match["words"])
+
+
+def changed_fields(old, new):
+    return sorted(field for field in set(old) | set(new) if old.get(field) != new.get(field))
+
+
+def refresh_resume(prior, text):
+    # The prior parsed resume with the whole-text fields read again from text.
+    # A field the new text doesn't yield (e.g. it is on a page that needs OCR) keeps
+    # its prior value; skills found in text are added to the prior ones, since those
+    # on the other pages can't be seen here.
+    parsed = dict(prior)
+    for field, value in extract_entity_fields(text).items():
+        if field == "skills":
+            known = {skill.lower() for skill in prior.get("skills") or []}
+            value = list(prior.get("skills") or []) + [skill for skill in value if skill.lower() not in known]
+        if value:
+            parsed[field] = value
+    return parsed
+
+
+class DedupIndex:
+    # Signatures, LSH buckets and parsed results of converted resumes in SQLite,
+    # shared by the batch workers, the job workers and the UI. Each call opens its
+    # own connection, so it is safe from any thread.
+
+    def __init__(self, path=DEFAULT_DEDUP_DB, threshold=DEDUP_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            # Indexes created before page and word counts were recorded; their entries are never reused.
+            columns = {row[1] for row in db.execute("PRAGMA table_info(documents)")}
+            for column in ("pages", "words"):
+                if column not in columns:
+                    db.execute(f"ALTER TABLE documents ADD COLUMN {column} INTEGER")
+        finally:
+            db.close()
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("BEGIN")
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def find(self, sig):
+        # Best indexed resume (same parser version) at least threshold similar to sig:
+        # {"digest", "filename", "similarity", "pages", "words", "parsed"}, or None.
+        np = get_backend("numpy")
+        buckets = lsh_buckets(sig)
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT digest, filename, signature, parsed, pages, words FROM documents WHERE parser_version = ? AND digest IN "
+                f"(SELECT digest FROM buckets WHERE bucket IN ({','.join('?' * len(buckets))}))",
+                (PARSER_VERSION, *buckets)).fetchall()
+        incr("dedup_candidates", len(rows))
+        best = None
+        for row in rows:
+            score = similarity(sig, np.frombuffer(row["signature"], dtype=np.uint32))
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, row)
+        if best is None:
+            return None
+        score, row = best
+        return {"digest": row["digest"], "filename": row["filename"], "similarity": round(score, 3),
+                "pages": row["pages"], "words": row["words"], "parsed": json.loads(row["parsed"])}
+
+    def add(self, digest, sig, parsed, filename=None, pages=None, words=None):
+        # pages: the document's page count, words: how many words sig was computed from.
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO documents "
+                       "(digest, parser_version, filename, created, signature, parsed, pages, words) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                       (digest, PARSER_VERSION, filename, time.time(), sig.tobytes(), json.dumps(parsed), pages,
+                        words))
+            db.executemany("INSERT OR IGNORE INTO buckets (bucket, digest) VALUES (?, ?)",
+                           [(bucket, digest) for bucket in lsh_buckets(sig)])
+
+    def purge(self, older_than=None):
+        # Drop entries from older parser versions, and those indexed more than older_than seconds ago.
+        with self._connect() as db:
+            removed = db.execute("DELETE FROM documents WHERE parser_version != ? OR created < ?",
+                                 (PARSER_VERSION, time.time() - older_than if older_than else 0)).rowcount
+            db.execute("DELETE FROM buckets WHERE digest NOT IN (SELECT digest FROM documents)")
+        return removed
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_dedup_index():
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DedupIndex()
+        return _default_index
+
+
+def convert_with_index(data, filename, parse, render, cache=None, index=None, deadline=None):
+    # cache.get_or_convert with a near-duplicate lookup in front of parse(data, page_texts),
+    # which is given the PDF text layer extracted for the lookup (None when there is
+    # none) so it is not extracted twice. The lookup runs within deadline, which the
+    # caller passes to parse as well.
+    # Returns (parsed, docx_bytes, hit, match): match is None, or the near-duplicate
+    # found, {"digest", "filename", "similarity", "changed", "reused"}: changed lists
+    # the fields that differ from its parsed result, reused is True when its sections
+    # were taken instead of running OCR (only when covers() holds).
+    index = get_dedup_index() if index is None else index
+    found = {}
+
+    def parse_or_reuse(data):
+        try:
+            text, pages, text_pages, page_texts = quick_text(data, source_ext(filename), deadline)
+        except LimitExceeded as e:
+            logger.warning("Conversion stopped: %s", e)
+            return limit_result(e)
+        words = len(WORD_RE.findall(text))
+        with span("dedup.lookup"):
+            sig = signature(text)
+            match = index.find(sig) if sig is not None else None
+        if match is None:
+            incr("dedup", outcome="new" if sig is not None else "unindexed")
+            parsed = parse(data, page_texts)
+        else:
+            prior = match.pop("parsed")
+            match["reused"] = text_pages != pages and covers(match, pages, text_pages, words)
+            incr("dedup", outcome="reused" if match["reused"] else "matched")
+            parsed = refresh_resume(prior, text) if match["reused"] else parse(data, page_texts)
+            match["changed"] = changed_fields(prior, parsed)
+            del match["pages"], match["words"]
+            found.update(match)
+        if sig is not None and parsed and "error" not in parsed:
+            index.add(content_hash(data), sig, parsed, filename, pages, words)
+        return parsed
+
+    def render_or_reuse(parsed):
+        if found and not found["changed"]:
+            docx_bytes = (cache or get_cache()).get(docx_key(found["digest"], source_ext(found["filename"])))
+            if docx_bytes is not None:
+                return docx_bytes
+        return render(parsed)
+
+    parsed, docx_bytes, hit = get_or_convert(data, parse_or_reuse, render_or_reuse, cache, filename)
+    return parsed, docx_bytes, hit, found or None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up resumes in the near-duplicate index.")
+    parser.add_argument("files", nargs="*", help="Resumes to look up (nothing is added to the index).")
+    parser.add_argument("--db", default=DEFAULT_DEDUP_DB, help="SQLite index database.")
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    parser.add_argument("--purge-days", type=float, default=None,
+                        help="Drop entries indexed more than this many days ago (and any from older parser versions).")
+    args = parser.parse_args(argv)
+    index = DedupIndex(args.db, args.threshold)
+    if args.purge_days is not None:
+        print(f"Removed {index.purge(args.purge_days * 24 * 60 * 60)} entries.", file=sys.stderr)
+    for path in args.files:
+        sig = signature(quick_text(path)[0])
+        match = index.find(sig) if sig is not None else None
+        if match:
+            match.pop("parsed")
+        print(json.dumps({"input": path, "indexed": sig is not None, "match": match}))
+    if not args.files:
+        print(f"{len(index)} resumes indexed in {args.db}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
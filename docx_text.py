@@ -0,0 +1,106 @@
+import zipfile
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+
+# Text extraction straight from the DOCX zip: word/document.xml and the header
+# parts are streamed through an incremental XML parser, one zip open per
+# document, instead of building python-docx's object model. Paragraphs come out
+# in reading order, including table cells and text boxes, which
+# Document.paragraphs skips.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+# Text boxes are stored twice, as DrawingML and as a VML fallback; only the first is read.
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS = "word/_rels/document.xml.rels"
+
+# Run content that contributes text, as python-docx's Paragraph.text renders it.
+RUN_TEXT = {W + "tab": "\t", W + "br": "\n", W + "cr": "\n", W + "noBreakHyphen": "-"}
+
+
+def iter_paragraphs(part, header_refs=None):
+    # Text of each paragraph in the XML part, in document order. A text box's
+    # paragraphs come before the paragraph anchoring it. Relationship ids of
+    # header references are appended to header_refs as they stream past.
+    paragraphs = []
+    in_run = 0
+    fallback = 0
+    for event, elem in iterparse(part, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == W + "p":
+                paragraphs.append([])
+            elif tag == W + "r":
+                in_run += 1
+            elif tag == MC_FALLBACK:
+                fallback += 1
+            continue
+        if tag == W + "p":
+            text = "".join(paragraphs.pop())
+            elem.clear()
+            if not fallback:
+                yield text
+        elif tag == W + "r":
+            in_run -= 1
+        elif tag == MC_FALLBACK:
+            fallback -= 1
+            elem.clear()
+        elif tag == W + "tbl":
+            elem.clear()
+        elif tag == W + "headerReference":
+            if header_refs is not None:
+                header_refs.append(elem.get(R_ID))
+        elif fallback or not in_run or not paragraphs:
+            continue
+        elif tag == W + "t":
+            paragraphs[-1].append(elem.text or "")
+        elif tag in RUN_TEXT:
+            paragraphs[-1].append(RUN_TEXT[tag])
+
+
+def header_parts(z, header_refs):
+    # Header part names in the order the sections reference them; every header
+    # part if the relationships can't be read.
+    names = set(z.namelist())
+    targets = {}
+    if DOCUMENT_RELS in names:
+        with z.open(DOCUMENT_RELS) as rels:
+            for _, rel in iterparse(rels):
+                if rel.tag == RELATIONSHIP and rel.get("Type", "").endswith("/header"):
+                    targets[rel.get("Id")] = "word/" + rel.get("Target", "").lstrip("/").replace("word/", "", 1)
+    parts = []
+    for ref in header_refs:
+        part = targets.get(ref)
+        if part in names and part not in parts:
+            parts.append(part)
+    if not parts and not targets:
+        parts = sorted(name for name in names if name.startswith("word/header") and name.endswith(".xml"))
+    return parts
+
+
+def read_docx(source):
+    # source is a path, the document's bytes or a binary file object.
+    # Returns {"paragraphs": [...], "headers": [...]}: body paragraph texts and
+    # the non-empty header lines (each distinct line once).
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    header_refs = []
+    with zipfile.ZipFile(source) as z:
+        with z.open(DOCUMENT_PART) as part:
+            paragraphs = list(iter_paragraphs(part, header_refs))
+        headers = []
+        for name in header_parts(z, header_refs):
+            with z.open(name) as part:
+                for line in iter_paragraphs(part):
+                    line = line.strip()
+                    if line and line not in headers:
+                        headers.append(line)
+    return {"paragraphs": paragraphs, "headers": headers}
+
+
+def docx_text(source):
+    # Header lines first, as they are read on the page, then the body.
+    doc = read_docx(source)
+    return "\n".join(doc["headers"] + doc["paragraphs"])
@@ -0,0 +1,128 @@
+import re
+
+# Contact entities (emails, phones, URLs, the "Address:" line and a "Name:"
+# label) found by one precompiled scanner in a single pass over the text,
+# instead of a separate re.search over the whole resume per field.
+#
+# Every entity contains a "trigger" character ("@", ":", "/", ".", "+", "(",
+# a digit, or the "m" of "name"), so the scanner starts with that character
+# class and sre skips ahead to the next trigger without trying each branch at
+# every position; the branch is then picked by looking behind the trigger.
+# Match offsets below are relative to the trigger.
+
+EMAIL = r"(?<=@)(?P<email>[a-zA-Z0-9.-]+\.\w+)"
+URL = (r"(?<=https:)(?P<https>//[^\s]+)|(?<=http:)(?P<http>//[^\s]+)|(?<=www\.)(?P<www>[^\s]+)"
+       r"|(?<=linkedin\.com/)(?P<linkedin>[^\s]+)|(?<=github\.com/)(?P<github>[^\s]+)")
+# Labels are matched by lookahead so entities inside the labelled line are still found.
+ADDRESS = r"(?<=Address:)(?= (?P<address>.+))"
+NAME_LABEL = r"(?<=[Nn][Aa][Mm])(?=(?i:e[:\s-]+(?P<name>[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)+)))"
+# +CC with grouped digits (+91 98765 43210, +1 (415) 555-0100, +44 20 7946 0958),
+# national formats ((020) 7946 0958, 415-555-0100, 98765-43210) and bare 10-11
+# digits, not preceded by a letter, digit or "+".
+PHONE = (r"(?<![\w+][+(0-9])(?:"
+         r"(?<=\d)(?:\d{2}[-. ]\d{3}[-. ]\d{4}|\d{4}[- ]\d{5}|\d{9,10})"
+         r"|(?<=\+)\d{1,3}[-. ]?(?:\(\d{1,4}\)[-. ]?)?\d{1,5}(?:[-. ]?\d{2,5}){1,4}"
+         r"|(?<=\()\d{2,5}\)[-. ]?\d{3,5}[-. ]?\d{3,5}"
+         r")(?P<phone>)(?!\w)")
+PHONE_DIGITS = (10, 15)
+
+ENTITY_RE = re.compile(
+    r"[@:/.+(0-9Mm](?:"
+    rf"(?<=[+(0-9]){PHONE}"
+    rf"|(?<=[Mm]){NAME_LABEL}"
+    rf"|{EMAIL}"
+    rf"|(?<=[:./])(?:{URL}|{ADDRESS})"
+    r")")
+# Characters of the URL written before the trigger character.
+URL_PREFIX = {"https": len("https"), "http": len("http"), "www": len("www"),
+              "linkedin": len("linkedin.com"), "github": len("github.com")}
+URL_TRAILING = ".,;:)]}>|'\""
+EMAIL_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-")
+FIRST_LINE_RE = re.compile(r"\S[^\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*")
+
+
+def classify_url(url):
+    lowered = url.lower()
+    if "linkedin.com/" in lowered:
+        return "linkedin"
+    if "github.com/" in lowered:
+        return "github"
+    return "portfolio"
+
+
+ENTITY_LISTS = ("emails", "phones", "linkedin", "github", "portfolio")
+
+
+def extract_entities(text):
+    # {"name", "name_label", "address", "address_line", "emails", "phones", "linkedin", "github",
+    # "portfolio"}; lists keep document order without duplicates, "name" is the labelled
+    # ("name_label", None without a label) or first line.
+    found = {kind: [] for kind in ENTITY_LISTS}
+    name_label = address = None
+    seen = set()
+    for match in ENTITY_RE.finditer(text):
+        kind = match.lastgroup
+        trigger = match.start()
+        if kind == "phone":
+            value = text[trigger:match.end()]
+            if not PHONE_DIGITS[0] <= sum(ch.isdigit() for ch in value) <= PHONE_DIGITS[1]:
+                continue
+            kind = "phones"
+        elif kind == "email":
+            start = trigger
+            while start > 0 and text[start - 1] in EMAIL_LOCAL_CHARS:
+                start -= 1
+            if start == trigger:
+                continue
+            value = text[start:match.end()]
+            kind = "emails"
+        elif kind in URL_PREFIX:
+            value = text[trigger - URL_PREFIX[kind]:match.end()].rstrip(URL_TRAILING)
+            kind = classify_url(value)
+        elif kind == "address":
+            if address is None:
+                address = match.group("address")
+            continue
+        else:
+            if name_label is None:
+                name_label = match.group("name").strip()
+            continue
+        key = (kind, value.lower())
+        if key not in seen:
+            seen.add(key)
+            found[kind].append(value)
+    found["name_label"] = name_label
+    if name_label is None:
+        first_line = FIRST_LINE_RE.search(text)
+        name_label = first_line.group(0).strip() if first_line else ""
+    found["name"] = name_label
+    found["address_line"] = f"Address: {address}" if address is not None else None
+    found["address"] = address.strip() if address is not None else None
+    return found
+
+
+def merge_entities(first, second):
+    # extract_entities of two texts joined by a newline, from the result of each;
+    # only a "Name:" label whose name runs on across the join is read differently.
+    merged = {}
+    for kind in ENTITY_LISTS:
+        seen = {value.lower() for value in first[kind]}
+        merged[kind] = first[kind] + [value for value in second[kind] if value.lower() not in seen]
+    merged["name_label"] = first["name_label"] if first["name_label"] is not None else second["name_label"]
+    merged["name"] = merged["name_label"] if merged["name_label"] is not None else first["name"] or second["name"]
+    address = first if first["address_line"] is not None else second
+    merged["address_line"], merged["address"] = address["address_line"], address["address"]
+    return merged
+
+
+def contact_lines(entities):
+    # The resume's "contact" list: every phone, the address line, then profile links
+    # and any email after the first (which is the resume's "email" field).
+    contact = [f"Phone: {phone}" for phone in entities["phones"]]
+    if entities["address_line"]:
+        contact.append(entities["address_line"])
+    contact += [f"LinkedIn: {url}" for url in entities["linkedin"]]
+    contact += [f"GitHub: {url}" for url in entities["github"]]
+    contact += [f"Portfolio: {url}" for url in entities["portfolio"]]
+    contact += [f"Email: {email}" for email in entities["emails"][1:]]
+    return contact
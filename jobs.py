@@ -0,0 +1,434 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from cache import content_hash, get_or_convert
+from convert import iter_parse_upload
+from dedup import DEDUP, convert_with_index
+from layout import render_docx
+from limits import DOCUMENT_TIMEOUT, Deadline
+from nlp_model import PRELOAD_NLP, preload_nlp_model
+from store import STORE_RESULTS, get_store
+from tracing import incr, logger, span
+
+DEFAULT_JOBS_DB = os.environ.get("RESUME_JOBS_DB", os.path.join(".resume_jobs", "jobs.db"))
+# Submissions beyond this many queued jobs are refused instead of piling up.
+MAX_QUEUED = int(os.environ.get("RESUME_JOBS_MAX_QUEUED", 100))
+JOB_WORKERS = int(os.environ.get("RESUME_JOB_WORKERS", 0)) or min(4, os.cpu_count() or 1)
+POLL_INTERVAL = 0.5
+# A running job whose worker has been silent this long is assumed lost and queued again.
+STALE_SECONDS = 15 * 60
+# A worker still on one job this long after RESUME_DOCUMENT_TIMEOUT is stuck in
+# code the deadline can't interrupt; it is killed and replaced.
+STUCK_GRACE_SECONDS = 30
+SUPERVISE_INTERVAL = 5
+
+PRIORITY_BATCH = 0
+PRIORITY_INTERACTIVE = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    heartbeat REAL,
+    finished REAL,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    input BLOB,
+    partial TEXT,
+    parsed TEXT,
+    docx BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created);
+CREATE INDEX IF NOT EXISTS jobs_digest ON jobs (digest, status);
+"""
+
+ACTIVE = ("queued", "running")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    # Persistent job table in SQLite, shared by the UI process and every worker
+    # process. Each call opens its own connection, so it is safe from any thread.
+
+    def __init__(self, path=DEFAULT_JOBS_DB, max_queued=MAX_QUEUED):
+        self.path = path
+        self.max_queued = max_queued
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, timeout=30)
+        try:
+            # WAL lets the UI poll while a worker is writing.
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _connect(self, immediate=False):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def submit(self, data, filename, priority=PRIORITY_BATCH):
+        # Returns the job id. An identical upload that is still queued or running is
+        # joined instead of converted twice; QueueFull is raised when the backlog is full.
+        digest = content_hash(data)
+        with self._connect(immediate=True) as db:
+            row = db.execute("SELECT id, priority FROM jobs WHERE digest = ? AND status IN (?, ?) "
+                             "ORDER BY created LIMIT 1", (digest, *ACTIVE)).fetchone()
+            if row:
+                if priority > row["priority"]:
+                    db.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, row["id"]))
+                return row["id"]
+            queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= self.max_queued:
+                incr("jobs_rejected")
+                raise QueueFull(f"{queued} jobs are already waiting; try again shortly.")
+            job_id = uuid.uuid4().hex
+            db.execute("INSERT INTO jobs (id, digest, filename, priority, status, created, input) "
+                       "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                       (job_id, digest, filename, priority, time.time(), sqlite3.Binary(data)))
+        incr("jobs_submitted")
+        return job_id
+
+    def status(self, job_id):
+        # Everything but the payloads: status, timestamps, error, queue position and
+        # the fields parsed so far ("partial") while the job is running.
+        with self._connect() as db:
+            row = db.execute("SELECT id, filename, priority, status, created, started, finished, "
+                             "attempts, partial, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            info = dict(row)
+            info["partial"] = json.loads(info["partial"]) if info["partial"] else {}
+            if info["status"] == "queued":
+                info["position"] = db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                    "(priority > ? OR (priority = ? AND created < ?))",
+                    (row["priority"], row["priority"], row["created"])).fetchone()[0]
+        return info
+
+    def result(self, job_id):
+        # (parsed, docx_bytes) for a finished job, None otherwise.
+        with self._connect() as db:
+            row = db.execute("SELECT parsed, docx FROM jobs WHERE id = ? AND status = 'done'",
+                             (job_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row["parsed"]), bytes(row["docx"])
+
+    def claim(self, worker):
+        # Atomically move the highest-priority, oldest queued job to running.
+        with self._connect(immediate=True) as db:
+            row = db.execute("SELECT id, filename, input FROM jobs WHERE status = 'queued' "
+                             "ORDER BY priority DESC, created LIMIT 1").fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            db.execute("UPDATE jobs SET status = 'running', worker = ?, started = ?, heartbeat = ?, "
+                       "attempts = attempts + 1 WHERE id = ?", (worker, now, now, row["id"]))
+        return {"id": row["id"], "filename": row["filename"], "input": bytes(row["input"])}
+
+    def update_partial(self, job_id, partial):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET partial = ?, heartbeat = ? WHERE id = ?",
+                       (json.dumps(partial), time.time(), job_id))
+
+    def complete(self, job_id, parsed, docx_bytes):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status = 'done', finished = ?, parsed = ?, docx = ?, input = NULL "
+                       "WHERE id = ? AND status != 'cancelled'",
+                       (time.time(), json.dumps(parsed), sqlite3.Binary(docx_bytes), job_id))
+
+    def fail(self, job_id, error):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status = 'failed', finished = ?, error = ?, input = NULL "
+                       "WHERE id = ? AND status != 'cancelled'", (time.time(), error, job_id))
+
+    def cancel(self, job_id):
+        # A queued job is dropped; a running one is stopped by its worker within
+        # POLL_INTERVAL, OCR processes included. False when the job already finished.
+        with self._connect() as db:
+            return db.execute("UPDATE jobs SET status = 'cancelled', finished = ?, error = 'Cancelled.', "
+                              "input = NULL WHERE id = ? AND status IN (?, ?)",
+                              (time.time(), job_id, *ACTIVE)).rowcount > 0
+
+    def is_cancelled(self, job_id):
+        with self._connect() as db:
+            row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is None or row["status"] == "cancelled"
+
+    def stuck(self, older_than):
+        # [(id, worker, started, stage)] of jobs running for more than older_than seconds.
+        with self._connect() as db:
+            rows = db.execute("SELECT id, worker, started, partial FROM jobs WHERE status = 'running' "
+                              "AND started < ?", (time.time() - older_than,)).fetchall()
+        return [(row["id"], row["worker"], row["started"], json.loads(row["partial"] or "{}").get("stage"))
+                for row in rows]
+
+    def requeue_stale(self, older_than=STALE_SECONDS):
+        # Jobs left running by a worker that died go back to the queue.
+        with self._connect() as db:
+            return db.execute("UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' "
+                              "AND heartbeat < ?", (time.time() - older_than,)).rowcount
+
+    def purge(self, older_than=24 * 60 * 60):
+        # Drop finished jobs (and their DOCX) once nobody is going to poll for them.
+        with self._connect() as db:
+            return db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished < ?",
+                              (time.time() - older_than,)).rowcount
+
+    def counts(self):
+        with self._connect() as db:
+            return {row["status"]: row["n"] for row in
+                    db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+
+
+def watch_cancellation(queue, job_id, deadline, done):
+    # Runs beside the job: a cancel() from the UI or CLI cancels its deadline.
+    while not done.wait(POLL_INTERVAL):
+        if queue.is_cancelled(job_id):
+            deadline.cancel()
+            return
+
+
+def run_job(queue, job):
+    # The app's pipeline: streaming parse (publishing fields as they arrive) then
+    # DOCX rendering, both behind the content-addressed cache and, with
+    # RESUME_DEDUP=1, the near-duplicate index. The parse runs within a
+    # limits.Deadline; the stage it is in is published as partial["stage"].
+    job_id = job["id"]
+    partial = {}
+
+    def enter_stage(stage):
+        partial["stage"] = stage
+        queue.update_partial(job_id, partial)
+
+    deadline = Deadline(on_stage=enter_stage)
+    done = threading.Event()
+    threading.Thread(target=watch_cancellation, args=(queue, job_id, deadline, done),
+                     name=f"cancel-{job_id[:8]}", daemon=True).start()
+    try:
+        convert_job(queue, job, partial, deadline)
+    finally:
+        done.set()
+
+
+def convert_job(queue, job, partial, deadline):
+    job_id = job["id"]
+
+    def parse(data, page_texts=None):
+        parsed = None
+        for field, value in iter_parse_upload(data, job["filename"], deadline=deadline, page_texts=page_texts):
+            if field == "done":
+                parsed = value
+                continue
+            if field == "warning":
+                partial.setdefault("warnings", []).append(value)
+            elif field != "page":
+                partial[field] = value
+            # Also the worker's heartbeat, so a long OCR job is not mistaken for a lost one.
+            queue.update_partial(job_id, partial)
+        return parsed
+
+    with span("job.run"):
+        try:
+            if DEDUP:
+                parsed, docx_bytes, _, match = convert_with_index(job["input"], job["filename"], parse, render_docx,
+                                                                  deadline=deadline)
+                if match:
+                    partial["near_duplicate"] = match
+                    queue.update_partial(job_id, partial)
+            else:
+                parsed, docx_bytes, _ = get_or_convert(job["input"], parse, render_docx, filename=job["filename"])
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            queue.fail(job_id, f"{type(e).__name__}: {e}")
+            incr("jobs", status="failed")
+            return
+    if deadline.cancelled:
+        incr("jobs", status="cancelled")
+    elif not parsed or "error" in parsed or docx_bytes is None:
+        queue.fail(job_id, (parsed or {}).get("error", "Parser returned no data."))
+        incr("jobs", status="failed")
+    else:
+        queue.complete(job_id, parsed, docx_bytes)
+        incr("jobs", status="done")
+        if STORE_RESULTS:
+            try:
+                get_store().add(parsed, filename=job["filename"])
+            except Exception as e:
+                # The conversion succeeded; a store that can't be written must not fail it.
+                logger.warning("Could not store job %s: %s", job_id, e)
+
+
+def worker_main(db_path, stop=None, poll_interval=POLL_INTERVAL):
+    # Long-lived worker: models, taxonomies and templates are loaded once and
+    # reused for every job this process claims.
+    queue = JobQueue(db_path)
+    worker = f"{os.getpid()}"
+    if PRELOAD_NLP:
+        preload_nlp_model()
+    while stop is None or not stop.is_set():
+        job = queue.claim(worker)
+        if job is None:
+            # Not stop.wait(): a worker killed while waiting on the Event (see
+            # WorkerPool.reap) would leave it unable to be set.
+            time.sleep(poll_interval)
+            continue
+        run_job(queue, job)
+
+
+class WorkerPool:
+    # A fixed set of worker processes draining the queue until stop() is called.
+    # A supervisor thread replaces any worker stuck on one job past the deadline.
+
+    def __init__(self, db_path=DEFAULT_JOBS_DB, workers=None):
+        self.db_path = db_path
+        self.workers = workers or JOB_WORKERS
+        self._stop = multiprocessing.Event()
+        self._processes = []
+        self._lock = threading.Lock()
+
+    def _spawn(self, i):
+        process = multiprocessing.Process(target=worker_main, args=(self.db_path, self._stop),
+                                          name=f"resume-worker-{i}", daemon=True)
+        process.start()
+        return process
+
+    def start(self):
+        requeued = JobQueue(self.db_path).requeue_stale()
+        if requeued:
+            logger.info("Requeued %d stale jobs.", requeued)
+        with self._lock:
+            self._processes = [self._spawn(i) for i in range(self.workers)]
+        if DOCUMENT_TIMEOUT:
+            threading.Thread(target=self._supervise, name="resume-worker-supervisor", daemon=True).start()
+        return self
+
+    def _supervise(self):
+        while not self._stop.wait(SUPERVISE_INTERVAL):
+            try:
+                self.reap()
+            except Exception as e:
+                logger.warning("Worker supervision failed: %s", e)
+
+    def reap(self):
+        # Kill and replace this pool's workers that are stuck on a job; the job fails
+        # with the stage it was in. Returns the number of workers replaced.
+        queue = JobQueue(self.db_path)
+        replaced = 0
+        for job_id, worker, started, stage in queue.stuck(DOCUMENT_TIMEOUT + STUCK_GRACE_SECONDS):
+            with self._lock:
+                if self._stop.is_set():
+                    return replaced
+                index = next((i for i, process in enumerate(self._processes) if str(process.pid) == worker), None)
+                if index is None:
+                    continue
+                self._processes[index].kill()
+                self._processes[index].join()
+                self._processes[index] = self._spawn(index)
+            queue.fail(job_id, f"Timed out at stage {stage or 'unknown'} after {time.time() - started:.0f}s "
+                               f"(worker {worker} stopped; RESUME_DOCUMENT_TIMEOUT).")
+            incr("jobs", status="stuck")
+            logger.warning("Replaced worker %s, stuck on job %s at stage %s.", worker, job_id, stage)
+            replaced += 1
+        return replaced
+
+    def alive(self):
+        with self._lock:
+            return sum(process.is_alive() for process in self._processes)
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        with self._lock:
+            for process in self._processes:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+            self._processes = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume conversion job queue.")
+    parser.add_argument("--db", default=DEFAULT_JOBS_DB, help="SQLite job database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("worker", help="Run worker processes until interrupted.")
+    serve.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: up to 4).")
+    submit = commands.add_parser("submit", help="Queue files and print their job ids.")
+    submit.add_argument("files", nargs="+")
+    submit.add_argument("--priority", type=int, default=PRIORITY_BATCH)
+    status = commands.add_parser("status", help="Print a job's status, or queue counts without an id.")
+    status.add_argument("job_id", nargs="?")
+    cancel = commands.add_parser("cancel", help="Cancel a queued or running job.")
+    cancel.add_argument("job_id")
+    fetch = commands.add_parser("result", help="Write a finished job's DOCX.")
+    fetch.add_argument("job_id")
+    fetch.add_argument("-o", "--output", default="formatted_resume.docx")
+    commands.add_parser("purge", help="Delete jobs finished more than a day ago.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    if args.command == "worker":
+        pool = WorkerPool(args.db, args.workers).start()
+        print(f"{pool.workers} workers serving {args.db}", file=sys.stderr)
+        try:
+            while pool.alive():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.stop()
+        return 0
+    queue = JobQueue(args.db)
+    if args.command == "submit":
+        for path in args.files:
+            with open(path, "rb") as f:
+                print(queue.submit(f.read(), os.path.basename(path), args.priority), path)
+    elif args.command == "status":
+        print(json.dumps(queue.status(args.job_id) if args.job_id else queue.counts(), indent=2))
+    elif args.command == "cancel":
+        if not queue.cancel(args.job_id):
+            print(f"Job {args.job_id} is not queued or running.", file=sys.stderr)
+            return 1
+    elif args.command == "result":
+        result = queue.result(args.job_id)
+        if result is None:
+            print(json.dumps(queue.status(args.job_id)), file=sys.stderr)
+            return 1
+        with open(args.output, "wb") as f:
+            f.write(result[1])
+        print(args.output)
+    elif args.command == "purge":
+        print(queue.purge())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
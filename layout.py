@@ -1,9 +1,27 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from copy import deepcopy
+from io import BytesIO
+
 import docx
 from docx import Document
 from docx.shared import Pt, RGBColor
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
+from docx.opc.oxml import serialize_part_xml
+
+from tracing import incr, logger, span
+
+# Bump whenever a change alters the generated DOCX, so cached documents are invalidated.
+LAYOUT_VERSION = "1"
+
+BOLD_INTRO_RE = re.compile(r"([^.:-]+[:.-]?)\s*(.*)")
 
 
 def add_colored_underline(paragraph, color=RGBColor(0, 102, 204)):
@@ -78,14 +96,16 @@ def add_section_header(doc, text):
     return table
 
 
-def add_bullet_with_bold_intro(doc, text):
+def split_bold_intro(text):
     # Split at first ":" or "." or dash or bolded phrase (heuristic)
-    import re
-    match = re.match(r"([^.:-]+[:.-]?)\s*(.*)", text)
+    match = BOLD_INTRO_RE.match(text)
     if match:
-        intro, rest = match.group(1), match.group(2)
-    else:
-        intro, rest = text, ''
+        return match.group(1), match.group(2)
+    return text, ''
+
+
+def add_bullet_with_bold_intro(doc, text):
+    intro, rest = split_bold_intro(text)
     para = doc.add_paragraph(style="List Bullet")
     run = para.add_run(intro.strip())
     run.bold = True
@@ -93,47 +113,57 @@ def add_bullet_with_bold_intro(doc, text):
         para.add_run(' ' + rest.strip())
 
 
-def generate_docx(resume_data, output_path="formatted_resume.docx"):
-    doc = Document()
+SUMMARY_KEYWORDS = ["Leadership", "Communication", "Problem Solving", "Analytical", "Teamwork","Project Management", "Creativity", "Adaptability", "Collaboration","Experience", "Achievements", "Accomplished", "Delivered", "Improved","Increased", "Reduced", "Managed", "Developed", "Designed", "Led","Built", "Created", "Implemented", "Organized", "Achieved", "Enhanced","Optimized", "Supported", "Trained", "Innovative", "Strategic","Results-Oriented", "Motivated", "Professional", "Expertise","Certified", "Solution", "Performance", "Growth"]
+SUMMARY_KEYWORD_RE = re.compile(r"|".join(map(re.escape, SUMMARY_KEYWORDS)), re.I)
+
+# A DOCX whose styles and page setup to render into; python-docx's default template when unset.
+TEMPLATE_PATH = os.environ.get("RESUME_DOCX_TEMPLATE")
+# Rendered sections kept per process (see NehishRenderer.section_xml).
+SECTION_CACHE_ITEMS = int(os.environ.get("RESUME_SECTION_CACHE_ITEMS", 512))
+DOCUMENT_PART = "word/document.xml"
 
+
+def summary_runs(summary_text):
+    # Split the summary into (text, bold) runs, bolding the highlight keywords.
+    runs = []
+    last_idx = 0
+    for match in SUMMARY_KEYWORD_RE.finditer(summary_text):
+        start, end = match.start(), match.end()
+        if start > last_idx:
+            runs.append((summary_text[last_idx:start], False))
+        runs.append((summary_text[start:end], True))
+        last_idx = end
+    if last_idx < len(summary_text):
+        runs.append((summary_text[last_idx:], False))
+    return runs
+
+
+def write_name(resume_data, out):
     if "name" in resume_data and resume_data["name"]:
-        name_para = doc.add_paragraph()
-        name_run = name_para.add_run(resume_data["name"])
-        name_run.bold = True
-        name_run.font.size = Pt(20)
-        name_para.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+        out.name(resume_data["name"])
+
+    out.paragraph()
 
-    doc.add_paragraph()
 
-   
+def write_summary(resume_data, out):
     if "summary" in resume_data and resume_data["summary"]:
-        add_section_header(doc, "Professional Summary")
-        summary_text = resume_data["summary"]
-        keywords = ["Leadership", "Communication", "Problem Solving", "Analytical", "Teamwork","Project Management", "Creativity", "Adaptability", "Collaboration","Experience", "Achievements", "Accomplished", "Delivered", "Improved","Increased", "Reduced", "Managed", "Developed", "Designed", "Led","Built", "Created", "Implemented", "Organized", "Achieved", "Enhanced","Optimized", "Supported", "Trained", "Innovative", "Strategic","Results-Oriented", "Motivated", "Professional", "Expertise","Certified", "Solution", "Performance", "Growth"]
-
-        para = doc.add_paragraph()
-        last_idx = 0
-        import re
-        for match in re.finditer(r"|".join(map(re.escape, keywords)), summary_text, re.I):
-            start, end = match.start(), match.end()
-            if start > last_idx:
-                para.add_run(summary_text[last_idx:start])
-            run = para.add_run(summary_text[start:end])
-            run.bold = True
-            last_idx = end
-        if last_idx < len(summary_text):
-            para.add_run(summary_text[last_idx:])
+        out.header("Professional Summary")
+        out.runs(summary_runs(resume_data["summary"]))
         if "summary_bullets" in resume_data and resume_data["summary_bullets"]:
             for bullet in resume_data["summary_bullets"]:
-                add_bullet_with_bold_intro(doc, bullet)
+                out.bullet_with_bold_intro(bullet)
+
 
+def write_skills(resume_data, out):
     if "skills" in resume_data and resume_data["skills"]:
-        add_section_header(doc, "Technical Skill Sets")
+        out.header("Technical Skill Sets")
         for skill in sorted(set(resume_data["skills"])):
-            doc.add_paragraph(skill, style="List Bullet")
+            out.paragraph(skill, style="List Bullet")
 
+
+def write_experience(resume_data, out):
     if ("experience" in resume_data and resume_data["experience"]) or ("projects" in resume_data and resume_data["projects"]):
-        add_section_header(doc, "Experience")
+        out.header("Experience")
 
         if "experience" in resume_data and resume_data["experience"]:
             for exp in resume_data["experience"]:
@@ -141,14 +171,14 @@ def generate_docx(resume_data, output_path="formatted_resume.docx"):
                     hdr = f"{exp.get('title', '')} ({exp.get('start', '')} - {exp.get('end', '')})"
                     company_loc = f"{exp.get('company', '')}, {exp.get('location', '')}".strip(", ")
                     if hdr.strip():
-                        doc.add_paragraph(hdr, style="List Bullet")
+                        out.paragraph(hdr, style="List Bullet")
                     if company_loc.strip():
-                        doc.add_paragraph(company_loc)
+                        out.paragraph(company_loc)
                     for detail in exp.get("details", []):
                         if detail.strip():
-                            doc.add_paragraph(detail, style="List Bullet 2")
+                            out.paragraph(detail, style="List Bullet 2")
                 else:
-                    doc.add_paragraph(exp, style="List Bullet")
+                    out.paragraph(exp, style="List Bullet")
 
         if "projects" in resume_data and resume_data["projects"]:
             for proj in resume_data["projects"]:
@@ -157,22 +187,26 @@ def generate_docx(resume_data, output_path="formatted_resume.docx"):
                 else:
                     line = proj
                 if line and len(line.strip()) > 3 and not line.strip().startswith("•"):
-                    doc.add_paragraph(line, style="List Bullet")
+                    out.paragraph(line, style="List Bullet")
 
 
+def write_certifications(resume_data, out):
     if "certifications" in resume_data and resume_data["certifications"]:
-        add_section_header(doc, "Certifications")
+        out.header("Certifications")
         for cert in resume_data["certifications"]:
-            doc.add_paragraph(cert, style="List Bullet")
+            out.paragraph(cert, style="List Bullet")
+
 
+def write_achievements(resume_data, out):
     if "achievements" in resume_data and resume_data["achievements"]:
-        add_section_header(doc, "Achievements")
+        out.header("Achievements")
         for ach in resume_data["achievements"]:
-            doc.add_paragraph(ach, style="List Bullet")
+            out.paragraph(ach, style="List Bullet")
 
 
+def write_education(resume_data, out):
     if "education" in resume_data and resume_data["education"]:
-        add_section_header(doc, "Academic Details")
+        out.header("Academic Details")
         for edu in resume_data["education"]:
             if isinstance(edu, dict):
                 parts = [edu.get("degree", ""), edu.get("institution", ""), edu.get("major", ""), edu.get("score", "")]
@@ -180,7 +214,274 @@ def generate_docx(resume_data, output_path="formatted_resume.docx"):
             else:
                 line = edu
             if line:
-                doc.add_paragraph(line, style="List Bullet")
+                out.paragraph(line, style="List Bullet")
+
+
+# The layout's sections in document order: (name, resume fields it reads, writer).
+# A section's output depends only on those fields, which is what lets
+# NehishRenderer reuse a section's XML until one of them is edited.
+SECTIONS = [
+    ("name", ("name",), write_name),
+    ("summary", ("summary", "summary_bullets"), write_summary),
+    ("skills", ("skills",), write_skills),
+    ("experience", ("experience", "projects"), write_experience),
+    ("certifications", ("certifications",), write_certifications),
+    ("achievements", ("achievements",), write_achievements),
+    ("education", ("education",), write_education),
+]
+
+
+def changed_sections(old, new):
+    # Names of the sections whose output can differ between two versions of a resume.
+    return [name for name, fields, _ in SECTIONS if any(old.get(field) != new.get(field) for field in fields)]
+
+
+def write_resume(resume_data, out):
+    # The Nehish layout, written through a writer: DocxWriter (python-docx API)
+    # or FragmentWriter (cloned XML). Both produce the same document body.
+    for _, _, write in SECTIONS:
+        write(resume_data, out)
+
+
+class DocxWriter:
+    # Writes through the python-docx API; every call resolves styles and builds XML from scratch.
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def name(self, text):
+        name_para = self.doc.add_paragraph()
+        name_run = name_para.add_run(text)
+        name_run.bold = True
+        name_run.font.size = Pt(20)
+        name_para.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+
+    def header(self, title):
+        add_section_header(self.doc, title)
+
+    def paragraph(self, text="", style=None):
+        self.doc.add_paragraph(text, style=style)
+
+    def runs(self, runs):
+        para = self.doc.add_paragraph()
+        for text, bold in runs:
+            run = para.add_run(text)
+            if bold:
+                run.bold = True
+
+    def bullet_with_bold_intro(self, text):
+        add_bullet_with_bold_intro(self.doc, text)
+
+
+class FragmentWriter:
+    # Appends deep copies of prebuilt XML fragments (see NehishRenderer) before the body's sectPr.
+
+    def __init__(self, renderer, body):
+        self.r = renderer
+        self.body = body
+        self._sectPr = body.find(qn('w:sectPr'))
+
+    def _append(self, element):
+        if self._sectPr is not None:
+            self._sectPr.addprevious(element)
+        else:
+            self.body.append(element)
+        return element
+
+    def _run(self, text, bold=False):
+        r = deepcopy(self.r.bold_run if bold else self.r.plain_run)
+        r.text = text
+        return r
+
+    def name(self, text):
+        p = deepcopy(self.r.name_paragraph)
+        p.findall(qn('w:r'))[-1].text = text
+        self._append(p)
+
+    def header(self, title):
+        tbl = deepcopy(self.r.header_table)
+        list(tbl.iter(qn('w:r')))[self.r.header_run_index].text = ' '.join(list(title.upper()))
+        self._append(tbl)
+
+    def paragraph(self, text="", style=None):
+        p = self._append(deepcopy(self.r.styled_paragraph(style)))
+        if text:
+            p.append(self._run(text))
+
+    def runs(self, runs):
+        p = self._append(deepcopy(self.r.styled_paragraph(None)))
+        for text, bold in runs:
+            p.append(self._run(text, bold))
+
+    def bullet_with_bold_intro(self, text):
+        intro, rest = split_bold_intro(text)
+        p = self._append(deepcopy(self.r.styled_paragraph("List Bullet")))
+        p.append(self._run(intro.strip(), bold=True))
+        if rest:
+            p.append(self._run(' ' + rest.strip()))
+
+
+class NehishRenderer:
+    # Loads the template once and prebuilds every element the layout uses by
+    # running the python-docx helpers on a scratch copy, so clones are
+    # byte-for-byte what DocxWriter would produce.
+    #
+    # Opening and saving the package through python-docx (recompressing ~800 KB of
+    # styles) costs more than writing the resume, so render() skips it: each
+    # section is serialized on its own, and word/document.xml, built from the
+    # template's serialization around the sections' XML, is appended to a copy of
+    # the template's other parts, zipped once. Sections are cached by the fields
+    # they read, so re-rendering an edited resume (the app's preview) only writes
+    # the sections whose fields changed.
+
+    def __init__(self, template_path=TEMPLATE_PATH, section_cache_items=SECTION_CACHE_ITEMS):
+        if template_path and os.path.exists(template_path):
+            doc = Document(template_path)
+        else:
+            if template_path:
+                logger.warning("DOCX template %s not found; using python-docx's default template.", template_path)
+            else:
+                logger.info("No RESUME_DOCX_TEMPLATE set; using python-docx's default template.")
+            doc = Document()
+        body = doc.element.body
+        for child in list(body):
+            if child.tag != qn('w:sectPr'):
+                body.remove(child)
+        buffer = BytesIO()
+        doc.save(buffer)
+        self.template_bytes = buffer.getvalue()
+
+        self._scratch = Document(BytesIO(self.template_bytes))
+        self._styled = {}
+        scratch = self._scratch
+        name_para = scratch.add_paragraph()
+        name_run = name_para.add_run()
+        name_run.bold = True
+        name_run.font.size = Pt(20)
+        name_para.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+        self.name_paragraph = self._detach(name_para._p)
+
+        table = add_section_header(scratch, "")
+        title_run = table.cell(0, 1).paragraphs[0].runs[-1]._r
+        self.header_run_index = list(table._tbl.iter(qn('w:r'))).index(title_run)
+        self.header_table = self._detach(table._tbl)
+
+        para = scratch.add_paragraph()
+        self.plain_run = self._detach(para.add_run()._r)
+        bold = para.add_run()
+        bold.bold = True
+        self.bold_run = self._detach(bold._r)
+        self._detach(para._p)
+
+        for style in (None, "List Bullet", "List Bullet 2"):
+            self.styled_paragraph(style)
+
+        self._document = self.new_document().element
+        marker = OxmlElement('w:p')
+        FragmentWriter(self, self._document.body)._append(marker)
+        xml = serialize_part_xml(self._document)
+        self._document.body.remove(marker)
+        # document.xml is head + the sections' XML + tail; the marker paragraph is the body's first child.
+        self._document_head = xml[:xml.index(b'<w:body>') + len(b'<w:body>')]
+        self._document_tail = xml[len(self._document_head) + len(b'<w:p/>'):]
+
+        buffer = BytesIO()
+        with zipfile.ZipFile(BytesIO(self.template_bytes)) as template, \
+                zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as package:
+            for info in template.infolist():
+                if info.filename == DOCUMENT_PART:
+                    self._document_info = zipfile.ZipInfo(DOCUMENT_PART, info.date_time)
+                    self._document_info.compress_type = zipfile.ZIP_DEFLATED
+                else:
+                    package.writestr(info, template.read(info))
+        self._package = buffer.getvalue()
+
+        self.section_cache_items = section_cache_items
+        self._sections = OrderedDict()
+        self._sections_lock = threading.Lock()
+
+    def _detach(self, element):
+        element.getparent().remove(element)
+        return element
+
+    def styled_paragraph(self, style):
+        # Empty paragraph carrying the resolved style id; style names are looked up once per renderer.
+        if style not in self._styled:
+            self._styled[style] = self._detach(self._scratch.add_paragraph(style=style)._p)
+        return self._styled[style]
+
+    def new_document(self):
+        return Document(BytesIO(self.template_bytes))
+
+    def section_xml(self, section, resume_data):
+        # Serialized body XML of one SECTIONS entry, reused while the fields it reads are unchanged.
+        name, fields, write = section
+        key = (name, hashlib.blake2b(json.dumps([resume_data.get(field) for field in fields], sort_keys=True,
+                                                default=str).encode("utf-8"), digest_size=16).digest())
+        with self._sections_lock:
+            xml = self._sections.get(key)
+            if xml is not None:
+                self._sections.move_to_end(key)
+        if xml is not None:
+            incr("render_sections", outcome="reused")
+            return xml
+        document = deepcopy(self._document)
+        body = document.body
+        empty = len(body)
+        write(resume_data, FragmentWriter(self, body))
+        if len(body) == empty:
+            xml = b''
+        else:
+            serialized = serialize_part_xml(document)
+            xml = serialized[len(self._document_head):len(serialized) - len(self._document_tail)]
+        with self._sections_lock:
+            self._sections[key] = xml
+            while len(self._sections) > self.section_cache_items:
+                self._sections.popitem(last=False)
+        incr("render_sections", outcome="rendered")
+        return xml
+
+    def package(self, document_xml):
+        # The template's package with document_xml as its main document part.
+        buffer = BytesIO(self._package)
+        with zipfile.ZipFile(buffer, "a") as package:
+            package.writestr(self._document_info, document_xml)
+        return buffer.getvalue()
+
+    def render(self, resume_data):
+        parts = [self.section_xml(section, resume_data) for section in SECTIONS]
+        return self.package(self._document_head + b''.join(parts) + self._document_tail)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
 
+
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = NehishRenderer()
+    return _renderer
+
+
+def render_docx(resume_data):
+    # Nehish-formatted DOCX as bytes, rendered entirely in memory.
+    with span("render.docx"):
+        return get_renderer().render(resume_data)
+
+
+def generate_docx(resume_data, output_path="formatted_resume.docx"):
+    data = render_docx(resume_data)
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return output_path
+
+
+def generate_docx_reference(resume_data, output_path="formatted_resume.docx"):
+    # Plain python-docx rendering of the same layout; the baseline for the fragment renderer and its benchmark.
+    doc = Document()
+    write_resume(resume_data, DocxWriter(doc))
     doc.save(output_path)
     return output_path
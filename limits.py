@@ -0,0 +1,257 @@
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from tracing import incr, logger
+
+# Time and size limits for converting one document. A broken or hostile PDF can
+# keep PyPDF2, pdftoppm or tesseract busy indefinitely, and a shared worker then
+# stalls every job queued behind it. Each conversion gets a Deadline instead: a
+# wall-clock limit for the whole document and one per extraction stage, checked
+# between pages and passed down as the timeout of every child process (poppler,
+# tesseract), which is killed when it runs out or the conversion is cancelled.
+# Running out ends the conversion with "Timed out at stage X" instead of falling
+# back to a slower extractor. In-process work (PyPDF2, tesserocr, spaCy) can't be
+# interrupted mid-call and stops at its next check; jobs.WorkerPool replaces a
+# worker that is still stuck well past the deadline.
+
+DOCUMENT_TIMEOUT = float(os.environ.get("RESUME_DOCUMENT_TIMEOUT", 120))  # seconds, 0 disables
+DEFAULT_STAGE_TIMEOUTS = {"docx": 20, "pdf_text": 20, "ocr": 90, "parse": 20, "pyresparser": 30}
+MAX_INPUT_BYTES = int(os.environ.get("RESUME_MAX_INPUT_BYTES", 20 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.environ.get("RESUME_MAX_PDF_PAGES", 100))  # pages read from the text layer
+# Children get their own process group, so killing one also kills anything it
+# started (e.g. a wrapper script's tesseract); on Windows they get no console window.
+CHILD_FLAGS = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == "nt" else {"start_new_session": True}
+
+
+def parse_stage_timeouts(spec):
+    # "ocr=60,pdf_text=10" on top of DEFAULT_STAGE_TIMEOUTS; 0 disables a stage's limit.
+    timeouts = dict(DEFAULT_STAGE_TIMEOUTS)
+    for item in spec.split(","):
+        stage, _, seconds = item.partition("=")
+        if stage.strip():
+            timeouts[stage.strip()] = float(seconds)
+    return timeouts
+
+
+STAGE_TIMEOUTS = parse_stage_timeouts(os.environ.get("RESUME_STAGE_TIMEOUTS", ""))
+
+
+class LimitExceeded(Exception):
+    # The document is over a limit; the conversion stops at `stage`.
+
+    def __init__(self, message, stage=None):
+        super().__init__(message)
+        self.stage = stage
+
+
+class StageTimeout(LimitExceeded):
+    pass
+
+
+class Cancelled(LimitExceeded):
+    pass
+
+
+def limit_result(error):
+    # What parse_resume returns for a document stopped by a limit.
+    incr("limits_exceeded", stage=error.stage, limit=type(error).__name__)
+    return {"error": str(error), "stage": error.stage}
+
+
+def check_input_size(source, max_bytes=None):
+    max_bytes = MAX_INPUT_BYTES if max_bytes is None else max_bytes
+    size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+    if max_bytes and size > max_bytes:
+        raise LimitExceeded(f"Input is {size} bytes, the limit is {max_bytes} (RESUME_MAX_INPUT_BYTES).", "input")
+
+
+def kill_child(proc):
+    try:
+        if os.name == "nt":
+            proc.kill()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except OSError as e:
+        logger.debug("Could not kill child process %s: %s", proc.pid, e)
+
+
+class Deadline:
+    # One document's time budget, shared by every thread working on it. Stages are
+    # entered with `with deadline.stage("ocr")`; remaining() is the time left in
+    # the current stage, which never outlasts the document's. A stage entered
+    # again continues from the time it has used, so a stage entered around each
+    # step (OCR, once per page) is not charged for the caller's work in between.
+    # The current stage is per thread: the OCR pool's threads are put in "ocr"
+    # with charged_to() (see bind), so their checks count against the OCR limit
+    # whatever stage the consumer is in meanwhile.
+    # on_stage(name) is called as each stage starts (the job workers report it as progress).
+
+    def __init__(self, timeout=None, stage_timeouts=None, on_stage=None):
+        self.timeout = DOCUMENT_TIMEOUT if timeout is None else timeout
+        self.stage_timeouts = STAGE_TIMEOUTS if stage_timeouts is None else stage_timeouts
+        self.on_stage = on_stage
+        self.started = time.monotonic()
+        self._thread = threading.local()
+        self._entered = {}  # open stage -> when it was entered, less the time it had already used
+        self._spent = {}
+        self._cancelled = threading.Event()
+        self._children = set()
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        # The stage this thread is in (None outside every stage).
+        return getattr(self._thread, "stage", None)
+
+    @contextmanager
+    def stage(self, name):
+        with self._lock:
+            self._entered[name] = time.monotonic() - self._spent.get(name, 0)
+        with self.charged_to(name):
+            try:
+                if self.on_stage is not None:
+                    self.on_stage(name)
+                self.check()
+                yield self
+            finally:
+                with self._lock:
+                    self._spent[name] = time.monotonic() - self._entered.pop(name)
+
+    @contextmanager
+    def charged_to(self, name):
+        # Put this thread in stage name for the block without entering it: its checks
+        # count against that stage's limit and time, which stage() keeps.
+        previous = self.current
+        self._thread.stage = name
+        try:
+            yield self
+        finally:
+            self._thread.stage = previous
+
+    def _elapsed(self, name):
+        with self._lock:
+            if name in self._entered:
+                return time.monotonic() - self._entered[name]
+            return self._spent.get(name, 0)
+
+    def _left(self):
+        # (seconds left, "document" or "stage", this thread's stage), whichever limit
+        # is nearer; seconds left is None when unlimited.
+        stage = self.current
+        left = []
+        if self.timeout:
+            left.append((self.started + self.timeout - time.monotonic(), "document"))
+        stage_timeout = self.stage_timeouts.get(stage)
+        if stage_timeout:
+            left.append((stage_timeout - self._elapsed(stage), "stage"))
+        seconds, limit = min(left) if left else (None, None)
+        return seconds, limit, stage
+
+    def remaining(self):
+        return self._left()[0]
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _timed_out(self, limit, stage):
+        if limit == "stage":
+            return StageTimeout(f"Timed out at stage {stage} after {self._elapsed(stage):.1f}s "
+                                f"(stage limit {self.stage_timeouts[stage]:g}s, RESUME_STAGE_TIMEOUTS).", stage)
+        return StageTimeout(f"Timed out at stage {stage} after {time.monotonic() - self.started:.1f}s "
+                            f"(document limit {self.timeout:g}s, RESUME_DOCUMENT_TIMEOUT).", stage)
+
+    def check(self):
+        # Raises Cancelled or StageTimeout once the conversion should stop.
+        stage = self.current
+        if self._cancelled.is_set():
+            raise Cancelled(f"Cancelled at stage {stage}.", stage)
+        left, limit, stage = self._left()
+        if left is not None and left <= 0:
+            raise self._timed_out(limit, stage)
+
+    def cancel(self):
+        # Safe from any thread: child processes are killed now, in-process work stops at its next check.
+        self._cancelled.set()
+        with self._lock:
+            children = list(self._children)
+        for proc in children:
+            kill_child(proc)
+
+    def run(self, args):
+        # Run a child process to completion within the deadline: (returncode, stdout, stderr).
+        self.check()
+        proc = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                **CHILD_FLAGS)
+        with self._lock:
+            self._children.add(proc)
+        expired = False
+        try:
+            if self._cancelled.is_set():
+                kill_child(proc)
+            try:
+                stdout, stderr = proc.communicate(timeout=self.remaining())
+            except subprocess.TimeoutExpired:
+                expired = True
+                kill_child(proc)
+                stdout, stderr = proc.communicate()
+        finally:
+            with self._lock:
+                self._children.discard(proc)
+        self.check()
+        if expired:
+            raise self._timed_out(*self._left()[1:])
+        return proc.returncode, stdout, stderr
+
+
+_local = threading.local()
+
+
+def current_deadline():
+    # The Deadline bound to this thread, if any (see bind).
+    return getattr(_local, "deadline", None)
+
+
+@contextmanager
+def bind(deadline, stage=None):
+    # Make deadline this thread's current_deadline() for the block, so code behind
+    # a fixed interface (OCR backends' image_to_string) can honor it. A pool thread
+    # doing one stage's work passes that stage (see Deadline.charged_to).
+    previous = current_deadline()
+    _local.deadline = deadline
+    try:
+        if deadline is not None and stage is not None:
+            with deadline.charged_to(stage):
+                yield deadline
+        else:
+            yield deadline
+    finally:
+        _local.deadline = previous
+
+
+def check_deadline(deadline=None):
+    deadline = deadline or current_deadline()
+    if deadline is not None:
+        deadline.check()
+
+
+def child_timeout(deadline=None):
+    # Seconds left for work that can't run through run_child (tesserocr's recognition timeout), or None.
+    deadline = deadline or current_deadline()
+    if deadline is None:
+        return None
+    deadline.check()
+    return deadline.remaining()
+
+
+def run_child(args, deadline=None):
+    # (returncode, stdout, stderr) of a child process, killed when the current deadline passes.
+    deadline = deadline or current_deadline()
+    if deadline is not None:
+        return deadline.run(args)
+    proc = subprocess.run(args, stdin=subprocess.DEVNULL, capture_output=True, **CHILD_FLAGS)
+    return proc.returncode, proc.stdout, proc.stderr
@@ -0,0 +1,101 @@
+import os
+import threading
+from io import BytesIO
+
+from backends import get_backend, preload_backends, register_backend
+from tracing import span
+
+# Load the fallback NLP model when a worker starts instead of on its first failed file.
+PRELOAD_NLP = os.environ.get("RESUME_PRELOAD_NLP", "") not in ("", "0")
+
+
+class ResumeNLPModel:
+    # pyresparser's two spaCy pipelines, name matcher and skills list, loaded once
+    # per process. ResumeParser(path) reloads all of them for every file and re-reads
+    # the file; extract() runs the same entity extraction on text we already have.
+
+    def __init__(self):
+        pyresparser = get_backend("pyresparser")
+        import pandas as pd
+        import spacy
+        from spacy.matcher import Matcher
+        from pyresparser import constants, utils
+        package_dir = os.path.dirname(os.path.abspath(pyresparser.__file__))
+        self.utils = utils
+        self.nlp = spacy.load('en_core_web_sm')
+        self.custom_nlp = spacy.load(package_dir)
+        self.matcher = Matcher(self.nlp.vocab)
+        # utils.extract_name adds this pattern on every call; a shared matcher gets it once.
+        try:
+            self.matcher.add('NAME', [constants.NAME_PATTERN])
+        except TypeError:
+            self.matcher.add('NAME', None, constants.NAME_PATTERN)
+        self.skills = set(pd.read_csv(os.path.join(package_dir, 'skills.csv')).columns.values)
+        self._lock = threading.Lock()
+
+    def extract_text(self, source, ext):
+        # pyresparser's own extraction (pdfminer / docx2txt), for when ours found nothing.
+        if isinstance(source, bytes):
+            source = BytesIO(source)
+            source.name = "resume" + ext
+        return self.utils.extract_text(source, ext)
+
+    def count_pages(self, source, ext):
+        if ext != ".pdf":
+            return None
+        return self.utils.get_number_of_pages(BytesIO(source) if isinstance(source, bytes) else source)
+
+    def _name(self, doc):
+        for _, start, end in self.matcher(doc):
+            span_text = doc[start:end].text
+            if 'name' not in span_text.lower():
+                return span_text
+        return None
+
+    def _skills(self, doc, noun_chunks):
+        found = [token.text for token in doc if not token.is_stop and token.text.lower() in self.skills]
+        found += [chunk.text.lower().strip() for chunk in noun_chunks if chunk.text.lower().strip() in self.skills]
+        return [skill.capitalize() for skill in set(skill.lower() for skill in found)]
+
+    def extract(self, text_raw, page_count=None):
+        # Same fields as ResumeParser.get_extracted_data().
+        utils = self.utils
+        text = ' '.join(text_raw.split())
+        with self._lock, span("nlp.extract"):
+            doc = self.nlp(text)
+            custom_doc = self.custom_nlp(text_raw)
+            noun_chunks = list(doc.noun_chunks)
+            name = self._name(doc)
+            skills = self._skills(doc, noun_chunks)
+        custom_entities = utils.extract_entities_wih_custom_model(custom_doc)
+        sections = utils.extract_entity_sections_grad(text_raw)
+        details = {
+            'name': (custom_entities.get('Name') or [name])[0],
+            'email': utils.extract_email(text),
+            'mobile_number': utils.extract_mobile_number(text, None),
+            'skills': skills,
+            'college_name': sections.get('College Name'),
+            'degree': custom_entities.get('Degree'),
+            'designation': custom_entities.get('Designation'),
+            'experience': sections.get('experience'),
+            'company_names': custom_entities.get('Companies worked at'),
+            'no_of_pages': page_count,
+            'total_experience': 0,
+        }
+        if 'experience' in sections:
+            try:
+                details['total_experience'] = round(utils.get_total_experience(sections['experience']) / 12, 2)
+            except KeyError:
+                pass
+        return details
+
+
+register_backend("nlp_model", ResumeNLPModel)
+
+
+def get_nlp_model():
+    return get_backend("nlp_model")
+
+
+def preload_nlp_model():
+    preload_backends(["nlp_model"])
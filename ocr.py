@@ -0,0 +1,465 @@
+import importlib.util
+import io
+import logging
+import os
+import queue
+import re
+import shlex
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+from backends import get_backend, register_backend
+from limits import LimitExceeded, bind, check_deadline, child_timeout, run_child
+import preprocess
+from preprocess import preprocess_page
+from tracing import debug_artifact_path, incr, logger, span
+
+POPPLER_PATH = r"C:\poppler-24.08.0\poppler-24.08.0\Library\bin"
+TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+
+def load_pytesseract():
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+    return pytesseract
+
+
+register_backend("pytesseract", load_pytesseract)
+
+OCR_DPI = 300
+TESSERACT_PSM = 3
+TESSERACT_LANG = "eng"
+TESSERACT_CONFIG = f'--psm {TESSERACT_PSM}'
+# "fixed" renders every page at OCR_DPI. "adaptive" renders straight to grayscale at
+# the first of OCR_ADAPTIVE_DPIS and only re-renders a page at the next resolution
+# when the mean word confidence stays below OCR_MIN_CONFIDENCE.
+OCR_DPI_MODE = os.environ.get("RESUME_OCR_DPI_MODE", "fixed")
+OCR_ADAPTIVE_DPIS = tuple(int(dpi) for dpi in os.environ.get("RESUME_OCR_ADAPTIVE_DPIS", "150,300").split(","))
+OCR_MIN_CONFIDENCE = float(os.environ.get("RESUME_OCR_MIN_CONFIDENCE", 80))
+# Per-document caps: pages sent to OCR, pixels rasterized over all of them, and
+# pixels for any single page (oversized pages are rendered at a lower DPI).
+OCR_MAX_PAGES = int(os.environ.get("RESUME_OCR_MAX_PAGES", 50))
+OCR_MAX_PIXELS = int(os.environ.get("RESUME_OCR_MAX_PIXELS", 500_000_000))
+OCR_MAX_PAGE_PIXELS = int(os.environ.get("RESUME_OCR_MAX_PAGE_PIXELS", 40_000_000))
+# "auto" uses the in-process tesserocr engine when it is installed, pytesseract otherwise.
+OCR_BACKEND = os.environ.get("RESUME_OCR_BACKEND", "auto")
+OCR_WORKERS = int(os.environ.get("RESUME_OCR_WORKERS", 0)) or min(4, os.cpu_count() or 1)
+
+
+_version_logged = False
+
+
+def log_tesseract_version():
+    # Spawns tesseract, so it runs once per process and only when debug logging is on.
+    global _version_logged
+    if not _version_logged and logger.isEnabledFor(logging.DEBUG):
+        _version_logged = True
+        try:
+            logger.debug("Tesseract version: %s", get_backend("pytesseract").get_tesseract_version())
+        except Exception as e:
+            logger.debug("Tesseract version unavailable: %s", e)
+
+
+@contextmanager
+def local_pdf_path(source):
+    # poppler only reads files: a PDF held in memory is written to a uniquely
+    # named temp file for the duration of the block, a path is used as-is.
+    if not isinstance(source, bytes):
+        yield source
+        return
+    fd, path = tempfile.mkstemp(prefix="resume-", suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning("Could not remove temp file %s: %s", path, e)
+
+
+class PytesseractBackend:
+    # Runs the tesseract executable per page: a new process, a temp image file and
+    # a fresh load of the language data every call. The process is started here
+    # rather than by pytesseract so the document's deadline can kill it.
+    name = "pytesseract"
+
+    def _run(self, img, config, outputs):
+        # {extension: text} of the output files tesseract wrote for img.
+        tess = get_backend("pytesseract").pytesseract
+        with tess.save(img) as (temp_name, input_filename):
+            args = ([tess.tesseract_cmd, input_filename, temp_name, "-l", TESSERACT_LANG]
+                    + shlex.split(config, posix=os.name != "nt") + ["txt"])
+            try:
+                returncode, _, stderr = run_child(args)
+            except FileNotFoundError:
+                raise tess.TesseractNotFoundError()
+            if returncode:
+                raise tess.TesseractError(returncode, tess.get_errors(stderr))
+            result = {}
+            for extension in outputs:
+                with open(f"{temp_name}.{extension}", "rb") as f:
+                    result[extension] = f.read().decode("utf-8")
+            return result
+
+    def image_to_string(self, img):
+        return self._run(img, TESSERACT_CONFIG, ("txt",))["txt"]
+
+    def recognize(self, img):
+        # Text plus per-word confidences from a single tesseract run (txt and tsv outputs).
+        tess = get_backend("pytesseract").pytesseract
+        outputs = self._run(img, TESSERACT_CONFIG + " -c tessedit_create_tsv=1", ("txt", "tsv"))
+        text = outputs["txt"]
+        data = tess.file_to_dict(outputs["tsv"], "\t", -1)
+        confidences = [float(conf) for conf, word in zip(data.get("conf", []), data.get("text", []))
+                       if str(word).strip()]
+        return text, confidences
+
+
+def tessdata_dir():
+    if os.environ.get("TESSDATA_PREFIX"):
+        return os.environ["TESSDATA_PREFIX"]
+    bundled = os.path.join(os.path.dirname(TESSERACT_PATH), "tessdata")
+    return bundled if os.path.isdir(bundled) else None
+
+
+class TesserocrBackend:
+    # libtesseract in-process via tesserocr. Engines are expensive to start (they
+    # load the traineddata), so they are kept in a pool and reused across pages
+    # and documents; each engine is used by one thread at a time.
+    name = "tesserocr"
+
+    def __init__(self, lang=TESSERACT_LANG, psm=TESSERACT_PSM):
+        self._tesserocr = get_backend("tesserocr")
+        self.lang = lang
+        self.psm = psm
+        self._engines = queue.LifoQueue()
+        # Fail here rather than on the first page if the language data is missing.
+        self._release(self._new_engine())
+
+    def _new_engine(self):
+        with span("ocr.engine_init", backend=self.name):
+            kwargs = {"lang": self.lang, "psm": self.psm}
+            path = tessdata_dir()
+            if path:
+                kwargs["path"] = path
+            return self._tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _acquire(self):
+        try:
+            return self._engines.get_nowait()
+        except queue.Empty:
+            return self._new_engine()
+
+    def _release(self, engine):
+        self._engines.put(engine)
+
+    def image_to_string(self, img):
+        return self.recognize(img)[0]
+
+    def recognize(self, img):
+        engine = self._acquire()
+        try:
+            engine.SetImage(img)
+            # In-process, so the deadline can only be passed to libtesseract as a recognition timeout.
+            timeout = child_timeout()
+            if timeout is not None and not engine.Recognize(timeout=max(1, int(timeout * 1000))):
+                check_deadline()
+                raise RuntimeError("Tesseract recognition failed.")
+            text = engine.GetUTF8Text()
+            return text, [float(conf) for conf in engine.AllWordConfidences()]
+        except Exception:
+            # Don't hand a possibly broken engine to the next page.
+            engine.End()
+            engine = None
+            raise
+        finally:
+            if engine is not None:
+                engine.Clear()
+                self._release(engine)
+
+
+OCR_BACKENDS = {
+    "pytesseract": PytesseractBackend,
+    "tesserocr": TesserocrBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def make_ocr_backend(name):
+    if name != "auto":
+        return OCR_BACKENDS[name]()
+    try:
+        return TesserocrBackend()
+    except Exception as e:
+        logger.debug("tesserocr unavailable (%s), using pytesseract.", e)
+        return PytesseractBackend()
+
+
+def get_ocr_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = make_ocr_backend(OCR_BACKEND)
+                logger.info("OCR backend: %s", _backend.name)
+    return _backend
+
+
+def ocr_settings():
+    # The settings that change OCR output, for cache keys (cache.config_fingerprint).
+    # Read when called: batch.py and set_ocr_backend() change them at runtime.
+    if _backend is not None:
+        backend = getattr(_backend, "name", type(_backend).__name__)
+    elif OCR_BACKEND == "auto":
+        backend = "tesserocr" if importlib.util.find_spec("tesserocr") else "pytesseract"
+    else:
+        backend = OCR_BACKEND
+    return {"backend": backend, "lang": TESSERACT_LANG, "psm": TESSERACT_PSM, "dpi": OCR_DPI,
+            "dpi_mode": OCR_DPI_MODE, "adaptive_dpis": OCR_ADAPTIVE_DPIS, "min_confidence": OCR_MIN_CONFIDENCE,
+            "preprocess": preprocess.OCR_PREPROCESS, "preprocess_dpi": preprocess.OCR_PREPROCESS_DPI}
+
+
+def set_ocr_backend(backend):
+    # Accepts a backend name ("auto", "pytesseract", "tesserocr") or an object with image_to_string(img).
+    global _backend
+    _backend = make_ocr_backend(backend) if isinstance(backend, str) else backend
+    return _backend
+
+
+_PAGE_SIZE_KEY_RE = re.compile(r"Page\s+(\d+)\s+size")
+_PAGE_SIZE_RE = re.compile(r"([\d.]+)\s*x\s*([\d.]+)\s*pts")
+
+
+def run_poppler(command, args):
+    # stdout of a poppler tool. It runs through run_child, like tesseract, so the
+    # deadline's timeout and cancel() kill it. POPPLER_PATH is used when it exists,
+    # else the tool is looked up on PATH.
+    if os.path.isdir(POPPLER_PATH):
+        command = os.path.join(POPPLER_PATH, command)
+    returncode, stdout, stderr = run_child([command] + args)
+    if returncode:
+        raise RuntimeError(f"{os.path.basename(command)} failed ({returncode}): "
+                           f"{stderr.decode('utf-8', 'replace').strip()}")
+    return stdout
+
+
+def pdf_page_sizes(file_path, last_page=None):
+    # Page count and {page: (width, height)} in points from a single pdfinfo run.
+    out = run_poppler("pdfinfo", ["-f", "1", "-l", str(last_page or 10 ** 6), file_path])
+    info = {}
+    for line in out.decode("utf-8", "ignore").splitlines():
+        key, _, value = line.partition(":")
+        if key:
+            info[key] = value.strip()
+    sizes = {}
+    for key, value in info.items():
+        key_match, size_match = _PAGE_SIZE_KEY_RE.match(key), _PAGE_SIZE_RE.match(value)
+        if key_match and size_match:
+            sizes[int(key_match.group(1))] = (float(size_match.group(1)), float(size_match.group(2)))
+    return int(info["Pages"]), sizes
+
+
+class OcrLimitError(LimitExceeded):
+    # A document over the OCR page or pixel caps; like every limit it ends the
+    # conversion at stage "ocr" (limits.limit_result) instead of falling back.
+
+    def __init__(self, message):
+        super().__init__(message, "ocr")
+
+
+class OcrBudget:
+    # Pixels one document may still rasterize, shared by its OCR threads. With the
+    # page sizes from pdfinfo a page is refused, or an oversized page gets a lower
+    # DPI, before anything is rendered; pages of unknown size are charged afterwards.
+
+    def __init__(self, page_sizes=None, max_pixels=None, max_page_pixels=None):
+        self.page_sizes = page_sizes or {}
+        self.max_pixels = OCR_MAX_PIXELS if max_pixels is None else max_pixels
+        self.max_page_pixels = OCR_MAX_PAGE_PIXELS if max_page_pixels is None else max_page_pixels
+        self.pixels = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, page_number, dpi):
+        # Returns the DPI to render the page at; raises OcrLimitError when the document is over budget.
+        size = self.page_sizes.get(page_number)
+        if size is None:
+            return dpi
+        area = (size[0] / 72.0) * (size[1] / 72.0)
+        if self.max_page_pixels and area * dpi * dpi > self.max_page_pixels:
+            dpi = max(36, int((self.max_page_pixels / area) ** 0.5))
+            logger.info("Page %d is %.0fx%.0f pt; rendering it at %d dpi.", page_number, size[0], size[1], dpi)
+        self._charge(int(area * dpi * dpi))
+        return dpi
+
+    def settle(self, page_number, pixels):
+        if page_number not in self.page_sizes:
+            self._charge(pixels)
+
+    def _charge(self, pixels):
+        with self._lock:
+            if self.max_pixels and self.pixels + pixels > self.max_pixels:
+                incr("ocr_limit_exceeded", limit="pixels")
+                raise OcrLimitError(f"OCR pixel budget of {self.max_pixels} exceeded "
+                                    f"({self.pixels} already rendered; raise RESUME_OCR_MAX_PIXELS).")
+            self.pixels += pixels
+
+
+def render_page(file_path, page_number, dpi, grayscale=False, budget=None, debug_name=None):
+    # Rasterize one page (never the whole document) and account for its pixels.
+    if budget is not None:
+        dpi = budget.reserve(page_number, dpi)
+    with span("ocr.render", page=page_number, dpi=dpi):
+        # Without an output root pdftoppm writes the page to stdout as PPM (PGM in gray).
+        args = ["-r", str(dpi), "-f", str(page_number), "-l", str(page_number)]
+        try:
+            out = run_poppler("pdftoppm", args + (["-gray"] if grayscale else []) + [file_path])
+        except Exception:
+            # pdftoppm killed by the deadline: report that, not its exit status.
+            check_deadline()
+            raise
+        if not out:
+            return None, dpi
+        img = get_backend("PIL.Image").open(io.BytesIO(out))
+        img.load()
+    if budget is not None:
+        budget.settle(page_number, img.width * img.height)
+    incr("ocr_raster_bytes", img.width * img.height * len(img.getbands()), dpi=dpi)
+    debug_path = debug_artifact_path(debug_name) if debug_name else None
+    if debug_path:
+        img.save(debug_path)
+    return img, dpi
+
+
+def mean_confidence(confidences):
+    return sum(confidences) / len(confidences) if confidences else 0.0
+
+
+def ocr_page(file_path, page_number, dpi=OCR_DPI, budget=None):
+    # Render and OCR a single page; pdftoppm and tesseract both run as child
+    # processes, so a thread per page is enough to keep several cores busy.
+    # Rasters are closed as soon as they have been read, so at most one page per
+    # OCR thread is held in memory.
+    if OCR_DPI_MODE == "adaptive":
+        return ocr_page_adaptive(file_path, page_number, budget=budget)
+    img, dpi = render_page(file_path, page_number, dpi, budget=budget, debug_name=f"page_{page_number}.png")
+    if img is None:
+        return ""
+    gray = img.convert('L')  # Grayscale for better OCR
+    img.close()
+    gray = preprocess_page(gray, dpi, page_number)
+    backend = get_ocr_backend()
+    try:
+        with span("ocr.tesseract", page=page_number, backend=backend.name):
+            return backend.image_to_string(gray)
+    finally:
+        gray.close()
+
+
+def ocr_page_adaptive(file_path, page_number, dpis=None, min_confidence=None, budget=None):
+    # Cheap first pass at low resolution; escalate only pages Tesseract is unsure
+    # about, keeping whichever pass scored best. Rendering to grayscale directly
+    # avoids the RGB raster (3x the bytes) that fixed mode converts afterwards.
+    dpis = dpis or OCR_ADAPTIVE_DPIS
+    min_confidence = OCR_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    backend = get_ocr_backend()
+    best_text, best_confidence = "", -1.0
+    for attempt, dpi in enumerate(dpis):
+        img, dpi = render_page(file_path, page_number, dpi, grayscale=True, budget=budget,
+                               debug_name=f"page_{page_number}_{dpi}dpi.png")
+        if img is None:
+            return best_text
+        img = preprocess_page(img, dpi, page_number)
+        try:
+            with span("ocr.tesseract", page=page_number, backend=backend.name, dpi=dpi):
+                text, confidences = backend.recognize(img)
+        finally:
+            img.close()
+        confidence = mean_confidence(confidences)
+        if confidence > best_confidence:
+            best_text, best_confidence = text, confidence
+        if confidence >= min_confidence:
+            break
+        if attempt + 1 < len(dpis):
+            incr("ocr_escalations", dpi=dpis[attempt + 1])
+            logger.debug("Page %d: mean confidence %.1f at %d dpi, retrying at %d dpi.",
+                         page_number, confidence, dpi, dpis[attempt + 1])
+    incr("ocr_pages", dpi=dpi)
+    return best_text
+
+
+def iter_ocr_pdf_pages(file_path, page_numbers=None, workers=None, max_pages=None, max_pixels=None, deadline=None):
+    # Iterator over the text of the given 1-based pages, in page order, OCR'd on a
+    # bounded thread pool that starts when it is first advanced; each page is yielded
+    # as soon as it and every page before it are done. Only a small window of pages
+    # is in flight. A document with more than max_pages pages to OCR raises
+    # OcrLimitError before any page is rendered, and the iterator raises it once
+    # max_pixels is spent.
+    # Every page runs within deadline (a limits.Deadline), if given.
+    max_pages = OCR_MAX_PAGES if max_pages is None else max_pages
+    try:
+        last_page = max(page_numbers) if page_numbers else None
+        with bind(deadline):
+            page_count, page_sizes = pdf_page_sizes(file_path, last_page)
+    except Exception as e:
+        check_deadline(deadline)
+        if page_numbers is None:
+            raise
+        logger.debug("pdfinfo failed (%s); pages are charged after rendering.", e)
+        page_sizes = {}
+    if page_numbers is None:
+        page_numbers = range(1, page_count + 1)
+    page_numbers = list(page_numbers)
+    if max_pages and len(page_numbers) > max_pages:
+        incr("ocr_limit_exceeded", limit="pages")
+        raise OcrLimitError(f"{len(page_numbers)} pages need OCR, the limit is {max_pages} "
+                            f"(RESUME_OCR_MAX_PAGES).")
+    budget = OcrBudget(page_sizes, max_pixels)
+    log_tesseract_version()
+    workers = max(1, min(workers or OCR_WORKERS, len(page_numbers) or 1))
+
+    def ocr(n):
+        # Pool threads are charged to the OCR stage, whatever stage the caller is
+        # in between fetching pages.
+        with bind(deadline, "ocr"):
+            return ocr_page(file_path, n, budget=budget)
+
+    if workers == 1:
+        return (ocr(n) for n in page_numbers)
+    # Tesseract spawns its own OpenMP threads; with one page per worker that
+    # only oversubscribes the cores.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    def drain():
+        # The pool is started by the first next(), so an iterator dropped before
+        # it (or closed) never leaves threads behind.
+        pool = ThreadPoolExecutor(max_workers=workers)
+        pages = iter(page_numbers)
+        window = deque()
+        try:
+            window.extend(pool.submit(ocr, n) for n in islice(pages, workers * 2))
+            while window:
+                text = window.popleft().result()
+                n = next(pages, None)
+                if n is not None:
+                    window.append(pool.submit(ocr, n))
+                yield text
+        finally:
+            # Stopping early cancels the pages not started yet; the ones already
+            # running are waited for so the PDF can be removed afterwards (the
+            # deadline bounds that wait).
+            for future in window:
+                future.cancel()
+            pool.shutdown(wait=True)
+    return drain()
+
+
+def ocr_pdf_pages(file_path, page_numbers=None, workers=None, deadline=None):
+    return list(iter_ocr_pdf_pages(file_path, page_numbers, workers, deadline=deadline))
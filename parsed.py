@@ -1,150 +1,93 @@
+import logging
 import os
 import re
-import pytesseract
-from PIL import Image
-from pdf2image import convert_from_path
-from pyresparser import ResumeParser as PyResParser
-
-POPPLER_PATH = r"C:\poppler-24.08.0\poppler-24.08.0\Library\bin"
-TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
-
-def save_uploaded_file(uploaded_file, save_dir="temp_resumes"):
-    os.makedirs(save_dir, exist_ok=True)
-    file_path = os.path.join(save_dir, uploaded_file.name)
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    return file_path
+from io import BytesIO
+from backends import get_backend
+from docx_text import docx_text, read_docx
+from entities import contact_lines, extract_entities
+from limits import MAX_PDF_PAGES, Deadline, LimitExceeded, check_input_size, limit_result
+from nlp_model import get_nlp_model
+from ocr import iter_ocr_pdf_pages, local_pdf_path, ocr_pdf_pages
+from skills import get_default_matcher
+from sections import get_heading_matcher, segment_sections
+from tracing import incr, logger, span
+
+# Bump whenever a change alters the parsed output, so cached results are invalidated.
+PARSER_VERSION = "6"
+
+def load_source(source):
+    # Documents are passed around as a path or as bytes; file-like objects are
+    # read once so each extractor can open its own stream over the bytes.
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, bytes):
+        return source
+    return source.read()
+
+def open_source(source):
+    # PyPDF2 takes a path or a binary stream.
+    return BytesIO(source) if isinstance(source, bytes) else source
+
+def source_ext(source, ext=None):
+    if ext:
+        return ext.lower()
+    if isinstance(source, str):
+        return os.path.splitext(source)[1].lower()
+    return ""
+
+SUMMARY_CLEANUPS = [
+    (re.compile(r'Address:.*?(?=\\.|$)', re.I), ''),
+    (re.compile(r'[~=:;*><,\.]{2,}'), ' '),
+    (re.compile(r'\bSe CONTACT\b', re.I), ''),
+    (re.compile(r'=f Zi > i'), ''),
+    (re.compile(r'\d+\s*innovative software products\.'), 'innovative software products.'),
+    (re.compile(r'\s+'), ' '),
+]
 
 def clean_summary(summary):
-    summary = re.sub(r'Address:.*?(?=\\.|$)', '', summary, flags=re.I)
-    summary = re.sub(r'[~=:;*><,\.]{2,}', ' ', summary)
-    summary = re.sub(r'\bSe CONTACT\b', '', summary, flags=re.I)
-    summary = re.sub(r'=f Zi > i', '', summary)
-    summary = re.sub(r'\d+\s*innovative software products\.', 'innovative software products.', summary)
-    summary = re.sub(r'\s+', ' ', summary)
+    for pattern, replacement in SUMMARY_CLEANUPS:
+        summary = pattern.sub(replacement, summary)
     return summary.strip()
 
-def extract_email(text):
-    match = re.search(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.\w+", text)
-    return match.group(0) if match else ""
-
-def extract_name(text, docx_path=None):
-    match = re.search(r'(?i)name[:\s-]+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)+)', text)
-    if match:
-        return match.group(1).strip()
-    lines = text.splitlines()
-    for line in lines:
-        line = line.strip()
-        if line:
-            return line
+# The extract_* helpers each scan the text for one field; build_resume and the
+# streaming parser call entities.extract_entities once for all of them.
+
+def extract_email(text, entities=None):
+    emails = (entities or extract_entities(text))["emails"]
+    return emails[0] if emails else ""
+
+def extract_name(text, docx_path=None, entities=None):
+    name = (entities or extract_entities(text))["name"]
+    if name:
+        return name
 
     if docx_path:
         try:
-            from docx import Document
-            doc = Document(docx_path)
-            for section in doc.sections:
-                header = section.header
-                for para in header.paragraphs:
-                    header_line = para.text.strip()
-                    if header_line:
-                        return header_line
+            headers = read_docx(docx_path)["headers"]
+            if headers:
+                return headers[0]
         except Exception as e:
-            print("Error extracting header text:", e)
+            logger.warning("Error extracting header text: %s", e)
     return ""
 
 def extract_skills(text):
-    keywords = [
-        "JavaScript", "React", "Node", "Express", "MongoDB", "SQL", "HTML", "CSS", "AWS", "Redux", "PHP", "JSP",
-        "Bootstrap", "JQuery", "MySQL", "Python", "R", "Shiny", "TypeScript", "Django", "Flask", "Agile", "Scrum",
-        "Tensorflow", "Machine learning", "Opencv", "Api", "Sqlalchemy", "Tableau", "Github", "Modeling", "Analysis",
-        "Ai", "Data analysis", "Health", "System", "Ibm", "Startup", "Prototyping", "Certification", "Strategy"
-    ]
-    skills = set()
-    for kw in keywords:
-        if re.search(r'\b' + re.escape(kw) + r'\b', text, re.I):
-            skills.add(kw)
-    return sorted(skills)
-
-def extract_contact(text):
-    contact = []
-    phone = re.search(r"(\+91[-\s]?\d{10}|\b\d{10}\b)", text)
-    if phone:
-        contact.append(f"Phone: {phone.group(0)}")
-    addr = re.search(r"Address: (.+)", text)
-    if addr:
-        contact.append(addr.group(0))
-    linkedin = re.search(r"(https?://(www\.)?linkedin\.com/[^\s]+)", text)
-    if linkedin:
-        contact.append(f"LinkedIn: {linkedin.group(0)}")
-    return contact
-
-def parse_structured_resume(text, existing_json=None):
-    clean_text = re.sub(r"[^\x00-\x7F]+", " ", text)
-    lines = [line.strip("•¢©- ") for line in clean_text.splitlines() if line.strip()]
-
-    # Enhanced section names and their triggers with more variations
-    section_names = [
-        ("summary", ["summary", "objective", "profile", "about"]),
-        ("education", ["education", "academic", "academic details", "qualification", "degree"]),
-        ("certifications", ["certification", "certifications", "certificates", "certified"]),
-        ("projects", ["projects", "project", "portfolio", "achievements", "key achievements", "projects and certifications"]),
-        ("experience", ["experience", "work experience", "professional experience", "internship", "employment", "work history"]),
-        ("skills", ["skills", "technical skills", "competencies", "technologies"]),
-    ]
-    section_map = {}
-    current_section = None
-    buffer = []
-
-    for line in lines:
-        if '|' in line:
-            left, right = [part.strip() for part in line.split('|', 1)]
-            l_line = left.lower()
-            matched = False
-            for key, triggers in section_names:
-                if any(l_line.startswith(t) for t in triggers):
-                    if current_section and buffer:
-                        section_map[current_section] = buffer
-                    current_section = key
-                    buffer = [right]
-                    matched = True
-                    break
-            if matched:
-                continue 
-        l_line = line.lower().strip()
-        matched = False
-        
-        for key, triggers in section_names:
-            if any(l_line.startswith(t) for t in triggers):
-                if current_section and buffer:
-                    section_map[current_section] = buffer
-                current_section = key
-                buffer = []
-                matched = True
-                break
-          
-            elif any(f"{t}:" in l_line or f"{t} -" in l_line or f"{t}." in l_line for t in triggers):
-                if current_section and buffer:
-                    section_map[current_section] = buffer
-                current_section = key
-                buffer = []
-                matched = True
-                break
-            
-            elif any(t.upper() in line.upper() and len(line.strip()) < 20 for t in triggers):
-                if current_section and buffer:
-                    section_map[current_section] = buffer
-                current_section = key
-                buffer = []
-                matched = True
-                break
-        if not matched:
-            buffer.append(line)
-    if current_section and buffer:
-        section_map[current_section] = buffer
-
-  
-    exp_lines = section_map.get("experience", [])
+    return get_default_matcher().match(text)
+
+def extract_contact(text, entities=None):
+    return contact_lines(entities or extract_entities(text))
+
+NON_ASCII_RE = re.compile(r"[^\x00-\x7F]+")
+
+def clean_lines(text):
+    clean_text = NON_ASCII_RE.sub(" ", text)
+    return [line.strip("•¢©- ") for line in clean_text.splitlines() if line.strip()]
+
+def extract_address(text, entities=None):
+    return (entities or extract_entities(text))["address"]
+
+def parse_experience(exp_lines):
     experiences = []
     exp = {}
     job_title_pattern = re.compile(r"^(?P<title>.+?),\s*(?P<start>\d{2}/\d{4})\s*-\s*(?P<end>Current|\d{2}/\d{4})")
@@ -181,8 +124,10 @@ def parse_structured_resume(text, existing_json=None):
             i += 1
     if exp:
         experiences.append(exp)
+    return experiences
 
-    summary = clean_summary(" ".join(section_map.get("summary", [])))
+def parse_summary(summary_lines):
+    summary = clean_summary(" ".join(summary_lines))
 
     summary = re.split(r'contact', summary, flags=re.I)[0].strip()
 
@@ -201,9 +146,9 @@ def parse_structured_resume(text, existing_json=None):
             continue
         cleaned_lines.append(l)
     summary = "\n".join(cleaned_lines)
+    return summary
 
-
-    education_lines = section_map.get("education", [])
+def parse_education(education_lines):
     educations = []
     edu_entry = {}
     project_content = []
@@ -233,15 +178,16 @@ def parse_structured_resume(text, existing_json=None):
     
     if edu_entry:
         educations.append(edu_entry)
+    return educations, project_content, experience_content
 
-    certification_lines = section_map.get("certifications", [])
+def parse_certifications(certification_lines):
     certifications = []
     for line in certification_lines:
         if line:
             certifications.append(line)
+    return certifications
 
-
-    project_lines = section_map.get("projects", []) + project_content 
+def parse_projects(project_lines):
     projects = []
     project = {}
     
@@ -268,26 +214,38 @@ def parse_structured_resume(text, existing_json=None):
                     project["description"] = line
     if project:
         projects.append(project)
+    return projects
 
-    email = extract_email(text)
-    address = None
-    adr_match = re.search(r"Address: (.+)", text)
-    if adr_match:
-        address = adr_match.group(1).strip()
+def extract_entity_fields(text):
+    # The resume fields read from the whole text rather than from a section.
+    with span("parse.entities"):
+        entities = extract_entities(text)
+        email = extract_email(text, entities)
+        address = extract_address(text, entities)
 
-    skills = extract_skills(text)
-    name = extract_name(text, docx_path="path/to/resume.docx")
-    contact = extract_contact(text)
+        skills = extract_skills(text)
+        name = extract_name(text, entities=entities)
+        contact = extract_contact(text, entities)
+    return {"name": name or "", "address": address or "", "email": email or "",
+            "skills": skills if skills is not None else [], "contact": contact if contact is not None else []}
+
+def build_resume(section_map, text, existing_json=None):
+    # Turn segmented section lines plus the full text (for contact entities) into the resume dict.
+    with span("parse.sections"):
+        experiences = parse_experience(section_map.get("experience", []))
+        summary = parse_summary(section_map.get("summary", []))
+        educations, project_content, experience_content = parse_education(section_map.get("education", []))
+        certifications = parse_certifications(section_map.get("certifications", []))
+        projects = parse_projects(section_map.get("projects", []) + project_content)
 
     result = {}
     if existing_json:
         result.update(existing_json)
-    result["name"] = name or ""
+    fields = extract_entity_fields(text)
+    result["name"] = fields["name"]
     result["summary"] = summary or ""
-    result["address"] = address or ""
-    result["email"] = email or ""
-    result["skills"] = skills if skills is not None else []
-    result["contact"] = contact if contact is not None else []
+    for field in ("address", "email", "skills", "contact"):
+        result[field] = fields[field]
     result["education"] = educations if educations else []
     result["certifications"] = certifications if certifications else []
     result["projects"] = projects if projects else []
@@ -297,85 +255,244 @@ def parse_structured_resume(text, existing_json=None):
             result[field] = []
     return result
 
+def parse_structured_resume(text, existing_json=None, heading_matcher=None):
+    with span("parse.segmentation"):
+        lines = clean_lines(text)
+        section_map = segment_sections(lines, heading_matcher or get_heading_matcher())
+    return build_resume(section_map, text, existing_json)
+
 def extract_text_from_docx(docx_path):
-    from docx import Document
-    doc = Document(docx_path)
-    text = []
-    for para in doc.paragraphs:
-        text.append(para.text)
-    return "\n".join(text)
+    # Header lines, then body paragraphs and table cells in reading order (docx_text.py).
+    with span("extract.docx"):
+        return docx_text(docx_path)
+
+
+MIN_PAGE_TEXT_CHARS = 50
+MIN_PAGE_TEXT_ALNUM_RATIO = 0.5
+
+def page_has_text_layer(page_text):
+    # A page is kept as-is when PyPDF2 found enough mostly-alphanumeric text;
+    # scanned pages come back empty or as a few stray glyphs.
+    chars = "".join(page_text.split())
+    if len(chars) < MIN_PAGE_TEXT_CHARS:
+        return False
+    return sum(c.isalnum() for c in chars) / len(chars) >= MIN_PAGE_TEXT_ALNUM_RATIO
+
+def extract_pdf_page_texts(file_path, deadline=None):
+    # PyPDF2 runs in-process, so the deadline is checked between pages.
+    PdfReader = get_backend("PyPDF2").PdfReader
+    with span("extract.pdf_text"):
+        reader = PdfReader(open_source(file_path))
+        if MAX_PDF_PAGES and len(reader.pages) > MAX_PDF_PAGES:
+            raise LimitExceeded(f"The PDF has {len(reader.pages)} pages, the limit is {MAX_PDF_PAGES} "
+                                f"(RESUME_MAX_PDF_PAGES).", "pdf_text")
+        page_texts = []
+        for page in reader.pages:
+            if deadline is not None:
+                deadline.check()
+            page_texts.append(page.extract_text() or "")
+        return page_texts
+
+def pages_needing_ocr(page_texts):
+    return [i + 1 for i, page_text in enumerate(page_texts) if not page_has_text_layer(page_text)]
+
+def read_text_file(source):
+    if isinstance(source, bytes):
+        return source.decode("utf-8", errors="ignore")
+    with open(source, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+def next_ocr_page(ocr_texts, deadline):
+    # The next OCR'd page (None when done), fetched within the "ocr" stage; what
+    # the consumer does between pages is not charged to it.
+    with deadline.stage("ocr"):
+        return next(ocr_texts, None)
+
+def iter_page_texts(file_path, ext=None, deadline=None, page_texts=None):
+    # Yield the resume's text page by page, in order, as soon as each page is available:
+    # text-layer pages immediately, OCR'd pages as the OCR pool finishes them.
+    # file_path may also be the document's bytes, in which case ext names its type.
+    # Extraction runs within deadline (a fresh limits.Deadline by default).
+    # page_texts is a PDF's text layer when the caller already extracted it.
+    file_path = load_source(file_path)
+    ext = source_ext(file_path, ext)
+    deadline = deadline or Deadline()
+    if ext == ".docx":
+        with deadline.stage("docx"):
+            text = extract_text_from_docx(file_path)
+        yield text
+        return
+    if ext == ".txt":
+        yield read_text_file(file_path)
+        return
+    try:
+        if page_texts is None:
+            with deadline.stage("pdf_text"):
+                page_texts = extract_pdf_page_texts(file_path, deadline)
+    except LimitExceeded:
+        raise
+    except Exception as e:
+        logger.warning("Direct PDF text extraction failed: %s", e)
+        with local_pdf_path(file_path) as pdf_path:
+            with deadline.stage("ocr"):
+                ocr_texts = iter_ocr_pdf_pages(pdf_path, deadline=deadline)
+            try:
+                for ocr_text in iter(lambda: next_ocr_page(ocr_texts, deadline), None):
+                    incr("pages", source="ocr")
+                    yield ocr_text
+            finally:
+                ocr_texts.close()
+        return
+    ocr_pages = pages_needing_ocr(page_texts)
+    incr("pages", len(page_texts) - len(ocr_pages), source="text_layer")
+    incr("pages", len(ocr_pages), source="ocr")
+    if not ocr_pages:
+        yield from page_texts
+        return
+    with local_pdf_path(file_path) as pdf_path:
+        with deadline.stage("ocr"):
+            ocr_texts = iter_ocr_pdf_pages(pdf_path, ocr_pages, deadline=deadline)
+        ocr_set = set(ocr_pages)
+        try:
+            for page_number, page_text in enumerate(page_texts, 1):
+                yield next_ocr_page(ocr_texts, deadline) if page_number in ocr_set else page_text
+        finally:
+            ocr_texts.close()
+
+def parse_with_pyresparser(file_path, ext=None, text=None):
+    # pyresparser's NLP extraction with its models kept resident (nlp_model.py),
+    # run on the text already extracted; the file is only read again, with
+    # pyresparser's own extractors (docx2txt also sees tables), when that text is
+    # too short to be worth it.
+    try:
+        logger.info("Trying PyResParser as last resort...")
+        ext = source_ext(file_path, ext) or ".pdf"
+        model = get_nlp_model()
+        with span("extract.pyresparser"):
+            if not text or len(text.strip()) < MIN_PAGE_TEXT_CHARS:
+                text = read_text_file(file_path) if ext == ".txt" else model.extract_text(file_path, ext)
+            data = model.extract(text, model.count_pages(file_path, ext))
+        if data:
+            for field in ["experience", "education", "projects", "skills", "contact", "certifications"]:
+                if data.get(field) is None:
+                    data[field] = []
+            return data
+    except Exception as e:
+        logger.warning("PyResParser failed: %s", e)
+    return None
+
+
+def parse_resume(file_path, ext=None, deadline=None, page_texts=None):
+    # file_path is a path, or the document's bytes / a binary file object with ext
+    # (".pdf", ".docx", ".txt") naming its type; bytes are only spilled to a temp
+    # file for poppler when pages need OCR. Every stage runs within deadline (a
+    # fresh limits.Deadline by default); a document over a limit gives
+    # {"error": "Timed out at stage ocr ...", "stage": "ocr"} rather than a slower fallback.
+    # page_texts is a PDF's text layer when the caller already extracted it.
+    file_path = load_source(file_path)
+    deadline = deadline or Deadline()
+    try:
+        return parse_resume_within(file_path, source_ext(file_path, ext), deadline, page_texts)
+    except LimitExceeded as e:
+        logger.warning("Conversion stopped: %s", e)
+        incr("documents", path="limited")
+        return limit_result(e)
 
 
-def parse_resume(file_path):
-    import os
-    ext = os.path.splitext(file_path)[1].lower()
+def parse_resume_within(file_path, ext, deadline, page_texts=None):
+    check_input_size(file_path)
+    text = ""
+    if ext == ".txt":
+        # Plain text goes straight to the structured parser; there is nothing to extract.
+        with deadline.stage("parse"):
+            parsed = parse_structured_resume(read_text_file(file_path))
+        for field in ["experience", "education", "projects", "skills", "contact", "certifications"]:
+            if parsed.get(field) is None:
+                parsed[field] = []
+        incr("documents", path="txt")
+        return parsed
     if ext == ".docx":
-        text = extract_text_from_docx(file_path)
+        with deadline.stage("docx"):
+            text = extract_text_from_docx(file_path)
         if text and len(text.strip()) > 20:
-            parsed = parse_structured_resume(text)
+            with deadline.stage("parse"):
+                parsed = parse_structured_resume(text)
             for field in ["experience", "education", "projects", "skills", "contact", "certifications"]:
                 if parsed.get(field) is None:
                     parsed[field] = []
+            incr("documents", path="docx")
             return parsed
-    print("Tesseract version:", pytesseract.get_tesseract_version())
-    text = ""
-    # 1. Try direct PDF text extraction
-    try:
-        from PyPDF2 import PdfReader
-        print("📄 Trying direct PDF text extraction with PyPDF2...")
-        reader = PdfReader(file_path)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        if text and len(text.strip()) > 100:  # Heuristic: enough text
-            print("✅ Extracted text from PDF directly.")
-            parsed = parse_structured_resume(text)
+    if page_texts is not None:
+        # Extracted by the caller; copied, since OCR'd pages are filled in below.
+        page_texts = list(page_texts)
+    else:
+        # 1. Try direct PDF text extraction, page by page
+        try:
+            logger.info("Trying direct PDF text extraction with PyPDF2...")
+            with deadline.stage("pdf_text"):
+                page_texts = extract_pdf_page_texts(file_path, deadline)
+        except LimitExceeded:
+            raise
+        except Exception as e:
+            logger.warning("Direct PDF text extraction failed: %s", e)
+
+    # 2. OCR only the pages without a usable text layer (every page if PyPDF2 failed)
+    if page_texts is None:
+        ocr_pages = None
+        path = "pdf_ocr"
+    else:
+        ocr_pages = pages_needing_ocr(page_texts)
+        if not ocr_pages:
+            logger.info("Extracted text from PDF directly.")
+            path = "pdf_text"
+        elif len(ocr_pages) < len(page_texts):
+            logger.info("%d of %d pages have little or no text, trying OCR fallback.", len(ocr_pages), len(page_texts))
+            path = "pdf_mixed"
+        else:
+            logger.info("Direct PDF text extraction yielded little or no text, trying OCR fallback.")
+            path = "pdf_ocr"
+        incr("pages", len(page_texts) - len(ocr_pages), source="text_layer")
+    ocr_ok = True
+    if ocr_pages is None or ocr_pages:
+        logger.info("Running OCR fallback...")
+        try:
+            with deadline.stage("ocr"), local_pdf_path(file_path) as pdf_path:
+                ocr_texts = ocr_pdf_pages(pdf_path, ocr_pages, deadline=deadline)
+            incr("pages", len(ocr_texts), source="ocr")
+            if logger.isEnabledFor(logging.DEBUG):
+                for page_number, ocr_text in zip(ocr_pages or range(1, len(ocr_texts) + 1), ocr_texts):
+                    logger.debug("OCR text of page %d:\n%s", page_number, ocr_text)
+            if page_texts is None:
+                page_texts = ocr_texts
+            else:
+                for page_number, ocr_text in zip(ocr_pages, ocr_texts):
+                    page_texts[page_number - 1] = ocr_text
+        except LimitExceeded:
+            raise
+        except Exception as e:
+            ocr_ok = False
+            incr("ocr_failures")
+            logger.warning("OCR fallback failed: %s", e)
+
+    if page_texts is not None:
+        text = "\n".join(page_texts)
+        # Keep whatever the text layer gave us if OCR of the remaining pages failed
+        if ocr_ok or len(text.strip()) > 100:
+            with deadline.stage("parse"):
+                parsed = parse_structured_resume(text)
             for field in ["experience", "education", "projects", "skills", "contact", "certifications"]:
                 if parsed.get(field) is None:
                     parsed[field] = []
+            incr("documents", path=path if ocr_ok else "pdf_text_partial")
             return parsed
-        else:
-            print("⚠️ Direct PDF text extraction yielded little or no text, trying OCR fallback.")
-    except Exception as e:
-        print("⚠️ Direct PDF text extraction failed:", e)
-    
-    # 2. OCR fallback
-    print("🧠 Running OCR fallback...")
-    try:
-        images = convert_from_path(file_path, poppler_path=POPPLER_PATH, dpi=300)
-        # Save the first page image for debugging
-        if images:
-            images[0].save("first_page.png")
-        text = ""
-        for img in images:
-            img = img.convert('L')  # Grayscale for better OCR
-            ocr_text = pytesseract.image_to_string(img, config='--psm 3')
-            print("FULL OCR TEXT:\n", ocr_text)
-            # Try to extract the name
-            for line in ocr_text.splitlines():
-                words = line.split()
-                if len(words) >= 2 and sum(w[0].isupper() for w in words if w and w[0].isalpha()) >= 2:
-                    print("Likely name:", line)
-                    break
-            text += ocr_text
-        parsed = parse_structured_resume(text)
-        for field in ["experience", "education", "projects", "skills", "contact", "certifications"]:
-            if parsed.get(field) is None:
-                parsed[field] = []
-        return parsed
-    except Exception as e:
-        print(" OCR fallback failed:", e)
     
     # 3. Last resort: PyResParser
-    try:
-        print("Trying PyResParser as last resort...")
-        data = PyResParser(file_path).get_extracted_data()
-        if data:
-            for field in ["experience", "education", "projects", "skills", "contact", "certifications"]:
-                if data.get(field) is None:
-                    data[field] = []
-            return data
-    except Exception as e:
-        print(" PyResParser failed:", e)
+    with deadline.stage("pyresparser"):
+        data = parse_with_pyresparser(file_path, ext, text)
+    if data:
+        incr("documents", path="pyresparser")
+        return data
+    incr("documents", path="failed")
     return {"error": "All extraction methods failed."}
 
 if __name__ == "__main__":
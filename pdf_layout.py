@@ -0,0 +1,165 @@
+import os
+import threading
+
+from backends import get_backend
+from layout import split_bold_intro, write_resume
+from tracing import span
+
+# The Nehish layout drawn straight into a PDF from the parsed resume dict, one
+# pass, no DOCX in between. Sizes mirror layout.py (section bar 0.3" / 2.5" /
+# rest, 20pt name, 8pt spaced section titles); units are millimetres.
+
+PAGE_FORMAT = "Letter"
+MARGIN = 18
+LINE_HEIGHT = 5
+PARAGRAPH_SPACING = 1.5
+BODY_SIZE = 10
+NAME_SIZE = 20
+HEADER_SIZE = 8
+HEADER_HEIGHT = 0.18 * 25.4
+HEADER_WIDTHS = (0.3 * 25.4, 2.5 * 25.4)
+DARK_BLUE = (32, 68, 106)
+LIGHT_GRAY = (221, 221, 221)
+# Indent and bullet glyph per paragraph style used by write_resume.
+LIST_STYLES = {
+    None: (0, None),
+    "List Bullet": (0.25 * 25.4, "•"),
+    "List Bullet 2": (0.5 * 25.4, "o"),
+}
+BULLET_WIDTH = 4
+
+# A TrueType font (regular, optionally bold) for text outside Windows-1252; the
+# built-in Helvetica otherwise.
+PDF_FONT = os.environ.get("RESUME_PDF_FONT", "")
+PDF_BOLD_FONT = os.environ.get("RESUME_PDF_BOLD_FONT", "")
+
+
+class PdfWriter:
+    # Writer for write_resume() (see layout.DocxWriter) that draws onto an FPDF document.
+
+    def __init__(self, renderer, pdf):
+        self.r = renderer
+        self.pdf = pdf
+
+    def _font(self, bold=False, size=BODY_SIZE):
+        self.pdf.set_font(self.r.family, "B" if bold else "", size)
+
+    def _flow(self, runs, style=None):
+        pdf = self.pdf
+        indent, bullet = LIST_STYLES.get(style, LIST_STYLES[None])
+        left = pdf.l_margin
+        self._font()
+        if bullet:
+            pdf.set_x(left + indent - BULLET_WIDTH)
+            pdf.cell(BULLET_WIDTH, LINE_HEIGHT, self.r.text(bullet))
+        # Wrapped lines line up under the first one, not under the bullet.
+        pdf.set_left_margin(left + indent)
+        pdf.set_x(left + indent)
+        for text, bold in runs:
+            self._font(bold)
+            pdf.write(LINE_HEIGHT, self.r.text(text))
+        pdf.set_left_margin(left)
+        pdf.ln(LINE_HEIGHT + PARAGRAPH_SPACING)
+
+    def name(self, text):
+        self._font(True, NAME_SIZE)
+        self.pdf.multi_cell(0, NAME_SIZE * 0.45, self.r.text(text))
+
+    def header(self, title):
+        pdf = self.pdf
+        if pdf.get_y() + HEADER_HEIGHT > pdf.page_break_trigger:
+            pdf.add_page()
+        rest = pdf.w - pdf.l_margin - pdf.r_margin - sum(HEADER_WIDTHS)
+        self._font(True, HEADER_SIZE)
+        pdf.set_fill_color(*DARK_BLUE)
+        pdf.cell(HEADER_WIDTHS[0], HEADER_HEIGHT, "", fill=1)
+        pdf.set_fill_color(*LIGHT_GRAY)
+        pdf.cell(HEADER_WIDTHS[1], HEADER_HEIGHT, self.r.text(' '.join(list(title.upper()))), fill=1)
+        pdf.set_fill_color(*DARK_BLUE)
+        pdf.cell(rest, HEADER_HEIGHT, "", fill=1, ln=1)
+        pdf.ln(PARAGRAPH_SPACING)
+
+    def paragraph(self, text="", style=None):
+        if not text:
+            self.pdf.ln(LINE_HEIGHT)
+            return
+        self._flow([(text, False)], style)
+
+    def runs(self, runs):
+        self._flow(runs)
+
+    def bullet_with_bold_intro(self, text):
+        intro, rest = split_bold_intro(text)
+        runs = [(intro.strip(), True)]
+        if rest:
+            runs.append((' ' + rest.strip(), False))
+        self._flow(runs, "List Bullet")
+
+
+class NehishPdfRenderer:
+    # Font metrics are loaded once (TrueType parsing is the expensive part of an
+    # FPDF document) and their tables shared by every document this renderer makes.
+
+    def __init__(self, font_path=PDF_FONT, bold_font_path=PDF_BOLD_FONT):
+        self._FPDF = get_backend("fpdf").FPDF
+        self.unicode = bool(font_path)
+        proto = self._FPDF(format=PAGE_FORMAT)
+        if self.unicode:
+            self.family = "resume"
+            proto.add_font(self.family, "", font_path, uni=True)
+            proto.add_font(self.family, "B", bold_font_path or font_path, uni=True)
+        else:
+            self.family = "helvetica"
+        proto.set_font(self.family, "", BODY_SIZE)
+        proto.set_font(self.family, "B", BODY_SIZE)
+        self._fonts = proto.fonts
+        self._font_files = proto.font_files
+
+    def text(self, text):
+        # The core fonts are WinAnsi-encoded: bullets, dashes and curly quotes survive,
+        # anything else becomes "?".
+        if self.unicode:
+            return text
+        return text.encode("cp1252", errors="replace").decode("latin-1")
+
+    def new_document(self):
+        pdf = self._FPDF(format=PAGE_FORMAT)
+        for key, font in self._fonts.items():
+            # Only the glyph subset is per document; metrics are shared.
+            pdf.fonts[key] = dict(font, subset=list(font["subset"])) if "subset" in font else font
+        pdf.font_files.update(self._font_files)
+        pdf.set_margins(MARGIN, MARGIN)
+        pdf.set_auto_page_break(True, MARGIN)
+        pdf.add_page()
+        return pdf
+
+    def render(self, resume_data):
+        pdf = self.new_document()
+        write_resume(resume_data, PdfWriter(self, pdf))
+        return pdf.output(dest='S').encode('latin-1')
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_pdf_renderer():
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = NehishPdfRenderer()
+    return _renderer
+
+
+def render_pdf(resume_data):
+    # Nehish-formatted PDF as bytes, rendered entirely in memory.
+    with span("render.pdf"):
+        return get_pdf_renderer().render(resume_data)
+
+
+def generate_pdf(resume_data, output_path="formatted_resume.pdf"):
+    data = render_pdf(resume_data)
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return output_path
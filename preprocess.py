@@ -0,0 +1,149 @@
+import os
+
+from backends import get_backend
+from tracing import debug_artifact_path, incr, span
+
+# Page cleanup between rendering and Tesseract, on whole arrays (NumPy) and
+# PIL's C filters, never per pixel in Python:
+#   deskew     straighten pages scanned or photographed up to DESKEW_MAX_ANGLE off
+#   crop       drop blank margins (and solid scanner borders) around the text
+#   downscale  resample to RESUME_OCR_PREPROCESS_DPI when rendered above it
+#   binarize   adaptive (local mean) threshold, removing shading and background noise
+# RESUME_OCR_PREPROCESS lists the steps to run; empty disables. The skew is measured
+# first but the page is rotated last: a binarized page can be rotated with nearest
+# resampling, ten times cheaper than bilinear on grey levels, and crop has less to rotate.
+PREPROCESS_STEPS = ("deskew", "crop", "downscale", "binarize")
+OCR_PREPROCESS = tuple(step.strip() for step in os.environ.get("RESUME_OCR_PREPROCESS", "deskew,crop,binarize").split(",")
+                       if step.strip())
+OCR_PREPROCESS_DPI = int(os.environ.get("RESUME_OCR_PREPROCESS_DPI", 0))
+
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.2
+DESKEW_MIN_ANGLE = 0.3
+ANALYSIS_DPI = 100  # skew and content box are measured on a subsampled page
+DESKEW_MAX_POINTS = 30_000
+CROP_PAD_INCHES = 0.1
+CROP_SOLID_FRACTION = 0.9  # rows/columns darker than this are scanner borders, not text
+BINARIZE_WINDOW_INCHES = 0.125
+BINARIZE_OFFSET_PERCENT = 15  # ink is this much darker than its surroundings
+
+
+def analysis_step(dpi):
+    return max(1, round(dpi / ANALYSIS_DPI))
+
+
+def otsu_threshold(a):
+    # Grey level separating ink from paper, from the histogram (Otsu's method).
+    np = get_backend("numpy")
+    hist = np.bincount(a.ravel(), minlength=256).astype(np.float64)
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * np.arange(256))
+    total = weight[-1]
+    between = (mass[-1] * weight - total * mass) ** 2 / np.maximum(weight * (total - weight), 1)
+    return int(np.argmax(between))
+
+
+def estimate_skew(a, dpi):
+    # How far (degrees, counter-clockwise) the text is rotated: the angle whose
+    # projection of the ink is sharpest, text lines falling into the fewest, fullest rows.
+    np = get_backend("numpy")
+    small = a[::analysis_step(dpi), ::analysis_step(dpi)]
+    ys, xs = np.nonzero(small <= otsu_threshold(small))
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > DESKEW_MAX_POINTS:
+        keep = slice(None, None, len(ys) // DESKEW_MAX_POINTS + 1)
+        ys, xs = ys[keep], xs[keep]
+    best_angle, best_score = 0.0, -1
+    for angle in np.arange(-DESKEW_MAX_ANGLE, DESKEW_MAX_ANGLE + DESKEW_STEP / 2, DESKEW_STEP):
+        rows = np.rint(ys + xs * np.tan(np.radians(angle))).astype(np.int64)
+        score = np.square(np.bincount(rows - rows.min())).sum()
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return round(best_angle, 2)
+
+
+def content_box(a, dpi):
+    # (left, top, right, bottom) of the inked area plus a small pad, or None for a blank page.
+    # Found on the subsampled page; the pad is wider than the subsampling step.
+    np = get_backend("numpy")
+    step = analysis_step(dpi)
+    full_height, full_width = a.shape
+    a = a[::step, ::step]
+    ink = a <= otsu_threshold(a)
+    height, width = a.shape
+    row_ink = ink.sum(axis=1)
+    col_ink = ink.sum(axis=0)
+    rows = np.flatnonzero((row_ink > max(2, width // 500)) & (row_ink < width * CROP_SOLID_FRACTION))
+    cols = np.flatnonzero((col_ink > max(2, height // 500)) & (col_ink < height * CROP_SOLID_FRACTION))
+    if not len(rows) or not len(cols):
+        return None
+    pad = int(CROP_PAD_INCHES * dpi)
+    return (max(0, int(cols[0]) * step - pad), max(0, int(rows[0]) * step - pad),
+            min(full_width, (int(cols[-1]) + 1) * step + pad), min(full_height, (int(rows[-1]) + 1) * step + pad))
+
+
+def binarize(img, dpi):
+    # Local mean from PIL's box reduce + blur + bilinear upscale, lowered by the offset
+    # through a lookup table (all C), then one uint8 comparison in NumPy.
+    np = get_backend("numpy")
+    Image = get_backend("PIL.Image")
+    ImageFilter = get_backend("PIL.ImageFilter")
+    factor = max(1, int(dpi * BINARIZE_WINDOW_INCHES) // 4)
+    small = img.reduce(factor)
+    local = small.filter(ImageFilter.BoxBlur(2)).resize(img.size, Image.BILINEAR)
+    small.close()
+    threshold = local.point([level * (100 - BINARIZE_OFFSET_PERCENT) // 100 for level in range(256)])
+    local.close()
+    paper = np.asarray(img) >= np.asarray(threshold)
+    threshold.close()
+    return Image.fromarray(paper.view(np.uint8) * np.uint8(255), mode="L")
+
+
+def preprocess_page(img, dpi, page_number=None, steps=None):
+    # Returns the cleaned grayscale page; img is closed when it has been replaced.
+    steps = OCR_PREPROCESS if steps is None else steps
+    if not steps:
+        return img
+    np = get_backend("numpy")
+    Image = get_backend("PIL.Image")
+
+    def replace(new):
+        if new is not img:
+            img.close()
+        return new
+
+    with span("ocr.preprocess", page=page_number, dpi=dpi):
+        if img.mode != "L":
+            img = replace(img.convert("L"))
+        angle = estimate_skew(np.asarray(img), dpi) if "deskew" in steps else 0.0
+
+        def crop():
+            box = content_box(np.asarray(img), dpi)
+            if box and box != (0, 0) + img.size:
+                pixels = img.width * img.height
+                cropped = replace(img.crop(box))
+                incr("ocr_cropped_pixels", pixels - cropped.width * cropped.height)
+                return cropped
+            return img
+
+        if "crop" in steps:
+            img = crop()
+        if "downscale" in steps and OCR_PREPROCESS_DPI and dpi > OCR_PREPROCESS_DPI:
+            scale = OCR_PREPROCESS_DPI / dpi
+            img = replace(img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                                     Image.LANCZOS))
+            dpi = OCR_PREPROCESS_DPI
+        if "binarize" in steps:
+            img = replace(binarize(img, dpi))
+        if abs(angle) >= DESKEW_MIN_ANGLE:
+            resample = Image.NEAREST if "binarize" in steps else Image.BILINEAR
+            img = replace(img.rotate(-angle, resample=resample, expand=True, fillcolor=255))
+            incr("ocr_deskewed")
+            if "crop" in steps:
+                # The corners rotate out of the box; trim the margin expand=True added.
+                img = crop()
+    debug_path = debug_artifact_path(f"page_{page_number}_preprocessed.png") if page_number else None
+    if debug_path:
+        img.save(debug_path)
+    return img
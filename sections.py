@@ -0,0 +1,115 @@
+import re
+
+# Section keys and the heading words that open them, in priority order:
+# a line matching triggers of several sections goes to the first one listed.
+SECTION_HEADINGS = [
+    ("summary", ["summary", "objective", "profile", "about"]),
+    ("education", ["education", "academic", "academic details", "qualification", "degree"]),
+    ("certifications", ["certification", "certifications", "certificates", "certified"]),
+    ("projects", ["projects", "project", "portfolio", "achievements", "key achievements", "projects and certifications"]),
+    ("experience", ["experience", "work experience", "professional experience", "internship", "employment", "work history"]),
+    ("skills", ["skills", "technical skills", "competencies", "technologies"]),
+]
+
+# Lines shorter than this count as a heading when they merely contain a trigger.
+SHORT_HEADING_CHARS = 20
+
+
+def _alternation(triggers):
+    return "|".join(re.escape(t.lower()) for t in sorted(triggers, key=len, reverse=True))
+
+
+class HeadingMatcher:
+    # Compiles a heading vocabulary into three patterns, each matched once per line.
+    # Every pattern is an ordered alternation with one empty named group per
+    # section, so the first section (in vocabulary order) that matches wins.
+    # A line opens a section when, lower-cased, it
+    #   - starts with a trigger,
+    #   - contains a trigger followed by ":", " -" or ".", or
+    #   - is shorter than SHORT_HEADING_CHARS and contains a trigger anywhere.
+
+    def __init__(self, headings=SECTION_HEADINGS):
+        self.headings = [(key, list(triggers)) for key, triggers in headings]
+        self._keys = [key for key, _ in self.headings]
+        alts = [_alternation(triggers) for _, triggers in self.headings]
+        self._prefix = re.compile("|".join(f"(?:{a})(?P<k{i}>)" for i, a in enumerate(alts)))
+        self._long = re.compile("|".join(
+            f"(?=(?:{a})|.*?(?:{a})(?::| -|\\.))(?P<k{i}>)" for i, a in enumerate(alts)))
+        self._short = re.compile("|".join(f"(?=.*?(?:{a}))(?P<k{i}>)" for i, a in enumerate(alts)))
+
+    def _key(self, m):
+        return self._keys[int(m.lastgroup[1:])] if m else None
+
+    def match_prefix(self, text):
+        # Section whose trigger starts text (case-insensitive), or None.
+        return self._key(self._prefix.match(text.lower()))
+
+    def classify(self, line):
+        # Section the heading line opens, or None for an ordinary content line.
+        stripped = line.strip()
+        pattern = self._short if len(stripped) < SHORT_HEADING_CHARS else self._long
+        return self._key(pattern.match(stripped.lower()))
+
+
+class SectionSegmenter:
+    # Groups content lines under the most recent heading, one line at a time.
+    # "Heading | content" lines open the section and keep the right-hand side as
+    # its first line. A section seen twice keeps only its last occurrence.
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.section_map = {}
+        self.current_section = None
+        self.buffer = []
+        self.headings = 0  # heading lines seen
+
+    def feed(self, line):
+        # Returns the key of the section this line closed, if any.
+        key = None
+        first = None
+        if '|' in line:
+            left, right = [part.strip() for part in line.split('|', 1)]
+            key = self.matcher.match_prefix(left)
+            if key:
+                first = [right]
+        if key is None:
+            key = self.matcher.classify(line)
+            first = []
+        if key is None:
+            self.buffer.append(line)
+            return None
+        closed = self._flush()
+        self.current_section = key
+        self.buffer = first
+        self.headings += 1
+        return closed
+
+    def close(self):
+        closed = self._flush()
+        self.current_section = None
+        self.buffer = []
+        return closed
+
+    def _flush(self):
+        if self.current_section and self.buffer:
+            self.section_map[self.current_section] = self.buffer
+            return self.current_section
+        return None
+
+
+def segment_sections(lines, matcher):
+    segmenter = SectionSegmenter(matcher)
+    for line in lines:
+        segmenter.feed(line)
+    segmenter.close()
+    return segmenter.section_map
+
+
+_default_matcher = None
+
+
+def get_heading_matcher():
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = HeadingMatcher()
+    return _default_matcher
@@ -0,0 +1,142 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+
+DEFAULT_SKILLS = [
+    "JavaScript", "React", "Node", "Express", "MongoDB", "SQL", "HTML", "CSS", "AWS", "Redux", "PHP", "JSP",
+    "Bootstrap", "JQuery", "MySQL", "Python", "R", "Shiny", "TypeScript", "Django", "Flask", "Agile", "Scrum",
+    "Tensorflow", "Machine learning", "Opencv", "Api", "Sqlalchemy", "Tableau", "Github", "Modeling", "Analysis",
+    "Ai", "Data analysis", "Health", "System", "Ibm", "Startup", "Prototyping", "Certification", "Strategy"
+]
+
+# Words are runs of \w; every other non-space character is a token of its own,
+# so "C++", "Node.js" and "CI/CD" can be matched token by token.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_END = ""  # never produced by the tokenizer, so it can't collide with a trie edge
+
+
+def _tokens(text):
+    # Yield trie keys: the first token as-is, later ones prefixed with a space
+    # when whitespace separated them from the previous token.
+    keys = []
+    last_end = None
+    for m in _TOKEN_RE.finditer(text.lower()):
+        tok = m.group(0)
+        keys.append((tok, " " + tok if last_end is not None and m.start() > last_end else tok))
+        last_end = m.end()
+    return keys
+
+
+class SkillMatcher:
+    # Token trie over every skill name and alias. match() walks the text once,
+    # starting a trie descent at each token, so cost grows with text length and
+    # the longest alias rather than with the size of the taxonomy.
+
+    def __init__(self, taxonomy):
+        self._trie = {}
+        self.size = 0
+        for canonical, aliases in taxonomy.items():
+            self.size += 1
+            for alias in [canonical] + list(aliases or []):
+                self.add(alias, canonical)
+
+    def add(self, alias, canonical):
+        keys = _tokens(alias)
+        if not keys:
+            return
+        node = self._trie.setdefault(keys[0][0], {})
+        for _, key in keys[1:]:
+            node = node.setdefault(key, {})
+        node.setdefault(_END, set()).add(canonical)
+
+    def find(self, text):
+        # Yield (token_index, canonical) for every alias occurrence, overlaps included.
+        keys = _tokens(text)
+        trie = self._trie
+        for i in range(len(keys)):
+            node = trie.get(keys[i][0])
+            j = i + 1
+            while node is not None:
+                if _END in node:
+                    for canonical in node[_END]:
+                        yield i, canonical
+                if j >= len(keys):
+                    break
+                node = node.get(keys[j][1])
+                j += 1
+
+    def match(self, text):
+        return sorted({canonical for _, canonical in self.find(text)})
+
+
+def load_taxonomy(path):
+    # JSON: {"Kubernetes": ["k8s", "kube"], ...} or [{"name": ..., "aliases": [...]}, ...] or ["Python", ...]
+    # CSV/TSV: canonical name in the first column, aliases in the remaining columns.
+    ext = os.path.splitext(path)[1].lower()
+    taxonomy = {}
+    if ext == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            items = data.items()
+        else:
+            items = [(e, []) if isinstance(e, str) else (e["name"], e.get("aliases", [])) for e in data]
+        for canonical, aliases in items:
+            taxonomy.setdefault(canonical, []).extend(aliases or [])
+    else:
+        delimiter = "\t" if ext == ".tsv" else ","
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f, delimiter=delimiter):
+                row = [cell.strip() for cell in row if cell.strip()]
+                if row and not row[0].startswith("#"):
+                    taxonomy.setdefault(row[0], []).extend(row[1:])
+    return taxonomy
+
+
+_default_matcher = None
+_default_matcher_fingerprint = None  # taxonomy_fingerprint() it was built from; None once set_default_matcher() pinned one
+_default_matcher_lock = threading.Lock()
+_taxonomy_hashes = {}
+
+
+def taxonomy_fingerprint():
+    # Names the skill list in use (RESUME_SKILL_TAXONOMY's path, mtime and content
+    # hash) for cache keys, so an edited taxonomy doesn't keep serving old matches.
+    path = os.environ.get("RESUME_SKILL_TAXONOMY")
+    if not path:
+        return "builtin"
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return f"{path}:missing"
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _taxonomy_hashes:
+        with open(path, "rb") as f:
+            _taxonomy_hashes[key] = hashlib.sha256(f.read()).hexdigest()
+    return f"{path}:{st.st_mtime_ns}:{_taxonomy_hashes[key]}"
+
+
+def get_default_matcher():
+    # RESUME_SKILL_TAXONOMY points at a taxonomy file to use instead of DEFAULT_SKILLS.
+    # Built once per process and again when the file changes, so matches always come
+    # from the taxonomy the cache keys (cache.config_fingerprint) name.
+    global _default_matcher, _default_matcher_fingerprint
+    with _default_matcher_lock:
+        if _default_matcher is not None and _default_matcher_fingerprint is None:
+            return _default_matcher
+        fingerprint = taxonomy_fingerprint()
+        if _default_matcher is None or fingerprint != _default_matcher_fingerprint:
+            path = os.environ.get("RESUME_SKILL_TAXONOMY")
+            taxonomy = load_taxonomy(path) if path else {skill: [] for skill in DEFAULT_SKILLS}
+            _default_matcher, _default_matcher_fingerprint = SkillMatcher(taxonomy), fingerprint
+        return _default_matcher
+
+
+def set_default_matcher(matcher):
+    global _default_matcher, _default_matcher_fingerprint
+    with _default_matcher_lock:
+        _default_matcher, _default_matcher_fingerprint = matcher, None
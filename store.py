@@ -0,0 +1,371 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from cache import content_hash
+from tracing import incr, logger, span
+
+# Converted resumes kept in SQLite so they can be searched later: one row per
+# resume with its parsed JSON, structured (value, resume_id) tables for skills,
+# job titles and companies, and a contentless FTS5 index over the text. Filters
+# are answered from indexes, never by scanning the parsed JSON: a title or company
+# phrase is first resolved to the distinct values it matches (a small FTS index
+# of the vocabulary), the most selective filter then drives the query in id order
+# and the others are probed per row through primary keys, so "newest matches"
+# stops as soon as it has a page of them.
+
+DEFAULT_STORE_DB = os.environ.get("RESUME_STORE_DB", os.path.join(".resume_store", "resumes.db"))
+# Job workers keep every converted resume unless RESUME_STORE=0.
+STORE_RESULTS = os.environ.get("RESUME_STORE", "1") != "0"
+INGEST_BATCH = 1000  # resumes per transaction in bulk ingest
+DEFAULT_LIMIT = 50
+# Filters are sized by counting at most this many matching rows before picking the driver.
+SELECTIVITY_SAMPLE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resumes (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    filename TEXT,
+    name TEXT,
+    email TEXT,
+    created REAL NOT NULL,
+    parsed TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS skills (
+    skill TEXT NOT NULL COLLATE NOCASE,
+    resume_id INTEGER NOT NULL,
+    PRIMARY KEY (skill, resume_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS titles (
+    title TEXT NOT NULL COLLATE NOCASE,
+    resume_id INTEGER NOT NULL,
+    PRIMARY KEY (title, resume_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS companies (
+    company TEXT NOT NULL COLLATE NOCASE,
+    resume_id INTEGER NOT NULL,
+    PRIMARY KEY (company, resume_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS skills_resume ON skills (resume_id);
+CREATE INDEX IF NOT EXISTS titles_resume ON titles (resume_id);
+CREATE INDEX IF NOT EXISTS companies_resume ON companies (resume_id);
+CREATE TABLE IF NOT EXISTS vocabulary (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL COLLATE NOCASE,
+    UNIQUE (kind, value)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS vocabulary_fts USING fts5(value, content='vocabulary', content_rowid='id');
+CREATE VIRTUAL TABLE IF NOT EXISTS resumes_fts USING fts5(name, body, content='');
+"""
+
+# facet -> (table, column)
+FACETS = {"skill": ("skills", "skill"), "title": ("titles", "title"), "company": ("companies", "company")}
+
+
+def text_values(value):
+    # Every string in a parsed value, depth first.
+    if isinstance(value, str):
+        if value.strip():
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from text_values(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from text_values(item)
+
+
+def unique(values):
+    seen = set()
+    result = []
+    for value in values:
+        value = value.strip() if isinstance(value, str) else ""
+        if value and value.lower() not in seen:
+            seen.add(value.lower())
+            result.append(value)
+    return result
+
+
+def resume_terms(parsed):
+    # {"skill": [...], "title": [...], "company": [...]} of a parsed resume;
+    # PyResParser's designation and company_names count too, for the fallback's output.
+    experience = [exp for exp in parsed.get("experience") or [] if isinstance(exp, dict)]
+    return {"skill": unique(parsed.get("skills") or []),
+            "title": unique([exp.get("title") for exp in experience] + list(parsed.get("designation") or [])),
+            "company": unique([exp.get("company") for exp in experience] + list(parsed.get("company_names") or []))}
+
+
+def fts_row(resume_id, parsed):
+    # (rowid, name, body) as indexed; deleting from the contentless index needs the same values.
+    body = [value for key, value in parsed.items() if key != "name"]
+    return resume_id, parsed.get("name") or "", "\n".join(text_values(body))
+
+
+def fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+class ResumeStore:
+    # Safe from any thread and process: each call opens its own connection, and
+    # WAL lets searches run while a worker or a bulk ingest is writing.
+
+    def __init__(self, path=DEFAULT_STORE_DB):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _connect(self, immediate=False):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA synchronous=NORMAL")
+        try:
+            db.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield db
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def add(self, parsed, digest=None, filename=None):
+        return self.ingest([(parsed, digest, filename)])
+
+    def ingest(self, records, batch_size=INGEST_BATCH):
+        # records yields (parsed, digest, filename); digest defaults to a hash of the
+        # parsed data. A digest already stored is replaced. Each batch is one
+        # transaction of executemany calls. Returns the number of resumes stored.
+        stored = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                stored += self._ingest_batch(batch)
+                batch = []
+        if batch:
+            stored += self._ingest_batch(batch)
+        return stored
+
+    def _ingest_batch(self, batch):
+        rows = {}
+        for parsed, digest, filename in batch:
+            if not parsed or "error" in parsed:
+                continue
+            data = json.dumps(parsed)
+            rows[digest or content_hash(data.encode("utf-8"))] = (parsed, data, filename)
+        if not rows:
+            return 0
+        with span("store.ingest", resumes=len(rows)), self._connect(immediate=True) as db:
+            self._delete(db, [row[0] for row in db.execute(
+                f"SELECT id FROM resumes WHERE digest IN ({','.join('?' * len(rows))})", list(rows))])
+            # Ids are assigned here, inside the write lock, so every table is filled with executemany.
+            next_id = db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM resumes").fetchone()[0]
+            now = time.time()
+            resumes, fts = [], []
+            terms = {facet: [] for facet in FACETS}
+            vocabulary = set()
+            for resume_id, (digest, (parsed, data, filename)) in enumerate(rows.items(), next_id):
+                resumes.append((resume_id, digest, filename, parsed.get("name"), parsed.get("email"), now, data))
+                fts.append(fts_row(resume_id, parsed))
+                for facet, values in resume_terms(parsed).items():
+                    terms[facet] += [(value, resume_id) for value in values]
+                    if facet != "skill":
+                        vocabulary.update((facet, value) for value in values)
+            db.executemany("INSERT INTO resumes (id, digest, filename, name, email, created, parsed) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?)", resumes)
+            for facet, (table, column) in FACETS.items():
+                db.executemany(f"INSERT OR IGNORE INTO {table} ({column}, resume_id) VALUES (?, ?)", terms[facet])
+            db.executemany("INSERT INTO resumes_fts (rowid, name, body) VALUES (?, ?, ?)", fts)
+            last_word = db.execute("SELECT COALESCE(MAX(id), 0) FROM vocabulary").fetchone()[0]
+            db.executemany("INSERT OR IGNORE INTO vocabulary (kind, value) VALUES (?, ?)", sorted(vocabulary))
+            db.execute("INSERT INTO vocabulary_fts (rowid, value) SELECT id, value FROM vocabulary WHERE id > ?",
+                       (last_word,))
+        incr("store_resumes", len(resumes))
+        return len(resumes)
+
+    def _delete(self, db, ids):
+        if not ids:
+            return
+        marks = ",".join("?" * len(ids))
+        stored = db.execute(f"SELECT id, parsed FROM resumes WHERE id IN ({marks})", ids).fetchall()
+        db.executemany("INSERT INTO resumes_fts (resumes_fts, rowid, name, body) VALUES ('delete', ?, ?, ?)",
+                       [fts_row(row["id"], json.loads(row["parsed"])) for row in stored])
+        for table, _ in FACETS.values():
+            db.execute(f"DELETE FROM {table} WHERE resume_id IN ({marks})", ids)
+        db.execute(f"DELETE FROM resumes WHERE id IN ({marks})", ids)
+
+    def delete(self, resume_id):
+        with self._connect(immediate=True) as db:
+            self._delete(db, [resume_id])
+
+    def _filters(self, db, skills, titles, companies, text):
+        # One (table, id_column, condition, params) per filter, or None when a title
+        # or company phrase matches nothing stored.
+        filters = [("skills", "resume_id", "skill = ?", [skill]) for skill in skills]
+        for facet, phrases in (("title", titles), ("company", companies)):
+            table, column = FACETS[facet]
+            for phrase in phrases:
+                values = [row[0] for row in db.execute(
+                    "SELECT value FROM vocabulary WHERE kind = ? AND id IN "
+                    "(SELECT rowid FROM vocabulary_fts WHERE vocabulary_fts MATCH ?)", (facet, fts_phrase(phrase)))]
+                if not values:
+                    return None
+                filters.append((table, "resume_id", f"{column} IN ({','.join('?' * len(values))})", values))
+        if text and text.split():
+            filters.append(("resumes_fts", "rowid", "resumes_fts MATCH ?",
+                            [" AND ".join(fts_phrase(word) for word in text.split())]))
+        return filters
+
+    def _plan(self, db, filters):
+        # FROM/WHERE (and params) driven by the filter matching fewest rows, in id
+        # order; every other filter is an EXISTS probe on its primary key per row.
+        def selectivity(item):
+            table, _, condition, params = item
+            return db.execute(f"SELECT COUNT(*) FROM (SELECT 1 FROM {table} WHERE {condition} LIMIT ?)",
+                              (*params, SELECTIVITY_SAMPLE)).fetchone()[0]
+
+        driver = min(filters, key=selectivity) if len(filters) > 1 else filters[0]
+        table, id_column, condition, params = driver
+        where, params = [condition], list(params)
+        for probe in filters:
+            if probe is not driver:
+                where.append(f"EXISTS (SELECT 1 FROM {probe[0]} WHERE {probe[2]} AND {probe[1]} = r.id)")
+                params += probe[3]
+        return (f"FROM {table} JOIN resumes r ON r.id = {table}.{id_column} WHERE {' AND '.join(where)}",
+                f"{table}.{id_column}", params)
+
+    def search(self, skills=(), titles=(), companies=(), text=None, limit=DEFAULT_LIMIT, offset=0):
+        # Newest first: [{"id", "name", "email", "filename", "created"}]. Skills match
+        # exactly (case-insensitive), titles and companies as phrases ("Engineer" finds
+        # "Senior Software Engineer"), text as words anywhere in the resume.
+        with span("store.search"), self._connect() as db:
+            filters = self._filters(db, skills, titles, companies, text)
+            if filters is None:
+                return []
+            if not filters:
+                sql, order, params = "FROM resumes r", "r.id", []
+            else:
+                sql, order, params = self._plan(db, filters)
+            rows = db.execute(f"SELECT r.id, r.name, r.email, r.filename, r.created {sql} "
+                              f"ORDER BY {order} DESC LIMIT ? OFFSET ?", (*params, limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, skills=(), titles=(), companies=(), text=None):
+        with self._connect() as db:
+            filters = self._filters(db, skills, titles, companies, text)
+            if filters is None:
+                return 0
+            if not filters:
+                return db.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+            sql, _, params = self._plan(db, filters)
+            return db.execute(f"SELECT COUNT(*) {sql}", params).fetchone()[0]
+
+    def get(self, resume_id):
+        with self._connect() as db:
+            row = db.execute("SELECT parsed FROM resumes WHERE id = ?", (resume_id,)).fetchone()
+        return json.loads(row["parsed"]) if row else None
+
+    def facets(self, facet, limit=20):
+        # [(value, resumes)] for "skill", "title" or "company", most common first.
+        table, column = FACETS[facet]
+        with self._connect() as db:
+            return [tuple(row) for row in db.execute(
+                f"SELECT {column}, COUNT(*) AS n FROM {table} GROUP BY {column} ORDER BY n DESC LIMIT ?", (limit,))]
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResumeStore()
+        return _default_store
+
+
+def iter_result_files(paths):
+    # (parsed, digest, filename) from batch.py logs written with --include-data
+    # (JSON lines) and from parsed resume JSON files.
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.get("status") == "ok" and record.get("data"):
+                        yield record["data"], record.get("digest"), record.get("input")
+                    elif record.get("status") == "ok":
+                        logger.warning("%s: %s has no parsed data (run batch.py with --include-data or --store).",
+                                       path, record.get("input"))
+            else:
+                yield json.load(f), None, path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search the store of converted resumes.")
+    parser.add_argument("--db", default=DEFAULT_STORE_DB, help="SQLite store database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Bulk-load batch.py JSONL logs (--include-data) or parsed JSON files.")
+    ingest.add_argument("files", nargs="+")
+    ingest.add_argument("--batch-size", type=int, default=INGEST_BATCH)
+    search = commands.add_parser("search", help="Print resumes matching every filter, newest first.")
+    search.add_argument("-s", "--skill", action="append", default=[])
+    search.add_argument("-t", "--title", action="append", default=[])
+    search.add_argument("-c", "--company", action="append", default=[])
+    search.add_argument("-q", "--text", help="Words that must appear anywhere in the resume.")
+    search.add_argument("-n", "--limit", type=int, default=DEFAULT_LIMIT)
+    search.add_argument("--count", action="store_true", help="Print the number of matches only.")
+    show = commands.add_parser("show", help="Print a stored resume's parsed JSON.")
+    show.add_argument("resume_id", type=int)
+    facets = commands.add_parser("facets", help="Most common skills, titles or companies.")
+    facets.add_argument("facet", choices=sorted(FACETS))
+    facets.add_argument("-n", "--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    store = ResumeStore(args.db)
+    if args.command == "ingest":
+        start = time.perf_counter()
+        stored = store.ingest(iter_result_files(args.files), args.batch_size)
+        print(f"Stored {stored} resumes in {time.perf_counter() - start:.1f}s ({len(store)} total).", file=sys.stderr)
+    elif args.command == "search":
+        filters = {"skills": args.skill, "titles": args.title, "companies": args.company, "text": args.text}
+        if args.count:
+            print(store.count(**filters))
+        else:
+            for row in store.search(limit=args.limit, **filters):
+                print(json.dumps(row))
+    elif args.command == "show":
+        parsed = store.get(args.resume_id)
+        if parsed is None:
+            print(f"No resume {args.resume_id}.", file=sys.stderr)
+            return 1
+        print(json.dumps(parsed, indent=2))
+    elif args.command == "facets":
+        for value, n in store.facets(args.facet, args.limit):
+            print(f"{n:>8}  {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+from entities import extract_entities, merge_entities
+from limits import Deadline, LimitExceeded, check_input_size, limit_result
+from parsed import (build_resume, clean_lines, extract_address, extract_contact, extract_email,
+                    extract_name, extract_skills, iter_page_texts, load_source, parse_certifications,
+                    parse_education, parse_experience, parse_projects, parse_summary,
+                    parse_with_pyresparser, source_ext)
+from sections import SectionSegmenter, get_heading_matcher
+from tracing import logger
+
+# Events are (field, value) tuples. Fields are the keys of the resume dict
+# ("name", "email", "summary", "experience", ...) and carry that field's current
+# value; a field may be sent again when later pages change it. Besides those:
+#   ("page", n)        page n has been consumed
+#   ("warning", msg)   extraction stopped early; the result covers the pages read so far
+#   ("done", resume)   final dict, identical to parse_structured_resume on the full text
+
+
+class StreamingResumeParser:
+    # Consumes page text as it is produced and emits section events as soon as a
+    # section is complete (the next heading has been seen) or a contact entity appears.
+    # Contact entities and skills are only looked for in the pages of the open
+    # section; what the earlier pages gave is kept, so a document is scanned about
+    # once rather than once per page.
+
+    def __init__(self, heading_matcher=None):
+        self._segmenter = SectionSegmenter(heading_matcher or get_heading_matcher())
+        self.pages = []
+        self._sent = {}
+        self._open_from = 0  # first page of the open section
+        self._done = None  # (entities, skills) of the pages before it
+        self._open = None  # (entities, skills) of the pages from it on, as of the last feed
+
+    def feed(self, page_text):
+        self.pages.append(page_text)
+        closed = set()
+        headings = self._segmenter.headings
+        for line in clean_lines(page_text):
+            key = self._segmenter.feed(line)
+            if key:
+                closed.add(key)
+        if self._segmenter.headings != headings and self._open is not None:
+            # A section opened on this page, so the earlier pages are all in finished sections.
+            self._done = self._open if self._done is None else self._merge(self._done, self._open)
+            self._open_from = len(self.pages) - 1
+        text = "\n".join(self.pages[self._open_from:])
+        self._open = (extract_entities(text), set(extract_skills(text)))
+        events = [("page", len(self.pages))]
+        events += self._entity_events(*(self._open if self._done is None else self._merge(self._done, self._open)))
+        events += self._section_events(closed)
+        return events
+
+    def close(self):
+        self._segmenter.close()
+        result = build_resume(self._segmenter.section_map, "\n".join(self.pages))
+        # Bring every field a consumer has been tracking in line with the final result.
+        events = [(field, value) for field, value in result.items() if self._changed(field, value)]
+        events.append(("done", result))
+        return events
+
+    def _changed(self, field, value):
+        if self._sent.get(field) == value:
+            return False
+        self._sent[field] = value
+        return True
+
+    @staticmethod
+    def _merge(first, second):
+        return merge_entities(first[0], second[0]), first[1] | second[1]
+
+    def _entity_events(self, found, skills):
+        entities = [
+            ("name", extract_name("", entities=found) or ""),
+            ("email", extract_email("", found) or ""),
+            ("address", extract_address("", found) or ""),
+            ("contact", extract_contact("", found)),
+            ("skills", sorted(skills)),
+        ]
+        return [(field, value) for field, value in entities if value and self._changed(field, value)]
+
+    def _section_events(self, closed):
+        section_map = self._segmenter.section_map
+        values = []
+        if "summary" in closed:
+            values.append(("summary", parse_summary(section_map["summary"])))
+        if "experience" in closed:
+            values.append(("experience", parse_experience(section_map["experience"])))
+        if "education" in closed or "projects" in closed:
+            educations, project_content, _ = parse_education(section_map.get("education", []))
+            if "education" in closed:
+                values.append(("education", educations))
+            values.append(("projects", parse_projects(section_map.get("projects", []) + project_content)))
+        if "certifications" in closed:
+            values.append(("certifications", parse_certifications(section_map["certifications"])))
+        return [(field, value) for field, value in values if value and self._changed(field, value)]
+
+
+def iter_parse_resume(file_path, heading_matcher=None, ext=None, deadline=None, page_texts=None):
+    # Generator counterpart of parsed.parse_resume: yields events while pages are
+    # still being extracted or OCR'd, ending with ("done", resume). A document over
+    # a limit ends with ("done", {"error": ..., "stage": ...}), as parse_resume does.
+    file_path = load_source(file_path)
+    ext = source_ext(file_path, ext)
+    deadline = deadline or Deadline()
+    parser = StreamingResumeParser(heading_matcher)
+    try:
+        check_input_size(file_path)
+        try:
+            for page_text in iter_page_texts(file_path, ext, deadline, page_texts):
+                yield from parser.feed(page_text)
+        except LimitExceeded:
+            raise
+        except Exception as e:
+            if not parser.pages:
+                logger.warning("Page extraction failed: %s", e)
+                with deadline.stage("pyresparser"):
+                    data = parse_with_pyresparser(file_path, ext)
+                yield ("done", data or {"error": "All extraction methods failed."})
+                return
+            yield ("warning", f"Extraction stopped after page {len(parser.pages)}: {e}")
+        with deadline.stage("parse"):
+            events = parser.close()
+    except LimitExceeded as e:
+        logger.warning("Conversion stopped: %s", e)
+        yield ("done", limit_result(e))
+        return
+    yield from events
@@ -1,94 +1,169 @@
 import streamlit as st
-from parsed import parse_resume, save_uploaded_file
-from layout import generate_docx
+from cache import content_hash
+from jobs import JobQueue, PRIORITY_INTERACTIVE, QueueFull, WorkerPool
+from layout import changed_sections, render_docx
+from pdf_layout import render_pdf
 import os
-import pythoncom
-from docx import Document
-from fpdf import FPDF
+import time
 
-pythoncom.CoInitialize()
+POLL_SECONDS = 0.5
+# Fields of the Nehish layout offered for correction: lists of strings edited one
+# item per line, lists of entries as tables (with the columns that hold lists).
+LINE_FIELDS = [("skills", "Skills"), ("certifications", "Certifications"), ("achievements", "Achievements")]
+TABLE_FIELDS = [("experience", "Experience", ["title", "start", "end", "company", "location", "details"], ["details"]),
+                ("projects", "Projects", ["name", "description"], []),
+                ("education", "Education", ["degree", "institution", "major", "score"], [])]
 
 st.set_page_config(page_title="Resume Format Converter", layout="centered")
 st.title(" Resume Format Converter")
 
 uploaded_file = st.file_uploader("Upload your resume (.pdf, .docx, .txt):", type=["pdf", "docx", "txt"])
 
-def clean_text_for_pdf(text):
-    # Replace common unicode dashes and quotes with ASCII equivalents
-    replacements = {
-        '\u2013': '-',  # en dash
-        '\u2014': '-',  # em dash
-        '\u2018': "'",  # left single quote
-        '\u2019': "'",  # right single quote
-        '\u201c': '"',  # left double quote
-        '\u201d': '"',  # right double quote
-        '\u2022': '*',  # bullet
-        # Add more as needed
-    }
-    for uni, ascii_char in replacements.items():
-        text = text.replace(uni, ascii_char)
-    # Remove any other non-latin-1 characters
-    return text.encode('latin-1', errors='ignore').decode('latin-1')
+@st.cache_resource
+def get_job_queue():
+    return JobQueue()
 
-def docx_to_pdf(docx_path, pdf_path):
-    doc = Document(docx_path)
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    for para in doc.paragraphs:
-        clean_para = clean_text_for_pdf(para.text)
-        pdf.multi_cell(0, 10, clean_para)
-    pdf.output(pdf_path)
+@st.cache_resource
+def get_worker_pool():
+    # One pool per server process; set RESUME_JOBS_EMBEDDED=0 when workers run as
+    # their own service (python jobs.py worker) against the same RESUME_JOBS_DB.
+    return WorkerPool().start()
 
-def convert_to_pdf(input_path, ext):
-    output_pdf = input_path.rsplit('.', 1)[0] + ".pdf"
-    if ext == ".docx":
-        try:
-            docx_to_pdf(input_path, output_pdf)
-            return output_pdf
-        except Exception as e:
-            st.error(f"docx2pdf conversion failed: {e}")
-            return input_path
-    elif ext == ".txt":
-        try:
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.set_font("Arial", size=12)
-            with open(input_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    pdf.cell(0, 10, txt=line.strip(), ln=True)
-            pdf.output(output_pdf)
-            return output_pdf
-        except Exception as e:
-            st.error(f"FPDF conversion failed: {e}")
-            return input_path
-    return input_path
+@st.cache_data(max_entries=32)
+def resume_pdf(parsed_data):
+    # Every rerun (each keystroke in the edit panel) offers the PDF again; it is only
+    # drawn again when the data changed.
+    return render_pdf(parsed_data)
+
+if os.environ.get("RESUME_JOBS_EMBEDDED", "1") != "0":
+    get_worker_pool()
+
+def edit_lines(label, items, key):
+    # New list when the user changed the text, else None.
+    text = "\n".join(str(item) for item in items or [])
+    edited = st.text_area(f"{label} (one per line)", text, key=key)
+    if edited != text:
+        return [line.strip() for line in edited.splitlines() if line.strip()]
+
+def edit_table(label, rows, columns, list_columns, key):
+    # New list of entries when the user changed the table, else None. List cells
+    # (experience details) are shown one item per line; an empty section gets a
+    # blank row to fill in.
+    columns = columns + [column for row in rows for column in row if column not in columns]
+    table = [{column: "\n".join(map(str, row[column])) if isinstance(row.get(column), list) else row.get(column, "")
+              for column in columns} for row in rows] or [dict.fromkeys(columns, "")]
+    st.caption(label)
+    edited = st.data_editor(table, column_order=columns, num_rows="dynamic", use_container_width=True, key=key)
+    if edited == table:
+        return None
+    entries = []
+    for row in edited:
+        row = {column: "" if value is None or value != value else value for column, value in row.items()}
+        if not any(str(value).strip() for value in row.values()):
+            continue
+        for column in list_columns:
+            row[column] = [line.strip() for line in str(row.get(column, "")).splitlines() if line.strip()]
+        entries.append(row)
+    return entries
+
+def edit_resume(parsed, key):
+    # The parsed resume with the user's corrections; fields left alone keep their parsed values.
+    edited = dict(parsed)
+    name = st.text_input("Name", parsed.get("name") or "", key=f"{key}-name")
+    if name != (parsed.get("name") or ""):
+        edited["name"] = name
+    summary = st.text_area("Professional Summary", parsed.get("summary") or "", key=f"{key}-summary")
+    if summary != (parsed.get("summary") or ""):
+        edited["summary"] = summary
+    fields = LINE_FIELDS + ([("summary_bullets", "Summary Bullets")] if parsed.get("summary_bullets") else [])
+    for field, label in fields:
+        items = edit_lines(label, parsed.get(field), f"{key}-{field}")
+        if items is not None:
+            edited[field] = items
+    for field, label, columns, list_columns in TABLE_FIELDS:
+        rows = parsed.get(field) or []
+        if all(isinstance(row, dict) for row in rows):
+            entries = edit_table(label, rows, columns, list_columns, f"{key}-{field}")
+        else:
+            entries = edit_lines(label, rows, f"{key}-{field}")
+        if entries is not None:
+            edited[field] = entries
+    return edited
 
 if uploaded_file:
-    with st.spinner(" Parsing resume..."):
-        saved_path = save_uploaded_file(uploaded_file)
-        ext = os.path.splitext(saved_path)[1].lower()
-        # Remove conversion for .docx files
-        pdf_path = saved_path
-        if ext == ".pdf":
-            pdf_path = saved_path
-        elif ext == ".txt":
-            pdf_path = convert_to_pdf(saved_path, ext)
-        # For .docx, pass directly
-        parsed_data = parse_resume(pdf_path)
+    queue = get_job_queue()
+    data = uploaded_file.getvalue()
+    # Reruns of this script (widget clicks, polling) keep following the same job.
+    job_key = "job-" + content_hash(data)
+    job_id = st.session_state.get(job_key)
+    if job_id is None:
+        try:
+            job_id = queue.submit(data, uploaded_file.name, PRIORITY_INTERACTIVE)
+        except QueueFull as e:
+            st.warning(f"The converter is busy, please retry in a moment. {e}")
+            st.stop()
+        st.session_state[job_key] = job_id
+    info = queue.status(job_id)
+    if info is None:
+        # Purged from the queue; submit again.
+        del st.session_state[job_key]
+        st.rerun()
+
+    if info["status"] in ("queued", "running"):
+        if info["status"] == "queued":
+            st.info(f" Waiting for a converter ({info['position']} ahead)...")
+        if st.button("Cancel"):
+            queue.cancel(job_id)
+            st.rerun()
+        partial = dict(info["partial"])
+        stage = partial.pop("stage", None)
+        with st.spinner(f" Parsing resume ({stage})..." if stage else " Parsing resume..."):
+            # Show sections as they are extracted instead of waiting for every page
+            for warning in partial.pop("warnings", []):
+                st.warning(warning)
+            if partial:
+                st.json(partial)
+            time.sleep(POLL_SECONDS)
+        st.rerun()
 
-        if parsed_data:
-            st.success("Resume parsed successfully!")
-            with st.expander("Preview Extracted Data"):
-                st.json(parsed_data)
-            docx_path = generate_docx(parsed_data)
-            with open(docx_path, "rb") as f:
-                st.download_button(
-                    label="Download Formatted Resume",
-                    data=f,
-                    file_name="nehish_format_resume.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                )
+    result = queue.result(job_id) if info["status"] == "done" else None
+    if result:
+        parsed_data, docx_bytes = result
+        st.success("Resume parsed successfully!")
+        near_duplicate = info["partial"].get("near_duplicate")
+        if near_duplicate:
+            changed = ", ".join(near_duplicate["changed"]) or "nothing"
+            st.info(f"Near-duplicate of {near_duplicate['filename']} ({near_duplicate['similarity']:.0%} similar); "
+                    f"changed: {changed}.")
+        with st.expander("Edit Extracted Data"):
+            edited = edit_resume(parsed_data, job_id)
+        if edited != parsed_data:
+            # Only the sections an edit touches are rendered again (layout.NehishRenderer),
+            # so the downloads follow each correction without parsing the resume again.
+            st.caption("Edited: " + ", ".join(changed_sections(parsed_data, edited)))
+            parsed_data, docx_bytes = edited, render_docx(edited)
+        st.download_button(
+            label="Download Formatted Resume",
+            data=docx_bytes,
+            file_name="nehish_format_resume.docx",
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        )
+        # Drawn straight from the parsed data, no DOCX round-trip.
+        st.download_button(
+            label="Download as PDF",
+            data=resume_pdf(parsed_data),
+            file_name="nehish_format_resume.pdf",
+            mime="application/pdf"
+        )
+    else:
+        # Forget the failed or cancelled job, so Retry (or uploading the file again)
+        # submits a new one instead of showing this error until the job is purged.
+        del st.session_state[job_key]
+        if info["status"] == "cancelled":
+            st.warning(" Conversion cancelled.")
         else:
-            st.error(" Failed to parse resume. Try another file.")
+            # A limit's message says where it stopped, e.g. "Timed out at stage ocr after 90.0s".
+            st.error(f" Failed to parse resume: {info['error']}" if info.get("error")
+                     else " Failed to parse resume. Try another file.")
+        if st.button("Retry"):
+            st.rerun()
@@ -0,0 +1,36 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import batch
+
+
+def parse_or_die(input_path):
+    # Stands in for a file that crashes the PDF or OCR libraries and takes its worker down.
+    if "crash" in os.path.basename(input_path):
+        os._exit(1)
+    return {"name": os.path.basename(input_path), "skills": ["Python"], "experience": []}
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patched parser")
+def test_worker_crash_fails_only_its_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "parse_path", parse_or_die)
+    inputs = []
+    for i in range(30):
+        path = tmp_path / ("crash.txt" if i == 3 else f"resume_{i}.txt")
+        path.write_text("resume text", encoding="utf-8")
+        inputs.append(str(path))
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    log_path = tmp_path / "results.jsonl"
+
+    summary = batch.run_batch(batch.plan_outputs(inputs, str(out_dir)), str(log_path), workers=2, progress_every=0)
+
+    records = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert sorted(record["input"] for record in records) == sorted(inputs)
+    failed = [record for record in records if record["status"] != "ok"]
+    assert [record["input"] for record in failed] == [inputs[3]]
+    assert failed[0]["error"].startswith("BrokenProcessPool")
+    assert summary == dict(summary, total=30, failed=1)
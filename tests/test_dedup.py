@@ -0,0 +1,35 @@
+import dedup
+import limits
+import parsed
+from cache import ResumeCache
+
+
+def convert(tmp_path, data, parse, **kwargs):
+    index = dedup.DedupIndex(str(tmp_path / "dedup.db"))
+    cache = ResumeCache(str(tmp_path / "cache"), max_memory_items=0)
+    return dedup.convert_with_index(data, "resume.pdf", parse, lambda resume: b"docx", cache, index, **kwargs)
+
+
+def test_text_layer_is_extracted_once(tmp_path, monkeypatch):
+    extracted = []
+
+    def extract(source, deadline=None):
+        extracted.append(deadline)
+        return ["Jane Doe jane@example.com Python developer with ten years of experience " * 5] * 2
+
+    monkeypatch.setattr(dedup, "extract_pdf_page_texts", extract)
+    monkeypatch.setattr(parsed, "extract_pdf_page_texts", extract)
+    deadline = limits.Deadline()
+    resume, _, _, _ = convert(tmp_path, b"%PDF-1.4", lambda data, page_texts: parsed.parse_resume(
+        data, ".pdf", deadline, page_texts), deadline=deadline)
+    assert "error" not in resume and "Python" in resume["skills"]
+    assert extracted == [deadline]
+
+
+def test_oversized_input_is_refused_before_extraction(tmp_path, monkeypatch):
+    extracted = []
+    monkeypatch.setattr(limits, "MAX_INPUT_BYTES", 4)
+    monkeypatch.setattr(dedup, "extract_pdf_page_texts", lambda source, deadline=None: extracted.append(source))
+    resume, docx_bytes, _, match = convert(tmp_path, b"%PDF-1.4", lambda data, page_texts: extracted.append(data))
+    assert resume["stage"] == "input" and "RESUME_MAX_INPUT_BYTES" in resume["error"]
+    assert (docx_bytes, match, extracted) == (None, None, [])
@@ -0,0 +1,60 @@
+import docx
+import pytest
+
+from docx_text import docx_text, read_docx
+
+
+def python_docx_paragraphs(doc):
+    # Body paragraphs and table cells in reading order, as python-docx renders each paragraph's text.
+    paragraphs = []
+    for block in doc.iter_inner_content():
+        if isinstance(block, docx.table.Table):
+            for row in block.rows:
+                for cell in row.cells:
+                    paragraphs.extend(para.text for para in cell.paragraphs)
+        else:
+            paragraphs.append(block.text)
+    return paragraphs
+
+
+@pytest.fixture
+def resume_docx(tmp_path):
+    doc = docx.Document()
+    doc.sections[0].header.paragraphs[0].text = "Jane Doe"
+    doc.sections[0].header.add_paragraph("")
+    doc.sections[0].header.add_paragraph("jane@example.com\t+1 415 555 0100")
+    doc.add_heading("Experience", level=1)
+    para = doc.add_paragraph("Senior Engineer, ")
+    para.add_run("Acme Corp").bold = True
+    para.add_run("\t01/2020 - Current")
+    para.add_run().add_break()
+    para.add_run("Built the billing platform")
+    doc.add_paragraph("")
+    doc.add_paragraph("Led a team of 5", style="List Bullet")
+    table = doc.add_table(rows=2, cols=2)
+    for i, cell in enumerate(table._cells):
+        cell.text = f"Skill {i}"
+    table.cell(1, 1).add_paragraph("Second line")
+    doc.add_paragraph("Education")
+    doc.add_paragraph("BSc Computer Science — Université de Montréal")
+    path = tmp_path / "resume.docx"
+    doc.save(str(path))
+    return str(path)
+
+
+def test_paragraphs_match_python_docx(resume_docx):
+    doc = docx.Document(resume_docx)
+    streamed = read_docx(resume_docx)
+    assert streamed["paragraphs"] == python_docx_paragraphs(doc)
+    # Outside tables it is exactly Document.paragraphs.
+    assert [p for p in streamed["paragraphs"] if not p.startswith(("Skill", "Second"))] == [
+        para.text for para in doc.paragraphs]
+    assert streamed["headers"] == ["Jane Doe", "jane@example.com\t+1 415 555 0100"]
+
+
+def test_docx_text_from_bytes(resume_docx):
+    with open(resume_docx, "rb") as f:
+        data = f.read()
+    doc = docx.Document(resume_docx)
+    assert docx_text(data) == docx_text(resume_docx) == "\n".join(
+        ["Jane Doe", "jane@example.com\t+1 415 555 0100"] + python_docx_paragraphs(doc))
@@ -0,0 +1,72 @@
+import re
+
+import pytest
+
+from entities import contact_lines, extract_entities
+
+RESUME = """Jane Doe
+Email: jane.doe+cv@mail.example.com, JANE.DOE+CV@MAIL.EXAMPLE.COM; alt: j_d@corp.co.uk.
+Phone: +91 98765 43210 | +1 (415) 555-0100 | (020) 7946 0958 | 415-555-0100 | 9876543210
+Order #12345 on 2021-03-04, ID 123456789012345678, v1.2.3, 12/2019 - Current
+Address: 221B Baker Street, London
+LinkedIn: https://www.linkedin.com/in/janedoe/, github.com/janedoe. Site www.janedoe.dev)
+"""
+
+
+def test_emails():
+    # In document order, without case-insensitive repeats; a trailing "." is not part of the domain.
+    assert extract_entities(RESUME)["emails"] == ["jane.doe+cv@mail.example.com", "j_d@corp.co.uk"]
+    assert extract_entities("@handle, a@b, user@host")["emails"] == []
+
+
+def test_phones():
+    assert extract_entities(RESUME)["phones"] == [
+        "+91 98765 43210", "+1 (415) 555-0100", "(020) 7946 0958", "415-555-0100", "9876543210"]
+
+
+@pytest.mark.parametrize("text", ["2021-03-04", "#12345", "ID 123456789012345678", "v1.2.3", "12/2019 - 03/2021",
+                                  "A9876543210", "98765432100123"])
+def test_numbers_that_are_not_phones(text):
+    assert extract_entities(text)["phones"] == []
+
+
+def test_urls():
+    entities = extract_entities(RESUME)
+    # Trailing punctuation is dropped; github.com/ and www. count without a scheme.
+    assert entities["linkedin"] == ["https://www.linkedin.com/in/janedoe/"]
+    assert entities["github"] == ["github.com/janedoe"]
+    assert entities["portfolio"] == ["www.janedoe.dev"]
+    assert extract_entities("See http://example.org/cv.")["portfolio"] == ["http://example.org/cv"]
+
+
+def test_name_and_address():
+    entities = extract_entities(RESUME)
+    assert (entities["name"], entities["address"]) == ("Jane Doe", "221B Baker Street, London")
+    assert extract_entities("Curriculum Vitae\nName: John Smith\n")["name"] == "John Smith"
+    assert extract_entities("  \n  Jane  \nx")["name"] == "Jane"
+    assert extract_entities("")["address_line"] is None
+
+
+@pytest.mark.parametrize("text", [
+    RESUME,
+    "Resume\nFull name - Ana Maria Lopez\nana@x.io",
+    "Contact: NAME: jo bo, me@site.org, Address: Flat 2, 10 Main St.\nAddress: second",
+    "no contact details at all",
+    "",
+])
+def test_first_email_name_and_address_match_the_old_searches(text):
+    entities = extract_entities(text)
+    email = re.search(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.\w+", text)
+    name = re.search(r"(?i)name[:\s-]+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)+)", text)
+    address = re.search(r"Address: (.+)", text)
+    assert (entities["emails"] or [""])[0] == (email.group(0) if email else "")
+    assert entities["name"] == (name.group(1).strip() if name else next(
+        (line.strip() for line in text.splitlines() if line.strip()), ""))
+    assert entities["address_line"] == (address.group(0) if address else None)
+
+
+def test_contact_lines():
+    assert contact_lines(extract_entities(RESUME)) == [
+        "Phone: +91 98765 43210", "Phone: +1 (415) 555-0100", "Phone: (020) 7946 0958", "Phone: 415-555-0100",
+        "Phone: 9876543210", "Address: 221B Baker Street, London", "LinkedIn: https://www.linkedin.com/in/janedoe/",
+        "GitHub: github.com/janedoe", "Portfolio: www.janedoe.dev", "Email: j_d@corp.co.uk"]
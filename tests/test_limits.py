@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import ocr
+import parsed
+import streaming
+from limits import Cancelled, Deadline, StageTimeout, bind, check_deadline
+
+
+@pytest.fixture
+def scan(tmp_path, monkeypatch):
+    # A "scanned" PDF: no text layer on any page, OCR stubbed out and recorded.
+    calls = []
+    pages = {"count": 3}
+
+    def ocr_page(file_path, page_number, budget=None):
+        calls.append(page_number)
+        check_deadline()  # as render_page does through run_child()
+        if budget is not None:
+            budget.reserve(page_number, 300)
+        return f"Page {page_number} text"
+
+    def pyresparser(*args, **kwargs):
+        calls.append("pyresparser")
+
+    monkeypatch.setattr(ocr, "pdf_page_sizes", lambda path, last_page=None: (pages["count"], {
+        n: (612.0, 792.0) for n in range(1, pages["count"] + 1)}))
+    monkeypatch.setattr(ocr, "ocr_page", ocr_page)
+    monkeypatch.setattr(ocr, "OCR_WORKERS", 1)
+    monkeypatch.setattr(parsed, "extract_pdf_page_texts", lambda path, deadline=None: [""] * pages["count"])
+    monkeypatch.setattr(parsed, "parse_with_pyresparser", pyresparser)
+    monkeypatch.setattr(streaming, "parse_with_pyresparser", pyresparser)
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    return str(path), pages, calls
+
+
+def test_ocr_page_cap_ends_at_stage_ocr(scan):
+    path, pages, calls = scan
+    pages["count"] = ocr.OCR_MAX_PAGES + 10
+    result = parsed.parse_resume(path)
+    assert result["stage"] == "ocr" and "RESUME_OCR_MAX_PAGES" in result["error"]
+    events = list(streaming.iter_parse_resume(path))
+    assert events[-1] == ("done", result)
+    # Refused before any page was rendered, and no fallback to PyResParser.
+    assert calls == []
+
+
+def test_ocr_pixel_budget_ends_at_stage_ocr(scan, monkeypatch):
+    path, pages, calls = scan
+    # Room for one letter page at 300 dpi.
+    monkeypatch.setattr(ocr, "OCR_MAX_PIXELS", 10_000_000)
+    result = parsed.parse_resume(path)
+    assert result["stage"] == "ocr" and "RESUME_OCR_MAX_PIXELS" in result["error"]
+    assert "pyresparser" not in calls
+
+
+def test_time_between_pages_is_not_charged_to_ocr(scan):
+    path, pages, calls = scan
+    pages["count"] = 4
+    deadline = Deadline(timeout=0, stage_timeouts={"ocr": 0.2})
+    texts = []
+    for text in parsed.iter_page_texts(path, ".pdf", deadline):
+        texts.append(text)
+        time.sleep(0.1)  # segmenting and publishing partial results
+    assert texts == [f"Page {n} text" for n in range(1, 5)]
+
+
+def test_stage_time_accumulates_across_entries():
+    deadline = Deadline(timeout=0, stage_timeouts={"ocr": 0.2})
+    with pytest.raises(StageTimeout) as raised:
+        for _ in range(5):
+            with deadline.stage("ocr"):
+                time.sleep(0.06)
+    assert raised.value.stage == "ocr"
+
+
+def test_pool_thread_is_charged_to_its_own_stage():
+    # An OCR pool thread checks while the consumer is between fetches (in no stage,
+    # or already in pdf_text): the timeout is still OCR's and says so.
+    deadline = Deadline(timeout=0, stage_timeouts={"ocr": 0.1, "pdf_text": 10})
+    with deadline.stage("ocr"):
+        time.sleep(0.15)
+    raised = []
+
+    def worker():
+        with bind(deadline, "ocr"):
+            try:
+                check_deadline()
+            except StageTimeout as e:
+                raised.append(e)
+
+    with deadline.stage("pdf_text"):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert deadline.current == "pdf_text"
+        deadline.check()
+    assert [e.stage for e in raised] == ["ocr"]
+    assert "stage ocr" in str(raised[0]) and "stage limit 0.1s" in str(raised[0])
+
+
+def fake_poppler(tmp_path, monkeypatch, pdftoppm):
+    # POPPLER_PATH pointed at a directory with a stand-in pdftoppm (a Python script).
+    path = tmp_path / "pdftoppm"
+    path.write_text(f"#!{sys.executable}\n{pdftoppm}\n")
+    path.chmod(0o755)
+    monkeypatch.setattr(ocr, "POPPLER_PATH", str(tmp_path))
+
+
+@pytest.mark.skipif(os.name == "nt", reason="stand-in tools are shebang scripts")
+def test_render_page_reads_pdftoppm_stdout(tmp_path, monkeypatch):
+    fake_poppler(tmp_path, monkeypatch, "import sys; sys.stdout.buffer.write(b'P5 4 3 255 ' + bytes(12))")
+    img, dpi = ocr.render_page("scan.pdf", 1, 150, grayscale=True)
+    assert (img.size, img.mode, dpi) == ((4, 3), "L", 150)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="stand-in tools are shebang scripts")
+def test_cancel_kills_pdftoppm(tmp_path, monkeypatch):
+    fake_poppler(tmp_path, monkeypatch, "import time; time.sleep(30)")
+    deadline = Deadline(timeout=0, stage_timeouts={})
+    raised = []
+
+    def render():
+        with bind(deadline, "ocr"):
+            try:
+                ocr.render_page("scan.pdf", 1, 150)
+            except Cancelled as e:
+                raised.append(e)
+
+    thread = threading.Thread(target=render)
+    thread.start()
+    time.sleep(0.5)
+    started = time.monotonic()
+    deadline.cancel()
+    thread.join(5)
+    assert not thread.is_alive() and time.monotonic() - started < 5
+    assert [e.stage for e in raised] == ["ocr"]
+
+
+def test_ocr_pool_starts_on_first_page(scan):
+    path, pages, calls = scan
+    before = threading.active_count()
+    texts = ocr.iter_ocr_pdf_pages(path, [1, 2, 3], workers=2)
+    # Dropped before its first page (an error before the caller's loop): nothing ran.
+    assert (calls, threading.active_count()) == ([], before)
+    del texts
+    texts = ocr.iter_ocr_pdf_pages(path, [1, 2, 3], workers=2)
+    assert list(texts) == ["Page 1 text", "Page 2 text", "Page 3 text"]
+    assert threading.active_count() == before
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from sections import SECTION_HEADINGS, HeadingMatcher, SectionSegmenter, get_heading_matcher, segment_sections
+
+
+def loop_sections(lines):
+    # The nested any() scans the compiled matcher replaced.
+    section_map = {}
+    current_section = None
+    buffer = []
+    for line in lines:
+        if '|' in line:
+            left, right = [part.strip() for part in line.split('|', 1)]
+            key = next((key for key, triggers in SECTION_HEADINGS
+                        if any(left.lower().startswith(t) for t in triggers)), None)
+            if key:
+                if current_section and buffer:
+                    section_map[current_section] = buffer
+                current_section, buffer = key, [right]
+                continue
+        l_line = line.lower().strip()
+        for key, triggers in SECTION_HEADINGS:
+            if (any(l_line.startswith(t) for t in triggers)
+                    or any(f"{t}:" in l_line or f"{t} -" in l_line or f"{t}." in l_line for t in triggers)
+                    or any(t.upper() in line.upper() and len(line.strip()) < 20 for t in triggers)):
+                if current_section and buffer:
+                    section_map[current_section] = buffer
+                current_section, buffer = key, []
+                break
+        else:
+            buffer.append(line)
+    if current_section and buffer:
+        section_map[current_section] = buffer
+    return section_map
+
+
+@pytest.mark.parametrize("line, key", [
+    ("Summary", "summary"),
+    ("EDUCATION", "education"),
+    ("Work Experience", "experience"),
+    ("Technical Skills", "skills"),
+    ("Certifications", "certifications"),
+    ("Key Achievements", "projects"),  # short: a trigger anywhere
+    ("Projects and Certifications", "projects"),  # starts with a trigger; certifications' is not followed by ":"
+    ("Professional Summary", None),  # 20 characters is long, and the trigger is last
+    ("Objective: to build reliable data pipelines at scale", "summary"),
+    ("Completed a degree: BSc in Physics, 2015", "education"),
+    ("Led the migration project - cutting costs by half", "projects"),
+    ("Worked on the degree audit system for the registrar office", None),
+    ("Python, SQL, AWS", None),
+])
+def test_heading_detection(line, key):
+    assert get_heading_matcher().classify(line) == key
+
+
+def test_segment_sections():
+    lines = ["Jane Doe", "Summary", "Backend engineer.", "Experience | Acme Corp", "Built APIs",
+             "Skills", "Python, SQL", "Education", "BSc Computer Science", "Skills", "Go"]
+    assert segment_sections(lines, get_heading_matcher()) == {
+        "summary": ["Backend engineer."],
+        "experience": ["Acme Corp", "Built APIs"],
+        "education": ["BSc Computer Science"],
+        "skills": ["Go"],  # a section seen twice keeps its last occurrence
+    }
+
+
+def test_segmenter_reports_the_section_each_heading_closes():
+    segmenter = SectionSegmenter(get_heading_matcher())
+    closed = [segmenter.feed(line) for line in ["Summary", "Engineer", "Skills", "Experience", "Acme"]]
+    # An empty section (Skills) is not closed, or kept.
+    assert closed + [segmenter.close()] == [None, None, "summary", None, None, "experience"]
+    assert segmenter.section_map == {"summary": ["Engineer"], "experience": ["Acme"]}
+
+
+def test_custom_headings():
+    matcher = HeadingMatcher([("experience", ["berufserfahrung"]), ("skills", ["kenntnisse"])])
+    lines = ["Berufserfahrung", "Acme GmbH", "Kenntnisse", "Python"]
+    assert segment_sections(lines, matcher) == {"experience": ["Acme GmbH"], "skills": ["Python"]}
+
+
+def test_matches_the_loop_on_generated_documents():
+    rng = random.Random(0)
+    words = [t for _, triggers in SECTION_HEADINGS for t in triggers] + [
+        "acme", "built", "python", "team", "2019", "lead", "data", "Inc", "-", ":", ".", "|", "and"]
+    for _ in range(2000):
+        lines = []
+        for _ in range(rng.randint(1, 12)):
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+            lines.append(line.upper() if rng.random() < 0.2 else line.title() if rng.random() < 0.3 else line)
+        assert segment_sections(lines, get_heading_matcher()) == loop_sections(lines), lines
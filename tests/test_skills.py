@@ -0,0 +1,52 @@
+import os
+import re
+
+import pytest
+
+import cache
+import skills
+
+
+def keyword_skills(text):
+    # The regex loop the trie replaced.
+    return sorted({kw for kw in skills.DEFAULT_SKILLS if re.search(r"\b" + re.escape(kw) + r"\b", text, re.I)})
+
+
+@pytest.mark.parametrize("text", [
+    "Skills: JavaScript, React, Node.js, Express.js, MongoDB, MySQL-based SQL, HTML/CSS, AWS",
+    "machine learning and DATA ANALYSIS with Python/Django; AI-driven prototyping",
+    "Reactive programming in Nodejs, R&D, Rust, systems, ibm_cloud, Github Actions",
+    "Certifications: AWS Certified; Agile/Scrum; Tableau dashboards; Opencv, Tensorflow",
+    "",
+])
+def test_default_skills_match_the_keyword_regexes(text):
+    assert skills.SkillMatcher({skill: [] for skill in skills.DEFAULT_SKILLS}).match(text) == keyword_skills(text)
+
+
+def test_multi_word_skills():
+    matcher = skills.SkillMatcher({"Machine learning": ["ML"], "Data analysis": [], "Analysis": []})
+    assert matcher.match("Machine Learning and data analysis") == ["Analysis", "Data analysis", "Machine learning"]
+    # Any whitespace between the words, but not a missing one.
+    assert matcher.match("Machine\n  learning") == ["Machine learning"]
+    assert matcher.match("Machinelearning, data-analysis") == ["Analysis"]
+    assert matcher.match("ML") == ["Machine learning"]
+
+
+def test_word_boundaries():
+    matcher = skills.SkillMatcher({"R": [], "React": [], "C++": ["cpp"], "CI/CD": [], "Kubernetes": ["k8s"]})
+    assert matcher.match("Reactive Rust and C+, CI / CD") == []
+    assert matcher.match("R&D in React; C++17, cpp and CI/CD on k8s") == ["C++", "CI/CD", "Kubernetes", "R", "React"]
+    assert [i for i, _ in matcher.find("k8s, K8S")] == [0, 2]
+
+
+def test_default_matcher_follows_taxonomy_edits(tmp_path, monkeypatch):
+    path = tmp_path / "skills.csv"
+    path.write_text("Kubernetes,k8s\n", encoding="utf-8")
+    monkeypatch.setenv("RESUME_SKILL_TAXONOMY", str(path))
+    monkeypatch.setattr(skills, "_default_matcher", None)
+    key = cache.config_fingerprint(".pdf")
+    assert skills.get_default_matcher().match("Ran k8s and Terraform") == ["Kubernetes"]
+    path.write_text("Kubernetes,k8s\nTerraform\n", encoding="utf-8")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert cache.config_fingerprint(".pdf") != key
+    assert skills.get_default_matcher().match("Ran k8s and Terraform") == ["Kubernetes", "Terraform"]
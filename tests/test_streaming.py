@@ -0,0 +1,49 @@
+import streaming
+from entities import extract_entities, merge_entities
+from parsed import extract_entity_fields, parse_structured_resume
+
+PAGES = [
+    "Jane Doe\nSummary\nBackend engineer. jane@example.com",
+    "Experience\nSenior Engineer, 01/2020 - Current\nAcme Corp - London\nPython and AWS",
+    "Worked with Django. Phone: +44 20 7946 0958\nhttps://github.com/janedoe",
+    "Education\nBSc Computer Science\nSkills\nMachine learning, SQL\nAddress: 1 Main St",
+    "Projects\nBilling platform\nContact: JANE@EXAMPLE.COM, jd@corp.io, www.janedoe.dev",
+]
+
+
+def stream(pages):
+    parser = streaming.StreamingResumeParser()
+    fed = [dict(parser.feed(page)) for page in pages]
+    return fed, parser.close()
+
+
+def test_streamed_fields_match_a_full_scan():
+    fed, events = stream(PAGES)
+    sent = {}
+    for n, page_events in enumerate(fed, 1):
+        sent.update(page_events)
+        fields = extract_entity_fields("\n".join(PAGES[:n]))
+        assert {field: sent.get(field) for field, value in fields.items() if value} == {
+            field: value for field, value in fields.items() if value}
+    assert events[-1] == ("done", parse_structured_resume("\n".join(PAGES)))
+
+
+def test_pages_of_finished_sections_are_not_scanned_again(monkeypatch):
+    scanned = []
+
+    def scan(text):
+        scanned.append(len(text))
+        return extract_entities(text)
+
+    monkeypatch.setattr(streaming, "extract_entities", scan)
+    pages = [f"Section {n}\nProjects\nProject {n} in Python, team of {n}" for n in range(200)]
+    stream(pages)
+    # Every page opens a section: each feed scans only its own page.
+    assert scanned == [len(page) for page in pages]
+
+
+def test_merge_entities():
+    first, second = "Jane Doe\nAddress: 1 Main St\nj@x.io", "Name: John Smith\nJ@X.IO, k@y.io\nAddress: elsewhere"
+    assert merge_entities(extract_entities(first), extract_entities(second)) == extract_entities(
+        first + "\n" + second)
+    assert merge_entities(extract_entities("\n "), extract_entities("Jane")) == extract_entities("\n \nJane")
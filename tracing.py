@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("resume")
+
+# Debug artifacts (e.g. the rendered first page of every OCR run) are only written when asked for.
+DEBUG_ARTIFACTS = os.environ.get("RESUME_DEBUG_ARTIFACTS", "") not in ("", "0")
+DEBUG_DIR = os.environ.get("RESUME_DEBUG_DIR", "debug_artifacts")
+
+
+class Metrics:
+    # Process-wide aggregates: per-span count/total/max seconds and labelled counters.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self.spans.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+
+    def incr(self, name, value=1, labels=None):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "spans": {name: dict(stats) for name, stats in self.spans.items()},
+                "counters": [{"name": name, "labels": dict(labels), "value": value}
+                             for (name, labels), value in self.counters.items()],
+            }
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+metrics = Metrics()
+_sinks = []
+
+
+class LogSink:
+    def __init__(self, log=logger, level=logging.DEBUG):
+        self.log = log
+        self.level = level
+
+    def emit(self, event):
+        if event["type"] == "span":
+            self.log.log(self.level, "%s took %.1f ms %s", event["name"], event["seconds"] * 1000,
+                         event.get("attrs") or "")
+        else:
+            self.log.log(self.level, "%s += %s %s", event["name"], event["value"], event.get("labels") or "")
+
+
+class JsonLinesSink:
+    # One JSON object per span/counter event, appended to a file or written to a stream.
+
+    def __init__(self, path=None, stream=None):
+        self._lock = threading.Lock()
+        self._stream = stream or open(path, "a", encoding="utf-8")
+
+    def emit(self, event):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _label_value(value):
+    # The text format only allows \\, \" and \n escapes in label values; Windows paths need the first.
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{_metric_name(k)}="{_label_value(v)}"' for k, v in sorted(labels.items())) + "}"
+
+
+def render_prometheus(snapshot=None, prefix="resume"):
+    # Prometheus text exposition of the aggregated metrics (for a textfile collector or an HTTP handler).
+    snapshot = snapshot or metrics.snapshot()
+    out = [f"# TYPE {prefix}_stage_seconds summary"]
+    for name, stats in sorted(snapshot["spans"].items()):
+        labels = _labels({"stage": name})
+        out.append(f"{prefix}_stage_seconds_count{labels} {stats['count']}")
+        out.append(f"{prefix}_stage_seconds_sum{labels} {stats['total']:.6f}")
+        out.append(f"{prefix}_stage_seconds_max{labels} {stats['max']:.6f}")
+    seen = set()
+    for counter in sorted(snapshot["counters"], key=lambda c: (c["name"], sorted(c["labels"].items()))):
+        name = f"{prefix}_{_metric_name(counter['name'])}_total"
+        if name not in seen:
+            seen.add(name)
+            out.append(f"# TYPE {name} counter")
+        out.append(f"{name}{_labels(counter['labels'])} {counter['value']}")
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus(path, prefix="resume"):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus(prefix=prefix))
+    os.replace(tmp_path, path)
+
+
+def add_sink(sink):
+    _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def _emit(event):
+    for sink in list(_sinks):
+        try:
+            sink.emit(event)
+        except Exception as e:
+            logger.warning("Trace sink %r failed: %s", sink, e)
+
+
+@contextmanager
+def span(name, **attrs):
+    # Time a pipeline stage; always aggregated into `metrics`, forwarded to sinks if any are installed.
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        metrics.observe(name, seconds)
+        if _sinks:
+            _emit({"type": "span", "name": name, "seconds": seconds, "attrs": attrs,
+                   "thread": threading.current_thread().name, "pid": os.getpid()})
+
+
+def incr(name, value=1, **labels):
+    metrics.incr(name, value, labels)
+    if _sinks:
+        _emit({"type": "counter", "name": name, "value": value, "labels": labels, "pid": os.getpid()})
+
+
+def debug_artifact_path(name):
+    # Path to write a debug artifact to, or None when artifacts are disabled.
+    if not DEBUG_ARTIFACTS:
+        return None
+    os.makedirs(DEBUG_DIR, exist_ok=True)
+    return os.path.join(DEBUG_DIR, name)
+
+
+def configure_from_env():
+    # RESUME_TRACE_LOG=1 logs every span; RESUME_TRACE_JSON=<path> appends JSON lines.
+    if os.environ.get("RESUME_TRACE_LOG", "") not in ("", "0"):
+        add_sink(LogSink(level=logging.INFO))
+    if os.environ.get("RESUME_TRACE_JSON"):
+        add_sink(JsonLinesSink(os.environ["RESUME_TRACE_JSON"]))
+
+
+configure_from_env()